@@ -0,0 +1,400 @@
+# my-azure-labs-collection/custom-services/bench/loadgen.py
+"""Open-loop load generator for the whole stack, with latency percentiles per hop.
+
+Usage (from custom-services): python bench/loadgen.py [profile.json] [--out report.json]
+
+Every request stream (frontend page, API endpoint, router data plane) has
+its own Poisson arrival schedule. A request is sent when its time comes,
+whether or not earlier ones have answered. Latency is measured from that
+scheduled time, not from when the request actually went out. A service that
+stalls therefore shows its full queueing delay instead of quietly slowing
+the generator down (coordinated omission). Rates are stepped up by the
+profile's multipliers, and the report names the first hop that missed its
+p99 target or returned more than 1% errors (timeouts included).
+
+Addresses default to each service's own config/app.json (or its template).
+Only the standard library is used.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+SERVICES_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PROFILE = Path(__file__).resolve().with_name("loadgen.json")
+PERCENTILES = (50, 90, 99, 99.9)
+GENERATOR_LAG_LIMIT = 0.05  # seconds behind schedule before the generator itself is the bottleneck
+
+def _service_config(service: str) -> dict:
+    config_dir = SERVICES_ROOT / service / "config"
+    for name in ("app.json", "template.app.json"):
+        path = config_dir / name
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+def default_addresses() -> Dict[str, str]:
+    fe = _service_config("my-azure-frontend").get("frontend", {})
+    api = _service_config("my-azure-api").get("api", {})
+    dp = _service_config("my-azure-router").get("router", {}).get("dataplane", {})
+    return {
+        "frontend": f"http://{fe.get('host', '127.0.0.1')}:{fe.get('port', 8501)}",
+        "api": f"http://{api.get('host', '127.0.0.1')}:{api.get('port', 8080)}",
+        "router": f"{dp.get('host', '127.0.0.1')}:{dp.get('port', 5001)}",
+    }
+
+# ---- HTTP/1.1 keep-alive client ----
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, List[str]], bytes, bool]:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    version, status = line.split(None, 2)[:2]
+    headers: Dict[str, List[str]] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers.setdefault(name.strip().lower(), []).append(value.strip())
+    code = int(status)
+    keep = version == b"HTTP/1.1" and headers.get("connection", [""])[0].lower() != "close"
+    if headers.get("transfer-encoding", [""])[0].lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        return code, headers, bytes(body), keep
+    if "content-length" in headers:
+        return code, headers, await reader.readexactly(int(headers["content-length"][0])), keep
+    if code in (204, 304) or code < 200:
+        return code, headers, b"", keep
+    return code, headers, await reader.read(), False
+
+class HttpPool:
+    """Keep-alive connections to one origin; each request borrows an idle one or opens a new one."""
+
+    def __init__(self, base_url: str):
+        u = urlsplit(base_url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or (443 if u.scheme == "https" else 80)
+        self.ssl = u.scheme == "https"
+        self.prefix = u.path.rstrip("/")
+        self.cookie: Optional[str] = None
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, List[str]], bytes]:
+        head = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                "User-Agent: my-azure-loadgen", f"Content-Length: {len(body)}"]
+        if self.cookie:
+            head.append(f"Cookie: {self.cookie}")
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        data = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        while True:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl or None)
+            try:
+                writer.write(data)
+                await writer.drain()
+                code, hdrs, payload, keep = await _read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue  # the server timed out an idle connection: retry on a fresh one
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return code, hdrs, payload
+
+    async def login(self, username: str, password: str) -> None:
+        """Register (ignored if the user exists) and log in to the frontend; keeps the session cookie."""
+        form = urlencode({"username": username, "password": password}).encode()
+        ctype = {"Content-Type": "application/x-www-form-urlencoded"}
+        await self.request("POST", "/register", form, ctype)
+        code, hdrs, _ = await self.request("POST", "/login", form, ctype)
+        cookies = [c.split(";", 1)[0] for c in hdrs.get("set-cookie", [])]
+        if code != 302 or not cookies:
+            raise RuntimeError(f"frontend login as {username!r} failed (HTTP {code})")
+        self.cookie = "; ".join(cookies)
+
+    def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+# ---- router data plane (UDP) ----
+
+class _UdpClient(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.waiter: Optional[asyncio.Future] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(data)
+
+    def error_received(self, exc):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_exception(exc)
+
+class UdpPool:
+    """One socket per outstanding datagram, so replies never need matching up."""
+
+    def __init__(self, address: str):
+        host, _, port = address.rpartition(":")
+        self.remote = (host.strip("[]"), int(port))
+        self._idle: List[_UdpClient] = []
+
+    async def request(self, payload: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        if self._idle:
+            client = self._idle.pop()
+        else:
+            _, client = await loop.create_datagram_endpoint(_UdpClient, remote_addr=self.remote)
+        client.waiter = loop.create_future()
+        try:
+            client.transport.sendto(payload)
+            data = await client.waiter
+        except BaseException:
+            client.transport.close()  # a late reply must not reach the next request
+            raise
+        self._idle.append(client)
+        return data
+
+    def close(self) -> None:
+        for client in self._idle:
+            client.transport.close()
+        self._idle.clear()
+
+# ---- measurement ----
+
+class HopStats:
+    def __init__(self, name: str, rate: float):
+        self.name = name
+        self.rate = rate
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.requests = 0
+        self.errors = 0
+        self.skipped = 0  # never sent: the generator was at max_in_flight
+
+    def record(self, latency: float, outcome: str, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.outcomes[outcome] += 1
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, seconds: float) -> dict:
+        lat = sorted(self.latencies)
+        n = len(lat)
+        out = {"hop": self.name, "offered_rps": round(self.rate, 1),
+               "achieved_rps": round((self.requests - self.errors) / seconds, 1) if seconds else 0.0,
+               "requests": self.requests, "errors": self.errors, "skipped": self.skipped,
+               "outcomes": dict(self.outcomes)}
+        for p in PERCENTILES:
+            out[f"p{p}_ms"] = round(lat[min(n - 1, int(n * p / 100))] * 1000, 2) if n else None
+        out["max_ms"] = round(lat[-1] * 1000, 2) if n else None
+        return out
+
+Send = Callable[[], Awaitable[Tuple[str, bool]]]
+
+class LoadGenerator:
+    def __init__(self, profile: dict, seed: int = 42):
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.timeout = float(profile.get("timeout_sec", 5.0))
+        self.max_in_flight = int(profile.get("max_in_flight", 2000))
+        self.in_flight = 0
+        self.lag = 0.0
+        self._tasks: set = set()
+        self._pools: list = []
+
+    async def _streams(self) -> List[Tuple[str, float, Send]]:
+        """(hop name, requests/s at step x1, coroutine factory) for every configured stream."""
+        addrs = default_addresses()
+        targets = self.profile.get("targets", {})
+        streams: List[Tuple[str, float, Send]] = []
+        for service in ("frontend", "api"):
+            t = targets.get(service)
+            if not t:
+                continue
+            pool = HttpPool(t.get("base_url") or addrs[service])
+            self._pools.append(pool)
+            if t.get("login"):
+                await pool.login(t["login"]["username"], t["login"]["password"])
+            for req in t.get("requests", []):
+                streams.append((f"{service} {req.get('method', 'GET')} {req['path']}", float(req["rate"]),
+                                self._http_sender(pool, req.get("method", "GET"), req["path"])))
+        r = targets.get("router")
+        if r:
+            pool = UdpPool(r.get("address") or addrs["router"])
+            self._pools.append(pool)
+            streams.append((f"router udp x{int(r.get('batch', 16))}", float(r["rate"]), self._udp_sender(pool, r)))
+        return streams
+
+    def _http_sender(self, pool: HttpPool, method: str, path: str) -> Send:
+        async def send() -> Tuple[str, bool]:
+            code, _, _ = await pool.request(method, path)
+            return str(code), 200 <= code < 400
+        return send
+
+    def _udp_sender(self, pool: UdpPool, cfg: dict) -> Send:
+        dsts = cfg.get("destinations") or ["10.0.0.10"]
+        batch = int(cfg.get("batch", 16))
+        rng = self.rng
+
+        async def send() -> Tuple[str, bool]:
+            lines = []
+            for _ in range(batch):
+                dst = rng.choice(dsts)
+                src = f"fd00:ffff::{rng.randrange(1, 0xffff):x}" if ":" in dst else f"192.168.0.{rng.randrange(1, 255)}"
+                lines.append(f"{src} {dst} 6 {rng.randrange(1024, 65535)} 443")
+            reply = await pool.request(("\n".join(lines) + "\n").encode())
+            return ("error", False) if reply.startswith(b"error") else ("ok", True)
+        return send
+
+    async def _one(self, hop: HopStats, send: Send, scheduled: float, record: bool) -> None:
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            outcome, ok = await asyncio.wait_for(send(), self.timeout)
+        except asyncio.TimeoutError:
+            outcome, ok = "timeout", False
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            outcome, ok = type(e).__name__, False
+        finally:
+            self.in_flight -= 1
+        if record:
+            hop.record(loop.time() - scheduled, outcome, ok)  # from the scheduled time: no coordinated omission
+
+    async def _schedule(self, hop: HopStats, send: Send, start: float, record_from: float, end: float) -> None:
+        loop = asyncio.get_running_loop()
+        t = start
+        while True:
+            t += self.rng.expovariate(hop.rate)
+            if t >= end:
+                return
+            delay = t - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag = max(self.lag, -delay)
+            if self.in_flight >= self.max_in_flight:
+                if t >= record_from:
+                    hop.skipped += 1
+                continue
+            task = loop.create_task(self._one(hop, send, t, t >= record_from))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> dict:
+        step_sec = float(self.profile.get("step_sec", 10))
+        warmup = float(self.profile.get("warmup_sec", 1))
+        slo = float(self.profile.get("slo_p99_ms", 250))
+        streams = await self._streams()
+        if not streams:
+            raise RuntimeError("profile has no targets")
+        report = {"profile": self.profile, "steps": [], "first_saturated": None}
+        loop = asyncio.get_running_loop()
+        try:
+            for mult in self.profile.get("steps", [1]):
+                hops = [HopStats(name, rate * mult) for name, rate, _ in streams]
+                self.lag = 0.0
+                start = loop.time()
+                await asyncio.gather(*(self._schedule(h, send, start, start + warmup, start + warmup + step_sec)
+                                       for h, (_, _, send) in zip(hops, streams)))
+                if self._tasks:
+                    await asyncio.wait(set(self._tasks))  # slow answers count too
+                rows = [h.summary(step_sec) for h in hops]
+                step = {"multiplier": mult, "seconds": step_sec, "scheduler_lag_ms": round(self.lag * 1000, 2),
+                        "hops": rows}
+                report["steps"].append(step)
+                _print_step(step)
+                skipped = sum(row["skipped"] for row in rows)
+                if self.lag > GENERATOR_LAG_LIMIT or skipped:
+                    # Latencies are inflated by our own queueing: nothing here can be blamed on a service.
+                    reason = f"scheduler lag {step['scheduler_lag_ms']} ms, {skipped} requests not sent"
+                    report["first_saturated"] = {"multiplier": mult, "hop": "loadgen", "reason": reason}
+                    break
+                for row in rows:
+                    reason = _saturated(row, slo)
+                    if reason and report["first_saturated"] is None:
+                        report["first_saturated"] = {"multiplier": mult, "hop": row["hop"], "reason": reason}
+                if report["first_saturated"] is not None:
+                    break
+        finally:
+            for pool in self._pools:
+                pool.close()
+        return report
+
+def _saturated(row: dict, slo_ms: float) -> Optional[str]:
+    if not row["requests"]:
+        return None
+    if row["errors"] / row["requests"] > 0.01:
+        return f"{row['errors']} errors of {row['requests']}"
+    if row["p99_ms"] is not None and row["p99_ms"] > slo_ms:
+        return f"p99 {row['p99_ms']} ms > {slo_ms:g} ms"
+    return None
+
+def _print_step(step: dict) -> None:
+    print(f"[loadgen] step x{step['multiplier']:g} ({step['seconds']:g}s, scheduler lag {step['scheduler_lag_ms']} ms)")
+    print(f"[loadgen]   {'hop':<28} {'offered':>8} {'achieved':>9} {'p50':>8} {'p90':>8} {'p99':>8} "
+          f"{'p99.9':>8} {'max':>8} {'errors':>7}")
+    for r in step["hops"]:
+        cells = " ".join(f"{r[k]:>8.1f}" if r[k] is not None else f"{'-':>8}"
+                         for k in ("p50_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms"))
+        print(f"[loadgen]   {r['hop']:<28} {r['offered_rps']:>8.1f} {r['achieved_rps']:>9.1f} {cells} {r['errors']:>7}")
+    if step["scheduler_lag_ms"] > GENERATOR_LAG_LIMIT * 1000:
+        print("[loadgen]   warning: the generator fell behind its schedule; run it on another host or lower the rates")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Open-loop load generator for the My Azure stack")
+    ap.add_argument("profile", nargs="?", default=str(DEFAULT_PROFILE))
+    ap.add_argument("--out", help="write the full report as JSON")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    profile = json.loads(Path(args.profile).read_text(encoding="utf-8"))
+    started = time.time()
+    try:
+        report = asyncio.run(LoadGenerator(profile, args.seed).run())
+    except (RuntimeError, OSError) as e:
+        print(f"[loadgen] {e}")
+        sys.exit(1)
+    report["started"] = started
+    sat = report["first_saturated"]
+    if sat and sat["hop"] == "loadgen":
+        print(f"[loadgen] The load generator saturated first at x{sat['multiplier']:g} ({sat['reason']})")
+    elif sat:
+        print(f"[loadgen] First to saturate: {sat['hop']} at x{sat['multiplier']:g} ({sat['reason']})")
+    else:
+        print("[loadgen] No hop saturated; add larger steps to the profile")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[loadgen] Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
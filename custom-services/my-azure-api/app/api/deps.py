@@ -0,0 +1,14 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/api/deps.py
+from __future__ import annotations
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+
+def get_db() -> Iterator[Session]:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,40 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/api/events.py
+from __future__ import annotations
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.events import Subscriber, encode_sse, hub
+
+router = APIRouter(tags=["events"])
+
+KEEPALIVE_SEC = 15.0
+
+async def _sse(sub: Subscriber, snapshot: dict):
+    try:
+        yield encode_sse("snapshot", snapshot)
+        while True:
+            try:
+                frame = await asyncio.wait_for(sub.queue.get(), timeout=KEEPALIVE_SEC)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if frame is None:
+                yield encode_sse("dropped", {"reason": "slow consumer"})
+                break
+            yield frame
+    finally:
+        hub.unsubscribe(sub)
+
+@router.get("/events")
+async def events(request: Request):
+    """Server-Sent Events stream of `route` and `health` changes."""
+    watcher = getattr(request.app.state, "health_watcher", None)
+    snapshot = {"health": dict(watcher.status) if watcher else {}}
+    sub = hub.subscribe()
+    return StreamingResponse(
+        _sse(sub, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,140 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/api/routes.py
+from __future__ import annotations
+import json
+from typing import Iterator, List
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.api.deps import get_db
+from app.crud import upsert_routes
+from app.db import SessionLocal
+from app.events import hub
+from app.models import Route
+from app.responses import FastJSONResponse
+from app.schemas import RouteIn, RouteOut
+from app.settings import load_config
+
+router = APIRouter(prefix="/routes", tags=["routes"])
+
+_cfg = load_config()
+_stream_cfg = _cfg.get("streaming", {})
+FAST_JSON = bool(_cfg.get("api", {}).get("fast_json", False))
+EXPORT_BATCH_SIZE = int(_stream_cfg.get("export_batch_size", 1000))
+IMPORT_BATCH_SIZE = int(_stream_cfg.get("import_batch_size", 1000))
+IMPORT_MAX_LINE_BYTES = int(_stream_cfg.get("import_max_line_bytes", 64 * 1024))
+MAX_IMPORT_ERRORS = 100  # cap on per-line errors echoed back; the count is always exact
+
+@router.get("", response_model=List[RouteOut])
+def list_routes(db: Session = Depends(get_db)):
+    if not FAST_JSON:
+        return db.scalars(select(Route).order_by(Route.id)).all()
+    # Rows were validated by RouteIn on the way in; build plain dicts straight from
+    # the columns and hand them to the encoder so they are serialized exactly once.
+    rows = db.execute(
+        select(Route.id, Route.destination, Route.next_hop, Route.metric).order_by(Route.id)
+    )
+    return FastJSONResponse(
+        [{"destination": d, "next_hop": nh, "metric": m, "id": i} for i, d, nh, m in rows]
+    )
+
+@router.post("", response_model=RouteOut)
+def put_route(route: RouteIn, db: Session = Depends(get_db)):
+    row = upsert_routes(db, [route])[0]
+    hub.publish("route", {"op": "upsert", "routes": [route.model_dump()]})
+    return row
+
+def _export_lines() -> Iterator[bytes]:
+    # Own session: a yield-dependency would be closed before the body is streamed.
+    with SessionLocal() as db:
+        stmt = (
+            select(Route.destination, Route.next_hop, Route.metric)
+            .order_by(Route.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for dest, nh, metric in db.execute(stmt):
+            yield json.dumps({"destination": dest, "next_hop": nh, "metric": metric}).encode() + b"\n"
+
+@router.get("/export")
+def export_routes():
+    """Stream every route as NDJSON straight off a server-side cursor."""
+    return StreamingResponse(
+        iterate_in_threadpool(_export_lines()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=routes.ndjson"},
+    )
+
+def _commit_batch(batch: List[RouteIn]) -> None:
+    with SessionLocal() as db:
+        upsert_routes(db, batch)
+    hub.publish("route", {"op": "import", "routes": [r.model_dump() for r in batch]})
+
+@router.post("/import")
+async def import_routes(request: Request):
+    """Consume an NDJSON body incrementally, committing every IMPORT_BATCH_SIZE rows.
+
+    A line longer than IMPORT_MAX_LINE_BYTES (e.g. a whole JSON array on one line)
+    is reported as a line error and skipped as it streams past, so the pending
+    buffer never grows beyond that.
+    """
+    imported = 0
+    batches = 0
+    error_count = 0
+    errors: List[dict] = []
+    batch: List[RouteIn] = []
+    buf = b""
+    line_no = 0
+    skipping = False  # inside an overlong line: drop its bytes up to the next newline
+    too_long = f"line longer than {IMPORT_MAX_LINE_BYTES} bytes"
+
+    def _error(line: int, msg: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({"line": line, "error": msg})
+
+    def _parse(raw: bytes) -> None:
+        if not raw.strip():
+            return
+        if len(raw) > IMPORT_MAX_LINE_BYTES:
+            _error(line_no, too_long)
+            return
+        try:
+            batch.append(RouteIn.model_validate(json.loads(raw)))
+        except (ValueError, ValidationError) as e:
+            _error(line_no, str(e).splitlines()[0])
+
+    async def _flush() -> None:
+        nonlocal imported, batches, batch
+        if batch:
+            await run_in_threadpool(_commit_batch, batch)
+            imported += len(batch)
+            batches += 1
+            batch = []
+
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if skipping:
+                skipping = False  # the rest of the overlong line, already reported
+                continue
+            _parse(raw)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await _flush()
+        if len(buf) > IMPORT_MAX_LINE_BYTES:
+            if not skipping:
+                _error(line_no + 1, too_long)
+                skipping = True
+            buf = b""
+    if buf and not skipping:
+        line_no += 1
+        _parse(buf)
+    await _flush()
+
+    return {"imported": imported, "batches": batches, "error_count": error_count, "errors": errors}
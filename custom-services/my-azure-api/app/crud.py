@@ -0,0 +1,31 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/crud.py
+from __future__ import annotations
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Route
+from app.schemas import RouteIn
+
+def upsert_routes(db: Session, items: Iterable[RouteIn]) -> List[Route]:
+    """Insert or update a batch of routes keyed by destination, then commit once."""
+    by_dest = {item.destination: item for item in items}  # last write wins within a batch
+    if not by_dest:
+        return []
+    existing = {
+        r.destination: r
+        for r in db.scalars(select(Route).where(Route.destination.in_(by_dest.keys())))
+    }
+    out: List[Route] = []
+    for dest, item in by_dest.items():
+        row = existing.get(dest)
+        if row is None:
+            row = Route(destination=dest, next_hop=item.next_hop, metric=item.metric)
+            db.add(row)
+        else:
+            row.next_hop = item.next_hop
+            row.metric = item.metric
+        out.append(row)
+    db.commit()
+    return out
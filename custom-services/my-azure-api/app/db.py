@@ -0,0 +1,37 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/db.py
+from __future__ import annotations
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+
+from app.settings import load_config, project_root
+
+DEFAULT_DB_URL = "sqlite:///app/.data/my_api.db"
+
+class Base(DeclarativeBase):
+    pass
+
+def _database_url(cfg: dict) -> str:
+    # MY_API_DATABASE_URL lets scripts (benchmarks, one-off imports) point at a scratch DB.
+    url = os.environ.get("MY_API_DATABASE_URL") or cfg.get("database", {}).get("url") or DEFAULT_DB_URL
+    # Relative sqlite paths are resolved against the service root, not the CWD.
+    if url.startswith("sqlite:///") and not url.startswith("sqlite:////"):
+        db_file = (project_root() / url[len("sqlite:///"):]).resolve()
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        url = f"sqlite:///{db_file}"
+    return url
+
+_cfg = load_config()
+DATABASE_URL = _database_url(_cfg)
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+def init_db() -> None:
+    # Import models so they register on Base.metadata before create_all.
+    from app import models  # noqa: F401
+    Base.metadata.create_all(bind=engine)
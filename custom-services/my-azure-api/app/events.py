@@ -0,0 +1,82 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/events.py
+from __future__ import annotations
+import asyncio
+import json
+import time
+from typing import Optional, Set
+
+# Sentinel pushed to a subscriber that fell too far behind; its stream then closes.
+_DROPPED = None
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+class EventHub:
+    """In-process fan-out of pre-encoded SSE frames to many bounded subscriber queues.
+
+    publish() is safe to call from worker threads (sync endpoints); fan-out always
+    happens on the event loop. A subscriber whose queue is full is dropped rather
+    than allowed to block or grow without bound.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subs: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.dropped = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.queue_size)
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def publish(self, kind: str, data: dict) -> None:
+        if self._loop is None or not self._subs:
+            return
+        frame = encode_sse(kind, data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fanout(frame)
+        else:
+            self._loop.call_soon_threadsafe(self._fanout, frame)
+
+    def _fanout(self, frame: bytes) -> None:
+        self.published += 1
+        for sub in list(self._subs):
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub: Subscriber) -> None:
+        self.dropped += 1
+        sub.dropped = True
+        self._subs.discard(sub)
+        # Make room for the sentinel so the reader wakes up and closes its stream.
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(_DROPPED)
+
+def encode_sse(kind: str, data: dict) -> bytes:
+    payload = json.dumps({"ts": time.time(), **data}, separators=(",", ":"))
+    return f"event: {kind}\ndata: {payload}\n\n".encode()
+
+hub = EventHub()
@@ -0,0 +1,63 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/health.py
+from __future__ import annotations
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Dict
+
+from app.events import EventHub
+from app.settings import project_root
+
+class HealthWatcher:
+    """Polls sibling service heartbeats once and publishes only state transitions."""
+
+    def __init__(self, hub: EventHub, heartbeats: Dict[str, str], interval_sec: float = 1.0,
+                 stale_after_sec: float = 5.0):
+        self.hub = hub
+        self.set_heartbeats(heartbeats)
+        self.interval_sec = interval_sec
+        self.stale_after_sec = stale_after_sec
+        self.status: Dict[str, dict] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._payloads: Dict[str, dict] = {}
+
+    def set_heartbeats(self, heartbeats: Dict[str, str]) -> None:
+        root = project_root()
+        # Swap the whole dict so the poll loop never sees a half-updated mapping.
+        self.paths = {name: (root / p).resolve() for name, p in heartbeats.items()}
+
+    def _probe(self, name: str, path: Path) -> dict:
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            self._mtimes.pop(name, None)
+            return {"status": "down", "note": "heartbeat missing"}
+        # Only re-parse when the file actually changed.
+        if self._mtimes.get(name) != mtime:
+            try:
+                self._payloads[name] = json.loads(path.read_text(encoding="utf-8"))
+                self._mtimes[name] = mtime
+            except Exception as e:
+                return {"status": "error", "error": str(e)}
+        hb = self._payloads.get(name, {})
+        age = time.time() - float(hb.get("ts", 0))
+        if age > self.stale_after_sec:
+            return {"status": "stale", "age": round(age, 1)}
+        return {"status": hb.get("status", "unknown"), "version": hb.get("version")}
+
+    def poll_once(self) -> None:
+        for name, path in self.paths.items():
+            current = self._probe(name, path)
+            previous = self.status.get(name)
+            if previous is None or previous.get("status") != current["status"]:
+                self.status[name] = current
+                self.hub.publish("health", {"service": name, **current,
+                                            "previous": (previous or {}).get("status")})
+            else:
+                self.status[name] = current
+
+    async def run(self) -> None:
+        while True:
+            self.poll_once()
+            await asyncio.sleep(self.interval_sec)
@@ -1,8 +1,80 @@
 # my-azure-labs-collection/custom-services/my-azure-api/app/main.py
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.api.events import router as events_router
+from app.api.routes import router as routes_router
+from app.db import engine, init_db
+from app.events import hub
+from app.health import HealthWatcher
+from app.metrics import MetricsMiddleware, instrument_engine, registry
+from app.ratelimit import AdmissionMiddleware, make_backend, stats as admission_stats
+from app.responses import FastJSONResponse
+from app.settings import CONFIG, load_config, project_root
+from shared import jsonlog
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cfg = load_config()
+    jsonlog.configure("api", cfg.get("logging"), project_root())
+    init_db()
+
+    events_cfg = cfg.get("events", {})
+    hub.queue_size = int(events_cfg.get("queue_size", hub.queue_size))
+    hub.bind(asyncio.get_running_loop())
 
-app = FastAPI(title="My Azure API", version="0.1.0")
+    watcher = HealthWatcher(
+        hub,
+        cfg.get("integrations", {}).get("heartbeats", {}),
+        interval_sec=float(events_cfg.get("health_interval_sec", 1.0)),
+    )
+    app.state.health_watcher = watcher
+    CONFIG.subscribe(lambda new: watcher.set_heartbeats(new.get("integrations", {}).get("heartbeats", {})))
+    CONFIG.subscribe(lambda new: jsonlog.configure("api", new.get("logging"), project_root()))
+    CONFIG.watch()
+    task = asyncio.create_task(watcher.run())
+    try:
+        yield
+    finally:
+        CONFIG.stop()
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        jsonlog.shutdown()
+
+_cfg = load_config()
+_fast_json = bool(_cfg.get("api", {}).get("fast_json", False))
+_ratelimit_cfg = _cfg.get("ratelimit", {})
+
+app = FastAPI(
+    title="My Azure API",
+    version="0.1.0",
+    lifespan=lifespan,
+    **({"default_response_class": FastJSONResponse} if _fast_json else {}),
+)
+# Middleware added last runs first: metrics wraps admission so shed requests are counted.
+if _ratelimit_cfg.get("enabled", False):
+    _ratelimit_backend = make_backend(_ratelimit_cfg)
+    app.add_middleware(AdmissionMiddleware, cfg=_ratelimit_cfg, backend=_ratelimit_backend)
+    registry.register("ratelimit_tracked_clients", lambda: len(_ratelimit_backend))
+    registry.register("ratelimit_rejected_total", lambda: admission_stats.rejected_rate, kind="counter")
+    registry.register("admission_rejected_total", lambda: admission_stats.rejected_busy, kind="counter")
+app.add_middleware(MetricsMiddleware)
+app.include_router(routes_router)
+app.include_router(events_router)
+
+instrument_engine(engine)
+registry.register("events_subscribers", lambda: hub.subscriber_count)
+registry.register("events_published_total", lambda: hub.published, kind="counter")
+registry.register("events_dropped_subscribers_total", lambda: hub.dropped, kind="counter")
 
 @app.get("/healthz")
 def healthz():
-    return {"status": "ok", "message": "api running"}
\ No newline at end of file
+    return {"status": "ok", "message": "api running"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
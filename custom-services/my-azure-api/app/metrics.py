@@ -0,0 +1,174 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/metrics.py
+from __future__ import annotations
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+from shared.jsonlog import get_logger
+
+log = get_logger("api")
+
+# Seconds. Fixed at import so observe() is a bisect plus two integer adds.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+class Registry:
+    """Minimal Prometheus-style registry for the API process (no external client lib)."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.streams_open = 0
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+        self.db_query = Histogram()
+        self.callbacks: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        streaming: bool = False) -> None:
+        if not streaming:  # a stream's lifetime is how long the client stayed, not latency
+            key = (method, route)
+            hist = self.latency.get(key)
+            if hist is None:
+                with self._lock:
+                    hist = self.latency.setdefault(key, Histogram())
+            hist.observe(seconds)
+        rkey = (method, route, str(status))
+        with self._lock:
+            self.responses[rkey] = self.responses.get(rkey, 0) + 1
+
+    def register(self, name: str, fn: Callable[[], float], kind: str = "gauge") -> None:
+        """Expose a value owned elsewhere; `fn` is only called when /metrics is scraped."""
+        self.callbacks[name] = (kind, fn)
+
+    def render(self) -> str:
+        out: List[str] = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE http_streams_open gauge",
+            f"http_streams_open {self.streams_open}",
+            "# TYPE http_responses_total counter",
+        ]
+        with self._lock:
+            responses = sorted(self.responses.items())
+            latency = sorted(self.latency.items())
+        for (method, route, status), n in responses:
+            out.append(f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+        out.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), hist in latency:
+            _render_histogram(out, "http_request_duration_seconds", hist,
+                              f'method="{method}",route="{route}"')
+        out.append("# TYPE db_query_duration_seconds histogram")
+        _render_histogram(out, "db_query_duration_seconds", self.db_query, "")
+        for name, (kind, fn) in sorted(self.callbacks.items()):
+            out.append(f"# TYPE {name} {kind}")
+            out.append(f"{name} {fn()}")
+        return "\n".join(out) + "\n"
+
+def _render_histogram(out: List[str], name: str, hist: Histogram, labels: str) -> None:
+    counts, total = hist.snapshot()
+    sep = "," if labels else ""
+    cumulative = 0
+    for bound, n in zip(hist.buckets, counts):
+        cumulative += n
+        out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+    cumulative += counts[-1]
+    out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    out.append(f"{name}_sum{suffix} {total}")
+    out.append(f"{name}_count{suffix} {cumulative}")
+
+registry = Registry()
+
+def _is_stream(headers) -> bool:
+    for k, v in headers:
+        if k.lower() == b"content-type":
+            return v.startswith(b"text/event-stream")
+    return False
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: times each HTTP request until its last body chunk is sent.
+
+    Server-Sent Event responses (/events) move from the in-flight gauge to
+    `http_streams_open` once their headers go out, and stay out of the latency
+    histogram; they are still counted in `http_responses_total`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        streaming = False
+        start = time.perf_counter()
+        registry.in_flight += 1
+
+        async def _send(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _is_stream(message.get("headers", ())):
+                    streaming = True
+                    registry.in_flight -= 1
+                    registry.streams_open += 1
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if streaming:
+                registry.streams_open -= 1
+            else:
+                registry.in_flight -= 1
+            route = scope.get("route")
+            # Label by route template, never the raw path, to keep cardinality bounded.
+            label = getattr(route, "path", None) or "<unmatched>"
+            elapsed = time.perf_counter() - start
+            registry.observe_request(scope["method"], label, status, elapsed, streaming)
+            log.event("http.request", method=scope["method"], route=label, status=status,
+                      duration_ms=round(elapsed * 1000, 3), stream=streaming)
+
+def instrument_engine(engine) -> None:
+    """Record cursor execution time for every statement run through `engine`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        registry.db_query.observe(time.perf_counter() - conn.info["_query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        # A failed statement never reaches after_cursor_execute; drop its start time so it
+        # doesn't pile up on the pooled connection or get paired with a later statement.
+        starts = ctx.connection.info.get("_query_start") if ctx.connection is not None else None
+        if starts and ctx.statement is not None:
+            starts.pop()
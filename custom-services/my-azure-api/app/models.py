@@ -0,0 +1,14 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/models.py
+from __future__ import annotations
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db import Base
+
+class Route(Base):
+    __tablename__ = "routes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    destination: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    next_hop: Mapped[str] = mapped_column(String(64))
+    metric: Mapped[int] = mapped_column(Integer, default=0)
@@ -14,7 +14,8 @@ _running = True
 
 def _handle_sig(signum, frame):
     global _running
-    print(f"[api] Received signal {signum}; graceful shutdown requested.")
+    from shared.jsonlog import get_logger  # importable once app.main is loaded
+    get_logger("api").info(f"Received signal {signum}; graceful shutdown requested.")
     _running = False
 
 def _heartbeat_worker(hb_path: Path, interval_sec: float = 1.0):
@@ -56,6 +57,9 @@ def main():
         print(f"[api] Failed to import FastAPI app from app.main: {e}")
         sys.exit(3)
 
+    from shared import jsonlog
+    log = jsonlog.get_logger("api")
+
     # Signals
     signal.signal(signal.SIGTERM, _handle_sig)
     signal.signal(signal.SIGINT, _handle_sig)
@@ -66,7 +70,7 @@ def main():
     t = threading.Thread(target=_heartbeat_worker, args=(hb_path, interval), daemon=True)
     t.start()
 
-    print(f"[api] Starting FastAPI on {host}:{port}")
+    log.info(f"Starting FastAPI on {host}:{port}")
     # Pass the app object directly to Uvicorn:
     config = uvicorn.Config(fastapi_app, host=host, port=port, reload=False, log_level="info")
     server = uvicorn.Server(config)
@@ -77,7 +81,8 @@ def main():
         global _running
         _running = False
         t.join(timeout=2.0)
-        print("[api] API process stopped.")
+        log.info("API process stopped.")
+        jsonlog.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/ratelimit.py
+from __future__ import annotations
+import abc
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+class RateLimitBackend(abc.ABC):
+    """Where bucket state lives. Subclass and register_backend() to share it across
+    API processes (e.g. a Redis/SQL-backed store); the default keeps it in memory.
+
+    The methods are coroutines awaited on the event loop: a networked store must use
+    an async client (or run_in_executor), never blocking I/O. `__len__` feeds a gauge
+    and must answer from local state.
+    """
+
+    @abc.abstractmethod
+    async def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """Consume one token. Return 0.0 if allowed, else seconds until one is available."""
+
+    async def refund(self, key: str, burst: float) -> None:
+        """Give back a token taken for a request that was rejected further on."""
+
+    async def sweep(self, rate: float, burst: float, now: float) -> int:
+        """Forget idle buckets; return how many were removed."""
+        return 0
+
+    def __len__(self) -> int:
+        return 0
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self):
+        # key -> [tokens, last_refill_ts]; a 2-slot list is far smaller than an object per client
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        b = self._buckets.get(key)
+        if b is None:
+            self._buckets[key] = [burst - 1.0, now]
+            return 0.0
+        tokens = min(burst, b[0] + (now - b[1]) * rate)
+        b[1] = now
+        if tokens >= 1.0:
+            b[0] = tokens - 1.0
+            return 0.0
+        b[0] = tokens
+        return (1.0 - tokens) / rate
+
+    async def refund(self, key: str, burst: float) -> None:
+        b = self._buckets.get(key)
+        if b is not None:
+            b[0] = min(burst, b[0] + 1.0)
+
+    async def sweep(self, rate: float, burst: float, now: float) -> int:
+        # A bucket that would have refilled to burst is indistinguishable from a new one.
+        idle = burst / rate
+        stale = [k for k, (_, ts) in self._buckets.items() if now - ts >= idle]
+        for k in stale:
+            del self._buckets[k]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+_BACKENDS: Dict[str, Callable[[dict], RateLimitBackend]] = {"memory": lambda cfg: MemoryBackend()}
+
+def register_backend(name: str, factory: Callable[[dict], RateLimitBackend]) -> None:
+    _BACKENDS[name] = factory
+
+def make_backend(cfg: dict) -> RateLimitBackend:
+    name = cfg.get("backend", "memory")
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown ratelimit backend: {name}")
+    return _BACKENDS[name](cfg)
+
+class AdmissionStats:
+    __slots__ = ("in_flight", "rejected_rate", "rejected_busy")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.rejected_rate = 0
+        self.rejected_busy = 0
+
+stats = AdmissionStats()
+
+class AdmissionMiddleware:
+    """Shed load before routing: per-client and global token buckets (429), then a
+    max-concurrency gate (503). Exempt paths (health, metrics, SSE) and anything under
+    them bypass both."""
+
+    def __init__(self, app, cfg: dict, backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.client_rate = float(cfg.get("per_client_rate", 50))
+        self.client_burst = float(cfg.get("per_client_burst", 100))
+        self.global_rate = float(cfg.get("global_rate", 500))
+        self.global_burst = float(cfg.get("global_burst", 1000))
+        self.max_concurrency = int(cfg.get("max_concurrency", 64))
+        self.sweep_interval = float(cfg.get("sweep_interval_sec", 30))
+        header = (cfg.get("client_header") or "").lower()
+        self.client_header = header.encode() if header else None
+        self.exempt = tuple(p.rstrip("/") for p in cfg.get("exempt_paths", ["/healthz", "/metrics", "/events"]))
+        self._exempt_under = tuple(p + "/" for p in self.exempt)
+        self.backend = backend if backend is not None else make_backend(cfg)
+        self._last_sweep = time.monotonic()
+
+    def _client_key(self, scope) -> str:
+        if self.client_header:
+            for k, v in scope.get("headers", ()):
+                if k == self.client_header:
+                    return v.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _is_exempt(self, path: str) -> bool:
+        # Whole path segments only: /events and /events/x are exempt, /eventsX is not.
+        return path in self.exempt or path.startswith(self._exempt_under)
+
+    async def _check(self, scope, now: float) -> Optional[Tuple[int, str, float]]:
+        # Cheapest first, and nothing is consumed for a request that is turned away.
+        if stats.in_flight >= self.max_concurrency:
+            return 503, "server busy", 1.0
+        client = "c:" + self._client_key(scope)
+        wait = await self.backend.take(client, self.client_rate, self.client_burst, now)
+        if wait:
+            return 429, "client rate limit exceeded", wait
+        wait = await self.backend.take("global", self.global_rate, self.global_burst, now)
+        if wait:
+            await self.backend.refund(client, self.client_burst)
+            return 429, "global rate limit exceeded", wait
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            await self.backend.sweep(self.client_rate, self.client_burst, now)
+
+        rejected = await self._check(scope, now)
+        if rejected:
+            status, detail, retry_after = rejected
+            if status == 429:
+                stats.rejected_rate += 1
+            else:
+                stats.rejected_busy += 1
+            resp = JSONResponse({"detail": detail}, status_code=status,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+            await resp(scope, receive, send)
+            return
+
+        stats.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stats.in_flight -= 1
@@ -0,0 +1,23 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/responses.py
+from __future__ import annotations
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional; falls back to compact stdlib encoding
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes with orjson when available.
+
+    Content is expected to be plain dicts/lists already shaped like the response
+    model, so FastAPI's validate + jsonable_encoder pass can be skipped entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
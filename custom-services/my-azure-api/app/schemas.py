@@ -0,0 +1,26 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/schemas.py
+from __future__ import annotations
+import ipaddress
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+class RouteIn(BaseModel):
+    destination: str
+    next_hop: str
+    metric: int = Field(default=0, ge=0)
+
+    @field_validator("destination")
+    @classmethod
+    def _valid_cidr(cls, v: str) -> str:
+        # Normalise host bits away so "10.1.2.3/24" and "10.1.2.0/24" are the same route.
+        return str(ipaddress.ip_network(v.strip(), strict=False))
+
+    @field_validator("next_hop")
+    @classmethod
+    def _valid_next_hop(cls, v: str) -> str:
+        return str(ipaddress.ip_address(v.strip()))
+
+class RouteOut(RouteIn):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
@@ -0,0 +1,22 @@
+# my-azure-labs-collection/custom-services/my-azure-api/app/settings.py
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+def project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+_SERVICES_ROOT = project_root().parent
+if str(_SERVICES_ROOT) not in sys.path:
+    sys.path.insert(0, str(_SERVICES_ROOT))
+from shared.config import ConfigStore, config_model  # noqa: E402
+
+CONFIG = ConfigStore(
+    project_root() / "config" / "app.json",
+    project_root() / "config" / "template.app.json",
+    model=config_model("api"),
+)
+
+def load_config() -> dict:
+    """Cached, validated config/app.json (template until setup has run)."""
+    return CONFIG.get()
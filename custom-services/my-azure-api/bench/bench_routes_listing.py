@@ -0,0 +1,63 @@
+# my-azure-labs-collection/custom-services/my-azure-api/bench/bench_routes_listing.py
+"""Compare GET /routes throughput on the default FastAPI path vs the fast JSON path.
+
+Usage (from the API folder): python bench/bench_routes_listing.py [routes] [seconds]
+Seeds a scratch SQLite DB, so the lab database is never touched.
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_ROOT))
+
+def _seed(n: int) -> None:
+    from app.crud import upsert_routes
+    from app.db import SessionLocal, init_db
+    from app.schemas import RouteIn
+
+    init_db()
+    batch = []
+    with SessionLocal() as db:
+        for i in range(n):
+            batch.append(RouteIn(destination=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32",
+                                 next_hop="10.0.0.4", metric=i % 10))
+            if len(batch) == 1000:
+                upsert_routes(db, batch)
+                batch = []
+        upsert_routes(db, batch)
+
+def _run(client, seconds: float) -> float:
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        r = client.get("/routes")
+        r.raise_for_status()
+        done += 1
+    return done / (time.perf_counter() - start)
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MY_API_DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        from fastapi.testclient import TestClient
+        import app.api.routes as routes_mod
+        from app.main import app
+
+        _seed(n)
+        with TestClient(app) as client:
+            results = {}
+            for label, fast in (("default", False), ("fast_json", True)):
+                routes_mod.FAST_JSON = fast
+                client.get("/routes")  # warm-up
+                results[label] = _run(client, seconds)
+                print(f"[bench] {label:<10} {n} routes: {results[label]:8.1f} req/s")
+        print(f"[bench] speedup: {results['fast_json'] / results['default']:.2f}x")
+
+if __name__ == "__main__":
+    main()
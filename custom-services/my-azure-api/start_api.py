@@ -8,9 +8,11 @@ import sys
 import time
 from pathlib import Path
 
-from config.my_api_setup import setup_api_env, PROJECT_ROOT, APP_JSON
+from config.my_api_setup import setup_api_env, PROJECT_ROOT, CONFIG
+from shared.telemetry import ResourceSampler
 
 _api_proc: subprocess.Popen | None = None
+_telemetry = ResourceSampler()  # CPU/RSS/fds/threads per child; see shared/telemetry.py
 _python_in_venv: Path | None = None
 _heartbeat_file: Path | None = None
 _cfg: dict | None = None
@@ -22,7 +24,7 @@ def _creationflags_for_windows() -> int:
 
 def _load_cfg_preview():
     try:
-        cfg = json.loads(Path(APP_JSON).read_text(encoding="utf-8"))
+        cfg = CONFIG.get()
         api = cfg.get("api", {})
         hb = cfg.get("heartbeat", {})
         print(f"[cfg] host={api.get('host')} port={api.get('port')} heartbeat={hb.get('path')}")
@@ -57,6 +59,7 @@ def start_api() -> None:
             [str(_python_in_venv), str(proc_script), hb_path, host, port, hb_interval]
         )
     print(f"[ctl] API PID: {_api_proc.pid}")
+    _telemetry.watch("api", _api_proc.pid)
 
 def stop_api_soft(timeout: float = 5.0) -> None:
     global _api_proc
@@ -115,6 +118,18 @@ def api_status() -> None:
             print(f"[status] Heartbeat unreadable: {e}")
     else:
         print("[status] No heartbeat file found.")
+    for line in _telemetry.status_lines("api"):
+        print(f"[status] {line}")
+
+def api_trend(arg: str = "") -> None:
+    try:
+        minutes = float(arg) if arg else None
+    except ValueError:
+        print(f"[ctl] Not a number of minutes: {arg}")
+        return
+    window = minutes * 60 if minutes else _telemetry.history * _telemetry.interval_sec
+    for line in _telemetry.trend_lines("api", window):
+        print(f"[status] {line}")
 
 def _print_help():
     print(
@@ -124,6 +139,7 @@ def _print_help():
         "  kill               Hard kill (immediate)\n"
         "  restart            Restart API\n"
         "  api-status | as    Show API status/health\n"
+        "  trend [minutes]    Resource trends (CPU, RSS, fds, threads, ctx switches)\n"
         "  help               Show this help\n"
         "  q | quit | exit    Exit controller (graceful stop)\n"
     )
@@ -131,6 +147,9 @@ def _print_help():
 def main():
     global _python_in_venv, _heartbeat_file, _cfg
     _python_in_venv, _cfg, _heartbeat_file = setup_api_env()
+    tcfg = _cfg.get("telemetry", {})
+    _telemetry.interval_sec = float(tcfg.get("interval_sec", 2.0))
+    _telemetry.history = int(tcfg.get("history", 1800))
     _load_cfg_preview()
 
     # Auto-start; comment out if you prefer manual start
@@ -153,6 +172,8 @@ def main():
                 restart_api()
             elif cmd in ("api-status", "as"):
                 api_status()
+            elif cmd.partition(" ")[0] in ("trend", "t"):
+                api_trend(cmd.partition(" ")[2].strip())
             elif cmd in ("help", "?"):
                 _print_help()
             elif cmd == "":
@@ -163,6 +184,7 @@ def main():
         print("\n[ctl] Exiting controller ...")
     finally:
         stop_api_soft(timeout=3.0)
+        _telemetry.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+# my-azure-frontend/app/assets.py
+from __future__ import annotations
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Text-like assets worth precompressing; images/fonts are already compressed.
+_COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+_MIN_COMPRESS_BYTES = 256
+
+class Asset:
+    __slots__ = ("mimetype", "etag", "variants")
+
+    def __init__(self, mimetype: str, etag: str, variants: Dict[str, bytes]):
+        self.mimetype = mimetype
+        self.etag = etag
+        self.variants = variants  # content-encoding ("identity", "gzip", "br") -> body
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag of one variant: each content-coding is a different representation."""
+        return self.etag if encoding == "identity" else f'{self.etag[:-1]}-{encoding}"'
+
+class AssetManifest:
+    """Content-hashed, precompressed copies of everything under static/, built once.
+
+    `tailwind.css` is published as `tailwind.<sha256[:12]>.css`, so the URL changes
+    whenever the bytes do and responses can be cached forever.
+    """
+
+    def __init__(self, static_dir: Path):
+        self.static_dir = static_dir
+        self.urls: Dict[str, str] = {}      # logical name -> hashed name
+        self.assets: Dict[str, Asset] = {}  # hashed name -> Asset
+
+    def build(self) -> "AssetManifest":
+        if not self.static_dir.is_dir():
+            return self
+        for path in sorted(p for p in self.static_dir.rglob("*") if p.is_file()):
+            rel = path.relative_to(self.static_dir).as_posix()
+            body = path.read_bytes()
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            hashed = str(Path(rel).with_name(f"{path.stem}.{digest}{path.suffix}").as_posix())
+            variants = {"identity": body}
+            if path.suffix in _COMPRESSIBLE and len(body) >= _MIN_COMPRESS_BYTES:
+                variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+                if brotli is not None:
+                    variants["br"] = brotli.compress(body, quality=11)
+            mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            self.urls[rel] = hashed
+            self.assets[hashed] = Asset(mimetype, f'"{digest}"', variants)
+        return self
+
+    def hashed_name(self, name: str) -> Optional[str]:
+        return self.urls.get(name)
+
+    def pick(self, hashed: str, accept_encoding: str):
+        """Return (asset, encoding, body) for the best variant the client accepts."""
+        asset = self.assets.get(hashed)
+        if asset is None:
+            return None, None, None
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        for enc in ("br", "gzip"):
+            if enc in asset.variants and enc in accepted:
+                return asset, enc, asset.variants[enc]
+        return asset, "identity", asset.variants["identity"]
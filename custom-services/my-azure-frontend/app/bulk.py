@@ -0,0 +1,168 @@
+# my-azure-frontend/app/bulk.py
+from __future__ import annotations
+import csv
+import io
+import ipaddress
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, IO, Iterator, List, Tuple
+
+import requests
+
+MAX_REPORTED_ERRORS = 200  # per-row errors shown back to the user; counts stay exact
+
+Row = Tuple[int, Dict[str, Any]]  # (1-based row number in the upload, parsed route)
+
+def iter_rows(stream: IO[bytes], filename: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row_number, raw_row) from a CSV or NDJSON upload without reading it all.
+
+    CSV needs a header with destination,next_hop[,metric]. `.json` files holding a
+    single array are accepted too, but are necessarily parsed in one piece.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        for n, row in enumerate(csv.DictReader(text), start=1):
+            yield n, row
+    elif name.endswith(".json"):
+        data = json.load(text)
+        for n, row in enumerate(data if isinstance(data, list) else [data], start=1):
+            yield n, row
+    else:  # .ndjson / .jsonl / anything else: one JSON object per line
+        for n, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, e
+
+def _metric(value: Any) -> int:
+    """An integral metric (CSV cells arrive as text); 1.5 is an error, not 1."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return 0
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                raise ValueError(f"metric must be an integer, got {value!r}") from None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"metric must be an integer, got {value!r}")
+
+def validate_row(raw: Any) -> Dict[str, Any]:
+    if isinstance(raw, Exception):
+        raise ValueError(f"invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("row is not an object")
+    dest = str(raw.get("destination") or "").strip()
+    nh = str(raw.get("next_hop") or "").strip()
+    metric = _metric(raw.get("metric"))
+    if metric < 0:
+        raise ValueError("metric must be >= 0")
+    return {
+        "destination": str(ipaddress.ip_network(dest, strict=False)),
+        "next_hop": str(ipaddress.ip_address(nh)),
+        "metric": metric,
+    }
+
+def _post_chunk(session: requests.Session, url: str, chunk: List[Row], timeout: float) -> dict:
+    body = "".join(json.dumps(route, separators=(",", ":")) + "\n" for _, route in chunk)
+    r = session.post(url, data=body.encode("utf-8"), timeout=timeout,
+                     headers={"Content-Type": "application/x-ndjson"})
+    r.raise_for_status()
+    return r.json()
+
+class BulkReport:
+    def __init__(self):
+        self.total = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.rejected_unknown = 0  # rejected by the API past the errors it echoes back
+        self.chunks = 0
+        self.failed_chunks = 0
+        self.errors: List[dict] = []
+
+    def reject(self, row: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def reject_unknown(self, count: int, rows: str) -> None:
+        self.rejected += count
+        self.rejected_unknown += count
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": rows, "error": f"{count} more rows rejected by API (details not returned)"})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total, "accepted": self.accepted, "rejected": self.rejected,
+            "rejected_unknown": self.rejected_unknown, "chunks": self.chunks, "failed_chunks": self.failed_chunks, "errors": self.errors,
+        }
+
+def upload_routes(session: requests.Session, import_url: str, rows: Iterator[Tuple[int, Any]],
+                  chunk_size: int = 500, max_in_flight: int = 4, timeout: float = 30.0) -> dict:
+    """Validate rows and ship them to the API's NDJSON import in concurrent chunks.
+
+    At most `max_in_flight` chunks are outstanding; parsing pauses until one lands,
+    so memory stays bounded by max_in_flight * chunk_size rows whatever the file size.
+    """
+    report = BulkReport()
+    pending: Dict[Future, List[Row]] = {}
+
+    def _settle(done) -> None:
+        for fut in done:
+            chunk = pending.pop(fut)
+            try:
+                res = fut.result()
+            except Exception as e:
+                report.failed_chunks += 1
+                for n, _ in chunk:
+                    report.reject(n, f"upload failed: {e}")
+                continue
+            # The API numbers lines within the chunk; map them back to upload rows.
+            bad = {}
+            for err in res.get("errors", []):
+                line = int(err.get("line", 0))
+                if 1 <= line <= len(chunk):
+                    bad[chunk[line - 1][0]] = err.get("error", "rejected by API")
+            for n, msg in bad.items():
+                report.reject(n, msg)
+            # The API echoes only its first errors but counts them all: trust its counts, and
+            # report rejections it did not itemise against the chunk's row range.
+            imported = int(res.get("imported", len(chunk) - int(res.get("error_count", len(bad)))))
+            report.accepted += imported
+            unknown = len(chunk) - imported - len(bad)
+            if unknown > 0:
+                report.reject_unknown(unknown, f"{chunk[0][0]}-{chunk[-1][0]}")
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="bulk") as pool:
+        chunk: List[Row] = []
+
+        def _ship(c: List[Row]) -> None:
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                _settle(done)
+            report.chunks += 1
+            pending[pool.submit(_post_chunk, session, import_url, c, timeout)] = c
+
+        for n, raw in rows:
+            report.total += 1
+            try:
+                chunk.append((n, validate_row(raw)))
+            except (ValueError, TypeError) as e:
+                report.reject(n, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                _ship(chunk)
+                chunk = []
+        if chunk:
+            _ship(chunk)
+        _settle(wait(pending).done)
+
+    return report.as_dict()
@@ -0,0 +1,224 @@
+# my-azure-frontend/app/fleet.py
+from __future__ import annotations
+import fnmatch
+import heapq
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from shared.jsonlog import get_logger
+
+log = get_logger("frontend")
+
+@dataclass(frozen=True)
+class HeartbeatSource:
+    """One directory to watch for heartbeat files of a single service."""
+    service: str
+    directory: Path
+    pattern: str = ".heartbeat*"
+
+@dataclass
+class Instance:
+    key: str
+    service: str
+    path: Path
+    sig: Tuple[int, int] = (0, 0)  # (mtime_ns, size) of the last parsed payload
+    ts: float = 0.0
+    status: str = "unknown"
+    version: Optional[str] = None
+    stale: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"service": self.service, "status": "stale" if self.stale else self.status,
+                "reported": self.status, "ts": self.ts, "version": self.version,
+                "path": str(self.path)}
+
+def instance_key(service: str, filename: str, pattern: str) -> str:
+    """`router` + `.heartbeat-r2` -> `router/r2`; the bare `.heartbeat` is `router/default`."""
+    stem = pattern.split("*", 1)[0]
+    suffix = filename[len(stem):] if filename.startswith(stem) else filename
+    suffix = suffix.lstrip("-._") or "default"
+    return f"{service}/{suffix}"
+
+class HeartbeatIndex:
+    """In-memory index of every heartbeat file under the configured directories.
+
+    One background thread keeps it current: directory listings are re-read only
+    when a directory's mtime moves (an instance came or went), and a payload is
+    re-parsed only when its file's (mtime, size) changed. Expiry deadlines sit
+    in a min-heap, so staleness is found by popping due entries instead of
+    re-checking every instance, and `stale()` hands out a cached frozenset.
+    """
+
+    def __init__(self, sources: Iterable[HeartbeatSource], stale_after_sec: float = 5.0,
+                 scan_interval_sec: float = 1.0):
+        self.stale_after_sec = stale_after_sec
+        self.scan_interval_sec = scan_interval_sec
+        self.version = 0
+        self._instances: Dict[str, Instance] = {}
+        self._by_path: Dict[Path, str] = {}
+        self._listings: Dict[HeartbeatSource, Tuple[int, Dict[Path, str]]] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._stale: set = set()
+        self._stale_view: FrozenSet[str] = frozenset()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.set_sources(sources)
+
+    # ---- configuration ----
+
+    def set_sources(self, sources: Iterable[HeartbeatSource]) -> None:
+        # Swap the whole list; the next scan drops instances whose directory went away.
+        self.sources = list(sources)
+        self._listings = {}
+
+    # ---- queries (O(1), safe from any thread) ----
+
+    def stale(self) -> FrozenSet[str]:
+        with self._lock:
+            self._expire(time.time())
+            return self._stale_view
+
+    def is_stale(self, key: str) -> bool:
+        return key in self.stale()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire(time.time())
+            return {"total": len(self._instances), "stale": len(self._stale)}
+
+    def instances(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._expire(time.time())
+            return {k: inst.as_dict() for k, inst in self._instances.items()}
+
+    # ---- incremental maintenance ----
+
+    def _expire(self, now: float) -> None:
+        # Each heartbeat pushes one deadline; entries superseded by a newer beat are skipped.
+        heap = self._deadlines
+        changed = False
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            inst = self._instances.get(key)
+            if inst is None or inst.stale or inst.ts + self.stale_after_sec != deadline:
+                continue
+            inst.stale = True
+            self._stale.add(key)
+            changed = True
+        if changed:
+            self._stale_view = frozenset(self._stale)
+            self.version += 1
+
+    def _listing(self, src: HeartbeatSource) -> Dict[Path, str]:
+        """Heartbeat files in `src.directory`; re-listed only when the directory's mtime moves."""
+        cached = self._listings.get(src)
+        try:
+            mtime = src.directory.stat().st_mtime_ns
+        except OSError:
+            return {}
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        found: Dict[Path, str] = {}
+        try:
+            with os.scandir(src.directory) as it:
+                for entry in it:
+                    if fnmatch.fnmatch(entry.name, src.pattern) and entry.is_file():
+                        found[Path(entry.path)] = instance_key(src.service, entry.name, src.pattern)
+        except OSError:
+            return cached[1] if cached else {}
+        self._listings[src] = (mtime, found)
+        return found
+
+    def _read(self, path: Path, key: str, service: str) -> None:
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        sig = (st.st_mtime_ns, st.st_size)
+        inst = self._instances.get(key)
+        if inst is not None and inst.sig == sig:
+            return
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # half-written file; picked up on the next scan
+        ts = float(payload.get("ts", 0))
+        with self._lock:
+            if inst is None:
+                inst = self._instances[key] = Instance(key=key, service=service, path=path)
+                self._by_path[path] = key
+            changed = (inst.ts, inst.status, inst.version) != (ts, payload.get("status"), payload.get("version"))
+            inst.sig, inst.ts = sig, ts
+            inst.status = payload.get("status", "unknown")
+            inst.version = payload.get("version")
+            heapq.heappush(self._deadlines, (ts + self.stale_after_sec, key))
+            if inst.stale and ts + self.stale_after_sec > time.time():
+                inst.stale = False
+                self._stale.discard(key)
+                self._stale_view = frozenset(self._stale)
+            if changed:
+                self.version += 1
+
+    def scan(self) -> int:
+        """Bring the index up to date with the filesystem; returns the index version."""
+        seen: Dict[Path, str] = {}
+        keys: set = set()
+        for src in self.sources:
+            for path, key in self._listing(src).items():
+                if key in keys:
+                    key = f"{key}@{path.parent.name}"  # same file name under two directories
+                keys.add(key)
+                seen[path] = key
+                self._read(path, key, src.service)
+        gone = [p for p in self._by_path if p not in seen]
+        if gone:
+            # A removed heartbeat is a clean shutdown: the instance leaves the fleet.
+            with self._lock:
+                for path in gone:
+                    key = self._by_path.pop(path)
+                    self._instances.pop(key, None)
+                    self._stale.discard(key)
+                self._stale_view = frozenset(self._stale)
+                self.version += 1
+        with self._lock:
+            self._expire(time.time())
+            if len(self._deadlines) > 4 * len(self._instances) + 64:
+                # Drop superseded deadlines so the heap stays proportional to the fleet.
+                self._deadlines = [(i.ts + self.stale_after_sec, k)
+                                   for k, i in self._instances.items() if not i.stale]
+                heapq.heapify(self._deadlines)
+        return self.version
+
+    # ---- background thread ----
+
+    def reinit(self) -> None:
+        """Recreate sync primitives in a freshly forked (and possibly gevent-patched) worker."""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                log.error(f"Heartbeat scan failed: {e}")
+            self._stop.wait(self.scan_interval_sec)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="heartbeat-index", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
@@ -0,0 +1,213 @@
+# my-azure-frontend/app/integrations.py
+from __future__ import annotations
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Upstream is known to be down; the call was refused without touching the network."""
+
+class BulkheadFullError(requests.exceptions.RequestException):
+    """Too many calls to this upstream are already in flight."""
+
+class CircuitBreaker:
+    """closed -> open after `failures` failed calls in a row; one trial call per `reset_sec`.
+
+    While open every call fails immediately, so request threads stop queueing
+    behind an upstream that would only time out anyway.
+    """
+
+    def __init__(self, failures: int = 5, reset_sec: float = 10.0):
+        self.threshold = failures
+        self.reset_sec = reset_sec
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_sec:
+                # One trial call per window; a trial that never reports back just waits a window.
+                self.state = "half_open"
+                self._opened_at = now
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class IntegrationClient:
+    """Outbound HTTP for frontend integrations, shaped like `requests.Session.get/post`.
+
+    Per upstream host (scheme://netloc) it keeps a circuit breaker and a bulkhead
+    capping concurrent calls. Each call has one overall `timeout` budget that
+    jittered retries (idempotent calls only) must fit into. Idempotent reads can
+    be hedged: if the first attempt has not answered after `hedge_after_sec`, a
+    second one is sent and whichever answers first wins. Failures surface as
+    `requests` exceptions, so existing `except RequestException` handlers apply.
+    Each thread gets its own session from `session_factory` (keep-alive per thread):
+    requests does not promise a Session is safe to share between threads.
+    """
+
+    def __init__(self, session_factory: Callable[[], requests.Session], *, retries: int = 2, backoff_base_sec: float = 0.1,
+                 backoff_max_sec: float = 1.0, connect_timeout_sec: float = 1.0,
+                 hedge_after_sec: float = 0.0, breaker_failures: int = 5,
+                 breaker_reset_sec: float = 10.0, max_concurrent: int = 16):
+        self.session_factory = session_factory
+        self._local = threading.local()
+        self.retries = retries
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.connect_timeout_sec = connect_timeout_sec
+        self.hedge_after_sec = hedge_after_sec
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_sec = breaker_reset_sec
+        self.max_concurrent = max_concurrent
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._bulkheads: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        # Hedged attempts run here so the caller's thread can wait on both at once.
+        self._pool = ThreadPoolExecutor(max_workers=max(2, max_concurrent), thread_name_prefix="hedge")
+
+    @classmethod
+    def from_config(cls, session_factory: Callable[[], requests.Session], ccfg: dict) -> "IntegrationClient":
+        return cls(
+            session_factory,
+            retries=int(ccfg.get("retries", 2)),
+            backoff_base_sec=float(ccfg.get("backoff_base_sec", 0.1)),
+            backoff_max_sec=float(ccfg.get("backoff_max_sec", 1.0)),
+            connect_timeout_sec=float(ccfg.get("connect_timeout_sec", 1.0)),
+            hedge_after_sec=float(ccfg.get("hedge_after_sec", 0.0)),
+            breaker_failures=int(ccfg.get("breaker_failures", 5)),
+            breaker_reset_sec=float(ccfg.get("breaker_reset_sec", 10.0)),
+            max_concurrent=int(ccfg.get("max_concurrent", 16)),
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = self._local.session = self.session_factory()
+        return s
+
+    # ---- per-upstream state ----
+
+    def _upstream(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        key = self._upstream(url)
+        with self._lock:
+            b = self._breakers.get(key)
+            if b is None:
+                b = self._breakers[key] = CircuitBreaker(self.breaker_failures, self.breaker_reset_sec)
+            return b
+
+    def _bulkhead(self, url: str) -> threading.BoundedSemaphore:
+        key = self._upstream(url)
+        with self._lock:
+            sem = self._bulkheads.get(key)
+            if sem is None:
+                sem = self._bulkheads[key] = threading.BoundedSemaphore(self.max_concurrent)
+            return sem
+
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return {k: b.state for k, b in self._breakers.items()}
+
+    # ---- calls ----
+
+    def get(self, url: str, timeout: float = 2.0, hedge: bool = True, **kw: Any) -> requests.Response:
+        return self.request("GET", url, timeout=timeout, idempotent=True, hedge=hedge, **kw)
+
+    def post(self, url: str, timeout: float = 3.0, idempotent: bool = False, **kw: Any) -> requests.Response:
+        return self.request("POST", url, timeout=timeout, idempotent=idempotent, **kw)
+
+    def request(self, method: str, url: str, *, timeout: float = 2.0, idempotent: bool = False,
+                hedge: bool = False, **kw: Any) -> requests.Response:
+        bulkhead = self._bulkhead(url)
+        if not bulkhead.acquire(blocking=False):
+            raise BulkheadFullError(f"{self.max_concurrent} calls already in flight to {self._upstream(url)}")
+        try:
+            breaker = self.breaker(url)
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {self._upstream(url)}")
+            return self._call(breaker, method, url, timeout, idempotent, hedge, kw)
+        finally:
+            bulkhead.release()
+
+    def _call(self, breaker: CircuitBreaker, method: str, url: str, timeout: float,
+              idempotent: bool, hedge: bool, kw: dict) -> requests.Response:
+        deadline = time.monotonic() + timeout
+        attempts = 1 + (self.retries if idempotent else 0)
+        last: Optional[Exception] = None
+        for attempt in range(attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                resp = self._attempt(method, url, remaining, hedge and idempotent, kw)
+            except requests.exceptions.RequestException as e:
+                last = e
+            else:
+                if resp.status_code not in RETRY_STATUSES:
+                    breaker.success()
+                    return resp
+                if attempt + 1 == attempts:
+                    breaker.failure()
+                    return resp
+                last = requests.exceptions.HTTPError(f"{resp.status_code} from {url}", response=resp)
+            # Full jitter: concurrent callers spread out instead of retrying in lockstep.
+            pause = random.uniform(0, min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt)))
+            if attempt + 1 < attempts and pause < deadline - time.monotonic():
+                time.sleep(pause)
+        breaker.failure()
+        raise last or requests.exceptions.Timeout(f"no answer from {url} within {timeout}s")
+
+    def _send(self, method: str, url: str, budget: float, kw: dict) -> requests.Response:
+        return self.session.request(method, url, timeout=(min(self.connect_timeout_sec, budget), budget), **kw)
+
+    def _attempt(self, method: str, url: str, budget: float, hedge: bool, kw: dict) -> requests.Response:
+        if not hedge or not 0 < self.hedge_after_sec < budget:
+            return self._send(method, url, budget, kw)
+        first = self._pool.submit(self._send, method, url, budget, kw)
+        done, _ = wait([first], timeout=self.hedge_after_sec)
+        if done:
+            return first.result()
+        pending = {first, self._pool.submit(self._send, method, url, budget - self.hedge_after_sec, kw)}
+        end = time.monotonic() + budget - self.hedge_after_sec
+        last: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, end - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                if fut.exception() is None:
+                    return fut.result()  # the slower attempt finishes in the background
+                last = fut.exception()
+        raise last or requests.exceptions.Timeout(f"no answer from {url} within {budget}s")
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
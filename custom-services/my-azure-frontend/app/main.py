@@ -1,14 +1,33 @@
 # my-azure-frontend/app/main.py
 from __future__ import annotations
 import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import wraps
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import requests
 from flask import (
-    Flask, render_template, request, redirect, url_for, session, flash, jsonify
+    Flask, Response, abort, g, render_template, request, redirect, url_for, session, flash, jsonify
 )
+from jinja2 import FileSystemBytecodeCache
+from requests.adapters import HTTPAdapter
+
+# custom-services/ goes on sys.path before the local modules load: they log through shared/.
+_SERVICES_ROOT = Path(__file__).resolve().parents[2]
+if str(_SERVICES_ROOT) not in sys.path:
+    sys.path.insert(0, str(_SERVICES_ROOT))
+
+from assets import AssetManifest
+from bulk import iter_rows, upload_routes
+from fleet import HeartbeatIndex, HeartbeatSource
+from integrations import IntegrationClient
+from status import stable
+from users import PasswordHasher, SessionCache, UserStore
 
 # -----------------------------
 # Config helpers
@@ -21,43 +40,46 @@ def _config_paths() -> Tuple[Path, Path]:
     cfg_dir = _project_root() / "config"
     return cfg_dir / "app.json", cfg_dir / "template.app.json"
 
+from shared.config import ConfigStore, config_model  # noqa: E402
+from shared.jsonlog import get_logger  # noqa: E402
+
+CONFIG = ConfigStore(*_config_paths(), model=config_model("frontend"))
+
 def load_config() -> dict:
-    app_json, _ = _config_paths()
-    with open(app_json, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Cached, validated config/app.json; re-read only when CONFIG.refresh() sees a change."""
+    return CONFIG.get()
 
 # -----------------------------
-# In-memory auth store
+# Auth store
 # -----------------------------
 
-# Runtime-only user dictionary; resets when the process restarts.
-# Populated on startup from config.auth.users (if present) and ensures a default admin/admin.
-users_store: Dict[str, str] = {}
-_users_initialized = False
-
-def _ensure_users_initialized(cfg: dict) -> None:
-    """Hydrate in-memory users from config once per process and guarantee a default admin/admin."""
-    global _users_initialized
-    if _users_initialized:
-        return
-
-    # Load from config.auth.users (optional)
-    for u in cfg.get("auth", {}).get("users", []):
+# Users live in SQLite (hashed), so they survive restarts and are shared by all workers.
+# Seeded once from config.auth.users (if present), with a default admin/admin.
+_user_store: Optional[UserStore] = None
+
+def _init_user_store(cfg: dict) -> UserStore:
+    global _user_store
+    auth = cfg.get("auth", {})
+    hasher = PasswordHasher(
+        n=int(auth.get("scrypt_n", 2 ** 14)),
+        r=int(auth.get("scrypt_r", 8)),
+        p=int(auth.get("scrypt_p", 1)),
+    )
+    cache = SessionCache(
+        max_entries=int(auth.get("session_cache_size", 1024)),
+        ttl_sec=float(auth.get("session_cache_ttl_sec", 30)),
+    )
+    store = UserStore(_project_root() / auth.get("db_path", "app/.data/users.db"), hasher, cache)
+
+    for u in auth.get("users", []):
         uname = (u or {}).get("username")
         pwd = (u or {}).get("password")
         if isinstance(uname, str) and uname and isinstance(pwd, str) and pwd:
-            users_store.setdefault(uname, pwd)
-
-    # Ensure a default dev user is available
-    users_store.setdefault("admin", "admin")
-
-    _users_initialized = True
-
-def _check_credentials(username: str, password: str) -> bool:
-    return users_store.get(username) == password
+            store.create_user(uname, pwd)  # no-op if it already exists
+    store.create_user("admin", "admin")
 
-def _username_exists(username: str) -> bool:
-    return username in users_store
+    _user_store = store
+    return store
 
 # -----------------------------
 # Decorators
@@ -66,7 +88,11 @@ def _username_exists(username: str) -> bool:
 def login_required(view):
     @wraps(view)
     def wrapped(*args, **kwargs):
-        if not session.get("user"):
+        user = session.get("user")
+        if not user:
+            return redirect(url_for("login"))
+        if _user_store and not _user_store.session_valid(user, session.get("epoch")):
+            session.clear()
             return redirect(url_for("login"))
         return view(*args, **kwargs)
     return wrapped
@@ -75,8 +101,7 @@ def login_required(view):
 # Health / integration helpers
 # -----------------------------
 
-def _read_router_heartbeat(cfg: dict) -> Dict[str, Any]:
-    hb_path = cfg.get("integrations", {}).get("router", {}).get("heartbeat_path")
+def _read_heartbeat_file(hb_path: Optional[str]) -> Dict[str, Any]:
     try:
         if not hb_path:
             return {"status": "unknown", "note": "No heartbeat_path configured"}
@@ -88,12 +113,81 @@ def _read_router_heartbeat(cfg: dict) -> Dict[str, Any]:
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
-def _query_api_health(cfg: dict) -> Dict[str, Any]:
-    url = cfg.get("integrations", {}).get("api", {}).get("health_url")
+def _read_router_heartbeat(cfg: dict) -> Dict[str, Any]:
+    return _read_heartbeat_file(cfg.get("integrations", {}).get("router", {}).get("heartbeat_path"))
+
+def fleet_sources(cfg: dict) -> list:
+    root = _project_root()
+    return [
+        HeartbeatSource(service=src["service"], directory=(root / src["dir"]).resolve(),
+                        pattern=src.get("pattern", ".heartbeat*"))
+        for src in cfg.get("fleet", {}).get("sources", [])
+    ]
+
+def make_fleet_index(cfg: dict) -> HeartbeatIndex:
+    fleet = cfg.get("fleet", {})
+    return HeartbeatIndex(
+        fleet_sources(cfg),
+        stale_after_sec=float(fleet.get("stale_after_sec", 5.0)),
+        scan_interval_sec=float(fleet.get("scan_interval_sec", 1.0)),
+    )
+
+def fleet_status(index: HeartbeatIndex) -> Dict[str, Any]:
+    """Dashboard card for the whole fleet: `ok` unless some instance has gone stale."""
+    counts = index.counts()
+    stale = sorted(index.stale())
+    return {"status": "stale" if stale else "ok", **counts, "stale_instances": stale}
+
+# One small executor and one integration client per process, shared by all requests.
+_executor: Optional[ThreadPoolExecutor] = None
+_client: Optional[IntegrationClient] = None
+_pool_lock = threading.Lock()
+
+def _reset_pools_after_fork() -> None:
+    # A forked worker inherits the parent's pool objects but not its threads or sockets.
+    global _executor, _client, _pool_lock
+    _executor = None
+    _client = None
+    _pool_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+def _health_cfg(cfg: dict) -> dict:
+    return cfg.get("health", {})
+
+def _http_session() -> requests.Session:
+    # Built once per thread by IntegrationClient; a thread has one call in flight per host.
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=1)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+def _health_executor(cfg: dict) -> ThreadPoolExecutor:
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            workers = int(_health_cfg(cfg).get("pool_size", 10))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="health")
+        return _executor
+
+def _integration_client(cfg: dict) -> IntegrationClient:
+    """Every outbound call to an integration goes through this one client (breaker, retries, hedging)."""
+    global _client
+    with _pool_lock:
+        if _client is None:
+            _client = IntegrationClient.from_config(_http_session, cfg.get("client", {}))
+        return _client
+
+def _query_api_health(cfg: dict, timeout: float = 2.0) -> Dict[str, Any]:
+    return _query_health_url(cfg, cfg.get("integrations", {}).get("api", {}).get("health_url"), timeout)
+
+def _query_health_url(cfg: dict, url: Optional[str], timeout: float = 2.0) -> Dict[str, Any]:
     try:
         if not url:
-            return {"status": "unknown", "note": "No api.health_url configured"}
-        r = requests.get(url, timeout=2)
+            return {"status": "unknown", "note": "No health_url configured"}
+        r = _integration_client(cfg).get(url, timeout=timeout)
         if r.ok:
             try:
                 return {"status": "ok", "raw": r.json()}
@@ -103,33 +197,170 @@ def _query_api_health(cfg: dict) -> Dict[str, Any]:
     except requests.exceptions.RequestException as e:
         return {"status": "down", "error": str(e)}
 
+def _service_check(cfg: dict, svc: dict, deadline: float) -> Callable[[], Dict[str, Any]]:
+    """A probe bounded by `deadline` (monotonic): its HTTP timeout is whatever time is left
+    when a worker picks it up, and it does nothing at all if that is already gone."""
+    def probe() -> Dict[str, Any]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return {"status": "timeout", "note": "Deadline passed before the probe ran"}
+        if svc.get("health_url"):
+            return _query_health_url(cfg, svc["health_url"], remaining)
+        return _read_heartbeat_file(svc.get("heartbeat_path"))
+    return probe
+
+def check_services(cfg: dict) -> Dict[str, Dict[str, Any]]:
+    """Probe every service under `integrations` concurrently within one deadline.
+
+    Services with a health_url get an HTTP probe, the rest a heartbeat file read.
+    Whatever has not answered when the deadline expires is reported as timeout,
+    so one dead upstream can no longer stall the whole page. Each probe is itself
+    bounded by the same deadline, so a late one frees its worker thread soon after.
+    """
+    deadline = float(_health_cfg(cfg).get("deadline_sec", 2.0))
+    end = time.monotonic() + deadline
+    pool = _health_executor(cfg)
+    futures = {
+        name: pool.submit(_service_check(cfg, svc or {}, end))
+        for name, svc in cfg.get("integrations", {}).items()
+    }
+    wait(futures.values(), timeout=deadline)
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, fut in futures.items():
+        if fut.done():
+            try:
+                out[name] = fut.result()
+            except Exception as e:
+                out[name] = {"status": "error", "error": str(e)}
+        else:
+            out[name] = {"status": "timeout", "note": f"No answer within {deadline}s"}
+    return out
+
 def _post_route_update(cfg: dict, data: dict) -> Dict[str, Any]:
     url = cfg.get("integrations", {}).get("api", {}).get("routes_url")
     if not url:
         return {"ok": False, "error": "No api.routes_url configured"}
     try:
-        r = requests.post(url, json=data, timeout=3)
+        # POST /routes upserts by destination, so a retried submit cannot duplicate a route.
+        r = _integration_client(cfg).post(url, json=data, timeout=3, idempotent=True)
         return {"ok": r.ok, "status_code": r.status_code, "response": try_json(r)}
     except requests.exceptions.RequestException as e:
         return {"ok": False, "error": str(e)}
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def status_events(poller, keepalive_sec: float = 15.0):
+    """Yield an SSE `snapshot` frame, then one `delta` frame per changed snapshot.
+
+    A delta only carries services whose status changed (`changed`) or went
+    away (`removed`), so idle dashboards cost a keepalive comment and nothing else.
+    Per-poll payload (`raw` bodies, timestamps) is ignored when comparing.
+    """
+    snap = poller.snapshot
+    sent, version = snap.services, snap.version
+    yield _sse("snapshot", {"version": version, "ts": snap.ts, "services": sent})
+    while True:
+        snap = poller.wait_for_change(version, keepalive_sec)
+        if snap.version == version:
+            yield ": keepalive\n\n"
+            continue
+        version = snap.version
+        changed = {k: v for k, v in snap.services.items() if stable(sent.get(k)) != stable(v)}
+        removed = [k for k in sent if k not in snap.services]
+        sent = snap.services
+        if changed or removed:
+            yield _sse("delta", {"version": snap.version, "ts": snap.ts,
+                                 "changed": changed, "removed": removed})
+
 def try_json(r: requests.Response):
     try:
         return r.json()
     except Exception:
         return r.text
 
+# -----------------------------
+# Templates & static assets
+# -----------------------------
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+def _precompile_templates(app: Flask) -> None:
+    """Compile every template up front; bytecode is also cached on disk for restarts/workers."""
+    cache_dir = _project_root() / "app" / ".cache" / "jinja"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+    except OSError:
+        pass
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+def _setup_assets(app: Flask, fcfg: dict) -> None:
+    manifest = AssetManifest(Path(app.static_folder)).build()
+
+    def asset_url(name: str) -> str:
+        hashed = manifest.hashed_name(name)
+        return url_for("asset", filename=hashed) if hashed else url_for("static", filename=name)
+
+    @app.route("/assets/<path:filename>")
+    def asset(filename: str):
+        found, encoding, body = manifest.pick(filename, request.headers.get("Accept-Encoding", ""))
+        if found is None:
+            abort(404)
+        etag = found.etag_for(encoding)
+        # A 304 repeats the caching headers of the 200 it stands in for.
+        headers = {
+            "Cache-Control": f"public, max-age={ASSET_MAX_AGE}, immutable",
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if request.if_none_match and etag.strip('"') in request.if_none_match:
+            return Response(status=304, headers=headers)
+        resp = Response(body, mimetype=found.mimetype, headers=headers)
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+        return resp
+
+    app.jinja_env.globals["asset_url"] = asset_url
+    # Opt back into the Tailwind Play CDN (full utility set, needs internet) for template work.
+    app.jinja_env.globals["tailwind_cdn"] = bool(fcfg.get("tailwind_cdn", False))
+
 # -----------------------------
 # Flask app factory
 # -----------------------------
 
-def create_app(cfg: dict) -> Flask:
+def _setup_request_log(app: Flask) -> None:
+    """One `http.request` event per response; the logger only enqueues, so no handler waits on disk."""
+    log = get_logger("frontend")
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            rule = request.url_rule
+            log.event("http.request", method=request.method, route=rule.rule if rule else "<unmatched>",
+                      status=response.status_code, duration_ms=round((time.perf_counter() - started) * 1000, 3))
+        return response
+
+def create_app(cfg: dict, status_poller=None, fleet: Optional[HeartbeatIndex] = None) -> Flask:
     app = Flask(__name__, template_folder="templates", static_folder="static")
-    app.config["TEMPLATES_AUTO_RELOAD"] = True
+    fcfg = cfg.get("frontend", {})
+    debug = bool(fcfg.get("debug", False))
+    # Only watch template mtimes while developing; otherwise compile once and keep them.
+    app.config["TEMPLATES_AUTO_RELOAD"] = debug
     app.secret_key = cfg.get("auth", {}).get("secret_key", "dev-only-change-me")
 
-    # Initialize in-memory users once per process
-    _ensure_users_initialized(cfg)
+    _setup_assets(app, fcfg)
+    if not debug:
+        _precompile_templates(app)
+
+    store = _init_user_store(cfg)
+    _setup_request_log(app)
 
     # ---- Routes ----
 
@@ -144,8 +375,11 @@ def create_app(cfg: dict) -> Flask:
         if request.method == "POST":
             username = (request.form.get("username") or "").strip()
             password = (request.form.get("password") or "").strip()
-            if _check_credentials(username, password):
+            epoch = store.authenticate(username, password)
+            if epoch is not None:
+                session.clear()
                 session["user"] = username
+                session["epoch"] = epoch
                 return redirect(url_for("dashboard"))
             flash("Invalid credentials", "error")
         return render_template("login.html", title="Login")
@@ -159,10 +393,9 @@ def create_app(cfg: dict) -> Flask:
 
             if not username or not password:
                 flash("Username and password are required.", "error")
-            elif username in users_store:
+            elif not store.create_user(username, password):
                 flash("Username already exists.", "error")
             else:
-                users_store[username] = password
                 flash("Account created successfully! Please log in.", "success")
                 return redirect(url_for("login"))
 
@@ -175,24 +408,49 @@ def create_app(cfg: dict) -> Flask:
         return redirect(url_for("login"))
 
     # --- App pages ---
+    # Views read CONFIG.get() per request so hot reloads reach them; `cfg` above is setup only.
 
     @app.route("/")
     @login_required
     def dashboard():
-        router = _read_router_heartbeat(cfg)
-        api = _query_api_health(cfg)
+        cfg = CONFIG.get()
+        # Read the poller's latest snapshot; probe inline only when no poller runs (e.g. `flask run`).
+        services = status_poller.snapshot.services if status_poller else check_services(cfg)
         theme = cfg.get("frontend", {}).get("theme", "light")
         return render_template(
             "dashboard.html",
             title="Dashboard",
             theme=theme,
-            router=router,
-            api=api
+            services=services,
+            router=services.get("router", {}),
+            api=services.get("api", {})
+        )
+
+    @app.route("/status/stream")
+    @login_required
+    def status_stream():
+        if not status_poller:
+            return jsonify({"error": "status poller not running"}), 503
+        keepalive = float(CONFIG.get().get("frontend", {}).get("sse_keepalive_sec", 15))
+        return Response(
+            status_events(status_poller, keepalive),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
+    @app.route("/fleet")
+    @login_required
+    def fleet_view():
+        if fleet is None:
+            return jsonify({"error": "heartbeat index not running"}), 503
+        if request.args.get("stale"):
+            return jsonify({"version": fleet.version, "stale": sorted(fleet.stale())})
+        return jsonify({"version": fleet.version, **fleet.counts(), "instances": fleet.instances()})
+
     @app.route("/routes", methods=["GET", "POST"])
     @login_required
     def routes():
+        cfg = CONFIG.get()
         result = None
         if request.method == "POST":
             payload = {
@@ -209,4 +467,35 @@ def create_app(cfg: dict) -> Flask:
         theme = cfg.get("frontend", {}).get("theme", "light")
         return render_template("routes.html", title="Routes", theme=theme, result=result)
 
+    @app.route("/routes/bulk", methods=["POST"])
+    @login_required
+    def routes_bulk():
+        cfg = CONFIG.get()
+        upload = request.files.get("file")
+        import_url = cfg.get("integrations", {}).get("api", {}).get("import_url")
+        bulk_result = None
+        if not upload or not upload.filename:
+            flash("Choose a CSV or NDJSON file to upload.", "error")
+        elif not import_url:
+            flash("No api.import_url configured", "error")
+        else:
+            bulk_cfg = cfg.get("bulk", {})
+            try:
+                bulk_result = upload_routes(
+                    _integration_client(cfg),
+                    import_url,
+                    iter_rows(upload.stream, upload.filename),
+                    chunk_size=int(bulk_cfg.get("chunk_size", 500)),
+                    max_in_flight=int(bulk_cfg.get("max_in_flight", 4)),
+                )
+            except Exception as e:
+                flash(f"Bulk upload failed: {e}", "error")
+            else:
+                category = "success" if not bulk_result["rejected"] else "error"
+                flash(f"Bulk upload: {bulk_result['accepted']}/{bulk_result['total']} routes accepted", category)
+
+        theme = cfg.get("frontend", {}).get("theme", "light")
+        return render_template("routes.html", title="Routes", theme=theme, result=None,
+                               bulk_result=bulk_result)
+
     return app
\ No newline at end of file
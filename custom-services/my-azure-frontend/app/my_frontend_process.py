@@ -2,19 +2,53 @@
 from __future__ import annotations
 import json
 import os
+from pathlib import Path
+
+def _frontend_cfg() -> dict:
+    # Deliberately a raw read: this runs before anything (incl. shared.config) is imported.
+    try:
+        cfg_path = Path(__file__).resolve().parents[1] / "config" / "app.json"
+        return json.loads(cfg_path.read_text(encoding="utf-8")).get("frontend", {})
+    except Exception:
+        return {}
+
+# gevent has to patch the stdlib before threading/socket users are imported, so
+# the server choice is read here, ahead of every other import. With preload, the
+# gunicorn master imports the app too and must be patched for gevent workers, but
+# it keeps real threads: greenlets would be copied into every forked worker.
+_FCFG = _frontend_cfg()
+_SERVER = _FCFG.get("server", "werkzeug")
+if _SERVER == "gunicorn" and os.name == "nt":
+    print("[frontend] server=gunicorn is not supported on Windows; falling back to werkzeug.")
+    _SERVER = "werkzeug"
+if _SERVER == "gevent" or (_SERVER == "gunicorn" and _FCFG.get("worker_class") == "gevent"):
+    try:
+        from gevent import monkey  # type: ignore
+        monkey.patch_all(thread=_SERVER == "gevent")
+    except ImportError:
+        print("[frontend] gevent is not installed; falling back to werkzeug.")
+        _SERVER = "werkzeug"
+
 import signal
 import sys
 import threading
 import time
-from pathlib import Path
 
-from main import create_app, load_config  # local imports from app/main.py
+from main import (  # local imports from app/main.py
+    CONFIG, check_services, create_app, fleet_sources, fleet_status, load_config, make_fleet_index,
+)
+from fleet import HeartbeatIndex
+from status import StatusPoller
+from shared import jsonlog
+
+log = jsonlog.get_logger("frontend")
 
 __version__ = "0.1.1"
 
 _running = True
-_httpd = None  # will hold the werkzeug server
+_httpd = None  # will hold the HTTP server (werkzeug or gevent)
 _srv_thread: threading.Thread | None = None
+_arbiter = None  # gunicorn's arbiter, once it is ready (master process only)
 
 def _set_console_title():
     if os.name == "nt":
@@ -35,7 +69,7 @@ def _maybe_set_proc_title():
 def _handle_sig(signum, frame):
     """Make shutdown deterministic across SIGTERM (Linux), SIGBREAK (Windows soft), SIGINT."""
     global _running
-    print(f"[frontend] Received signal {signum}; graceful shutdown requested.")
+    log.info(f"Received signal {signum}; graceful shutdown requested.")
     _running = False
     # If the HTTP server is running, ask it to stop accepting new requests
     try:
@@ -44,10 +78,19 @@ def _handle_sig(signum, frame):
     except Exception:
         pass
 
-def _write_heartbeat(hb_path: Path, status: str = "ok"):
-    payload = {"ts": time.time(), "status": status, "version": __version__}
+def _write_heartbeat(hb_path: Path, status: str = "ok", **extra):
+    payload = {"ts": time.time(), "status": status, "version": __version__, **extra}
     hb_path.write_text(json.dumps(payload), encoding="utf-8")
 
+def _serving_status() -> tuple[str, dict]:
+    """Heartbeat status for this process; under gunicorn, judged by the arbiter's live workers."""
+    if _SERVER != "gunicorn":
+        return "ok", {}
+    if _arbiter is None:
+        return "starting", {}
+    workers = len(_arbiter.WORKERS)
+    return ("ok" if workers else "degraded"), {"workers": workers}
+
 def _remove_heartbeat(hb_path: Path):
     try:
         hb_path.unlink(missing_ok=True)
@@ -66,9 +109,85 @@ def _remove_pid(pid_path: Path):
     except Exception:
         pass
 
+class _GeventServer:
+    """Gives gevent's WSGIServer the serve_forever()/shutdown() pair werkzeug's server has.
+
+    Each connection is a greenlet rather than an OS thread, so hundreds of idle
+    /status/stream clients cost a few KB each.
+    """
+
+    def __init__(self, host: str, port: int, app):
+        from gevent.pywsgi import WSGIServer  # type: ignore
+        self._server = WSGIServer((host, port), app)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.stop(timeout=2)
+
+def _run_gunicorn(host: str, port: int, app, fcfg: dict, poller: StatusPoller,
+                  index: HeartbeatIndex) -> None:
+    """Serve `app` under gunicorn's arbiter in this (main) thread until it halts.
+
+    The app is built once here and inherited by every forked worker (preload).
+    Threads don't survive fork, so each worker starts its own status poller and
+    heartbeat index once its worker class is initialised (after gevent patching, when that is used).
+    """
+    from gunicorn.app.base import BaseApplication  # type: ignore
+
+    def _when_ready(server):
+        global _arbiter
+        _arbiter = server
+
+    def _post_worker_init(worker):
+        _configure_logging(load_config())  # the master's writer thread didn't survive the fork
+        index.reinit()
+        index.start()
+        poller.reinit()
+        poller.start()
+        CONFIG.watch()
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": int(fcfg.get("workers", 2)),
+        "threads": int(fcfg.get("threads", 8)),
+        "worker_class": fcfg.get("worker_class", "gthread"),
+        "preload_app": True,
+        "graceful_timeout": 5,
+        "when_ready": _when_ready,
+        "post_worker_init": _post_worker_init,
+        "worker_exit": lambda server, worker: jsonlog.shutdown(),
+    }
+
+    class _FrontendApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    _FrontendApplication().run()
+
+def _configure_logging(cfg: dict) -> None:
+    section = dict(cfg.get("logging") or {})
+    if _SERVER == "gunicorn":
+        # One file per process: workers each run their own writer and rotate independently.
+        path = Path(section.get("file") or ".data/logs/frontend.jsonl")
+        if "{pid}" not in str(path):
+            section["file"] = str(path.with_name(f"{path.stem}.{{pid}}{path.suffix}"))
+    jsonlog.configure("frontend", section, Path(__file__).resolve().parents[1])
+
+def _make_server(host: str, port: int, app):
+    if _SERVER == "gevent":
+        return _GeventServer(host, port, app)
+    from werkzeug.serving import make_server
+    return make_server(host, port, app, threaded=True)
+
 def main():
     if len(sys.argv) < 2:
-        print("[frontend] Missing heartbeat path argument.")
+        log.error("Missing heartbeat path argument.")
         sys.exit(2)
 
     hb_path = Path(sys.argv[1]).resolve()
@@ -85,20 +204,48 @@ def main():
 
     # Config + app
     cfg = load_config()
+    _configure_logging(cfg)
+    CONFIG.subscribe(_configure_logging)
     host = cfg.get("frontend", {}).get("host", "127.0.0.1")
     port = int(cfg.get("frontend", {}).get("port", 8501))
     debug = bool(cfg.get("frontend", {}).get("debug", False))
     hb_interval = float(cfg.get("heartbeat", {}).get("interval_sec", 1.0))
+    poll_interval = float(cfg.get("health", {}).get("poll_interval_sec", 2.0))
 
-    app = create_app(cfg)
+    # Heartbeat index: every instance under `fleet.sources`, kept current by one scan
+    # thread. Its summary rides along in each status snapshot as the `fleet` card.
+    index = make_fleet_index(cfg)
+
+    def _check(c: dict) -> dict:
+        services = check_services(c)
+        if index.sources:
+            services["fleet"] = fleet_status(index)
+        return services
+
+    # Background status poller: one probe round per interval, shared by every request.
+    # Under gunicorn both are started inside each worker instead (see _run_gunicorn).
+    poller = StatusPoller(cfg, _check, interval_sec=poll_interval)
+    if _SERVER != "gunicorn":
+        index.scan()
+        index.start()
+        poller.refresh()
+        poller.start()
+        CONFIG.watch()
+
+    # Hot config: integrations added/changed in app.json are picked up by the next poll
+    CONFIG.subscribe(lambda new_cfg: setattr(poller, "cfg", new_cfg))
+    CONFIG.subscribe(lambda new_cfg: index.set_sources(fleet_sources(new_cfg)))
+
+    app = create_app(cfg, status_poller=poller, fleet=index)
 
     # Heartbeat thread
     def _heartbeat_worker():
         while _running:
             try:
-                _write_heartbeat(hb_path, status="ok")
+                status, extra = _serving_status()
+                _write_heartbeat(hb_path, status=status, **extra)
             except Exception as e:
-                print(f"[frontend] Heartbeat write failed: {e}")
+                log.warning(f"Heartbeat write failed: {e}")
             time.sleep(hb_interval)
         try:
             _write_heartbeat(hb_path, status="stopping")
@@ -110,13 +257,31 @@ def main():
     hb_thread.start()
     _write_pid(pid_path)
 
-    # Start HTTP server in a thread using werkzeug.make_server so we can shut it down cleanly
-    from werkzeug.serving import make_server
+    global _running
+    if _SERVER == "gunicorn":
+        # gunicorn's arbiter owns the main thread and the SIGTERM/SIGINT handlers
+        # (graceful worker shutdown); we clean up heartbeat + pid once it halts.
+        log.info(f"Flask starting on http://{host}:{port} (gunicorn) ...")
+        master_pid = os.getpid()
+        try:
+            _run_gunicorn(host, port, app, cfg.get("frontend", {}), poller, index)
+        finally:
+            # Forked workers unwind through here too on exit; only the master cleans up,
+            # and a worker's SystemExit (with gunicorn's boot-error codes) must propagate.
+            if os.getpid() == master_pid:
+                _running = False
+                hb_thread.join(timeout=hb_interval + 1.0)
+                _remove_pid(pid_path)
+                log.info("Frontend process stopped.")
+                jsonlog.shutdown()
+        return
+
+    # Start HTTP server in a thread so we can shut it down cleanly
     global _httpd, _srv_thread
-    _httpd = make_server(host, port, app)
+    _httpd = _make_server(host, port, app)
     _srv_thread = threading.Thread(target=_httpd.serve_forever, daemon=True)
 
-    print(f"[frontend] Flask starting on http://{host}:{port} ...")
+    log.info(f"Flask starting on http://{host}:{port} ({_SERVER}) ...")
     _srv_thread.start()
 
     # Main loop waits for shutdown signal
@@ -132,10 +297,14 @@ def main():
             pass
         if _srv_thread:
             _srv_thread.join(timeout=5.0)
+        poller.stop()
+        index.stop()
+        CONFIG.stop()
 
         # Cleanup
         _remove_pid(pid_path)
-        print("[frontend] Frontend process stopped.")
+        log.info("Frontend process stopped.")
+        jsonlog.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+# my-azure-frontend/app/status.py
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from shared.jsonlog import get_logger
+
+log = get_logger("frontend")
+
+# Per-poll payload that changes every round (heartbeat bodies with their `ts`, counters):
+# shown on the dashboard, but not a reason to tell anyone the status moved.
+VOLATILE_KEYS = frozenset({"raw", "ts"})
+
+def stable(service: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A service's check result without its volatile keys; what "changed" is judged on."""
+    if service is None:
+        return None
+    return {k: v for k, v in service.items() if k not in VOLATILE_KEYS}
+
+def _stable_all(services: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {name: stable(s) for name, s in services.items()}
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """One completed round of upstream checks. Replaced wholesale, never mutated."""
+    version: int = 0
+    ts: float = 0.0
+    services: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+class StatusPoller:
+    """Refreshes upstream status on a fixed interval in one background thread.
+
+    Request handlers only read `snapshot`, so page latency no longer depends on
+    upstream health and probe load no longer scales with the number of viewers.
+    """
+
+    def __init__(self, cfg: dict, check: Callable[[dict], Dict[str, Dict[str, Any]]],
+                 interval_sec: float = 2.0):
+        self.cfg = cfg
+        self.check = check
+        self.interval_sec = interval_sec
+        self.snapshot = StatusSnapshot()
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> StatusSnapshot:
+        services = self.check(self.cfg)
+        prev = self.snapshot
+        # Bump the version only on real changes so readers can cheaply tell if anything moved.
+        changed = _stable_all(services) != _stable_all(prev.services)
+        version = prev.version + 1 if changed else prev.version
+        with self._changed:
+            self.snapshot = StatusSnapshot(version=version, ts=time.time(), services=services)
+            if version != prev.version:
+                self._changed.notify_all()
+        return self.snapshot
+
+    def wait_for_change(self, version: int, timeout: float) -> StatusSnapshot:
+        """Block until the snapshot version differs from `version` or `timeout` passes."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.snapshot.version != version, timeout=timeout)
+            return self.snapshot
+
+    def reinit(self) -> None:
+        """Recreate sync primitives in a freshly forked (and possibly gevent-patched) worker."""
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                log.error(f"Status poll failed: {e}")
+            self._stop.wait(self.interval_sec)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
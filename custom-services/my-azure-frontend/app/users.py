@@ -0,0 +1,156 @@
+# my-azure-frontend/app/users.py
+from __future__ import annotations
+import base64
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Tuple
+
+def _b64(b: bytes) -> str:
+    return base64.b64encode(b).decode("ascii")
+
+class PasswordHasher:
+    """scrypt hashes stored as `scrypt$n$r$p$salt$hash`; cost is tunable via config.
+
+    Parameters travel with each hash, so raising the cost later keeps old hashes
+    verifiable and they are upgraded on the next successful login.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        self.n, self.r, self.p = n, r, p
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * n * r * 2, dklen=32)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        dk = self._derive(password, salt, self.n, self.r, self.p)
+        return f"scrypt${self.n}${self.r}${self.p}${_b64(salt)}${_b64(dk)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            algo, n, r, p, salt, dk = encoded.split("$")
+            if algo != "scrypt":
+                return False
+            actual = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(actual, base64.b64decode(dk))
+        except (ValueError, TypeError):
+            return False
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return not encoded.startswith(f"scrypt${self.n}${self.r}${self.p}$")
+
+class SessionCache:
+    """Bounded LRU of username -> (session_epoch, expires_at).
+
+    Entries expire after `ttl_sec`, so a `session_epoch` bump in the database
+    (from any process) invalidates sessions here within that window.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_sec: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(username)
+            if hit is None:
+                return None
+            if hit[1] < now:
+                del self._data[username]
+                return None
+            self._data.move_to_end(username)
+            return hit[0]
+
+    def put(self, username: str, epoch: int) -> None:
+        with self._lock:
+            self._data[username] = (epoch, time.monotonic() + self.ttl_sec)
+            self._data.move_to_end(username)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+class UserStore:
+    """Persistent users in SQLite, shared by every frontend worker process.
+
+    Connections are opened per operation (logins/registrations are rare and the
+    hot path is served from SessionCache), which also keeps the store fork-safe.
+    """
+
+    def __init__(self, db_path: Path, hasher: PasswordHasher, cache: SessionCache):
+        self.db_path = db_path
+        self.hasher = hasher
+        self.cache = cache
+        self._dummy_hash = hasher.hash("dummy-password")
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " username TEXT PRIMARY KEY,"
+                " pw_hash TEXT NOT NULL,"
+                " session_epoch INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=5.0)
+
+    def _row(self, username: str) -> Optional[Tuple[str, int]]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT pw_hash, session_epoch FROM users WHERE username = ?", (username,)
+            ).fetchone()
+
+    def create_user(self, username: str, password: str) -> bool:
+        """Insert a user; return False if the username is taken (checked before paying for a hash)."""
+        if self.exists(username):
+            return False
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO users (username, pw_hash, created_at) VALUES (?, ?, ?)",
+                    (username, self.hasher.hash(password), time.time()),
+                )
+            return True
+        except sqlite3.IntegrityError:  # another worker created it between the check and the insert
+            return False
+
+    def exists(self, username: str) -> bool:
+        return self._row(username) is not None
+
+    def authenticate(self, username: str, password: str) -> Optional[int]:
+        """Check a password (the only place hashing happens); return the session epoch."""
+        row = self._row(username)
+        if row is None:
+            self.hasher.verify(password, self._dummy_hash)  # same cost whether or not the user exists
+            return None
+        pw_hash, epoch = row
+        if not self.hasher.verify(password, pw_hash):
+            return None
+        if self.hasher.needs_rehash(pw_hash):
+            with closing(self._connect()) as conn, conn:
+                conn.execute("UPDATE users SET pw_hash = ? WHERE username = ?",
+                             (self.hasher.hash(password), username))
+        self.cache.put(username, epoch)
+        return epoch
+
+    def session_valid(self, username: str, epoch: Optional[int]) -> bool:
+        """Per-request check: cached epoch lookup, no hashing, DB only on cache miss."""
+        cached = self.cache.get(username)
+        if cached is None:
+            row = self._row(username)
+            if row is None:
+                return False
+            cached = row[1]
+            self.cache.put(username, cached)
+        return epoch == cached
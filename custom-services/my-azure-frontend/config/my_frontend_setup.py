@@ -1,6 +1,5 @@
 # my-azure-frontend/config/my_frontend_setup.py
 from __future__ import annotations
-import json
 import os
 import subprocess
 import sys
@@ -14,6 +13,14 @@ VENV_DIR = PROJECT_ROOT / ".venv"
 REQUIREMENTS = PROJECT_ROOT / "requirements.txt"
 HEARTBEAT_FILE = PROJECT_ROOT / "app" / ".heartbeat"
 
+# Shared config handling lives in custom-services/shared/
+SERVICES_ROOT = PROJECT_ROOT.parent
+if str(SERVICES_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVICES_ROOT))
+from shared.config import ConfigStore, config_model  # noqa: E402
+
+CONFIG = ConfigStore(APP_JSON, TEMPLATE_JSON, model=config_model("frontend"))
+
 def _python_in_venv() -> Path:
     if os.name == "nt":
         return VENV_DIR / "Scripts" / "python.exe"
@@ -43,45 +50,9 @@ def install_requirements(_: Path) -> None:
     else:
         print("[setup] No requirements.txt found; skipping dependency install.")
 
-def _read_json(path: Path) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def _write_json(path: Path, data: dict) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-def _reset_config_from_template() -> dict:
-    print("[setup] Resetting configuration from template.app.json ...")
-    template = _read_json(TEMPLATE_JSON)
-    _write_json(APP_JSON, template)
-    return template
-
 def ensure_config() -> dict:
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    if not TEMPLATE_JSON.exists():
-        raise FileNotFoundError(f"Missing template file: {TEMPLATE_JSON}")
-
-    if not APP_JSON.exists():
-        print("[setup] app.json not found; creating it from template ...")
-        cfg = _reset_config_from_template()
-    else:
-        cfg = _read_json(APP_JSON)
-
-    # Same policy as router:
-    # - if configured == false: reset to template (clean start)
-    # - elif first-time-setup == true: mark configured true & first-time-setup false
-    # - else: leave as-is
-    if not cfg.get("configured", False):
-        cfg = _reset_config_from_template()
-    elif cfg.get("first-time-setup", False):
-        print("[setup] First-time setup detected; flipping flags and saving ...")
-        cfg["configured"] = True
-        cfg["first-time-setup"] = False
-        _write_json(APP_JSON, cfg)
-
-    print("[setup] Config ready.")
-    return cfg
+    """Ensure config directory, app.json exist and are valid per your rules."""
+    return CONFIG.ensure()
 
 def setup_frontend_env() -> Tuple[Path, dict, Path]:
     python_in_venv = ensure_virtualenv()
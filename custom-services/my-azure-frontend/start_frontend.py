@@ -8,9 +8,11 @@ import time
 import json
 from pathlib import Path
 
-from config.my_frontend_setup import setup_frontend_env, PROJECT_ROOT, APP_JSON
+from config.my_frontend_setup import setup_frontend_env, PROJECT_ROOT, CONFIG
+from shared.telemetry import ResourceSampler
 
 _frontend_proc: subprocess.Popen | None = None
+_telemetry = ResourceSampler()  # CPU/RSS/fds/threads per child; see shared/telemetry.py
 _python_in_venv: Path | None = None
 _heartbeat_file: Path | None = None
 
@@ -42,6 +44,7 @@ def start_frontend() -> None:
             [str(_python_in_venv), str(frontend_script), str(_heartbeat_file)]
         )
     print(f"[ctl] Frontend PID: {_frontend_proc.pid}")
+    _telemetry.watch("frontend", _frontend_proc.pid)
 
 def stop_frontend_soft(timeout: float = 5.0) -> None:
     global _frontend_proc
@@ -101,6 +104,18 @@ def frontend_status() -> None:
             print(f"[status] Heartbeat unreadable: {e}")
     else:
         print("[status] No heartbeat file found.")
+    for line in _telemetry.status_lines("frontend"):
+        print(f"[status] {line}")
+
+def frontend_trend(arg: str = "") -> None:
+    try:
+        minutes = float(arg) if arg else None
+    except ValueError:
+        print(f"[ctl] Not a number of minutes: {arg}")
+        return
+    window = minutes * 60 if minutes else _telemetry.history * _telemetry.interval_sec
+    for line in _telemetry.trend_lines("frontend", window):
+        print(f"[status] {line}")
 
 def _print_help() -> None:
     print(
@@ -110,13 +125,14 @@ def _print_help() -> None:
         "  kill                    Hard kill (immediate)\n"
         "  restart                 Restart frontend\n"
         "  frontend-status | fs    Show frontend status/health\n"
+        "  trend [minutes]         Resource trends (CPU, RSS, fds, threads, ctx switches)\n"
         "  help                    Show this help\n"
         "  q | quit | exit         Exit controller (graceful stop)\n"
     )
 
 def _load_cfg_preview():
     try:
-        cfg = json.loads(Path(APP_JSON).read_text(encoding="utf-8"))
+        cfg = CONFIG.get()
         ft = cfg.get("first-time-setup")
         conf = cfg.get("configured")
         host = cfg.get("frontend", {}).get("host")
@@ -128,6 +144,9 @@ def _load_cfg_preview():
 def main():
     global _python_in_venv, _heartbeat_file
     _python_in_venv, cfg, _heartbeat_file = setup_frontend_env()
+    tcfg = cfg.get("telemetry", {})
+    _telemetry.interval_sec = float(tcfg.get("interval_sec", 2.0))
+    _telemetry.history = int(tcfg.get("history", 1800))
     _load_cfg_preview()
     start_frontend()
     _print_help()
@@ -148,6 +167,8 @@ def main():
                 restart_frontend()
             elif cmd in ("frontend-status", "fs"):
                 frontend_status()
+            elif cmd.partition(" ")[0] in ("trend", "t"):
+                frontend_trend(cmd.partition(" ")[2].strip())
             elif cmd in ("help", "?"):
                 _print_help()
             elif cmd == "":
@@ -158,6 +179,7 @@ def main():
         print("\n[ctl] Exiting controller ...")
     finally:
         stop_frontend_soft(timeout=3.0)
+        _telemetry.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
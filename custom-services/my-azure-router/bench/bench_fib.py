@@ -0,0 +1,102 @@
+# my-azure-labs-collection/custom-services/my-azure-router/bench/bench_fib.py
+"""IPv6 FIB lookups at Internet-like table sizes: binary search on lengths vs a linear scan.
+
+Usage (from the router folder): python bench/bench_fib.py [sizes] [lookups]
+  e.g. python bench/bench_fib.py 10000,100000,200000 200000
+Tables follow the rough shape of the IPv6 DFZ (mostly /48, /32, /44, /40, ...).
+"""
+from __future__ import annotations
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_ROOT / "router"))
+
+from fib import Fib, PrefixTable, Route  # noqa: E402
+
+# (prefix length, share of the table) — approximates the public IPv6 table: a few
+# dominant lengths plus a thin tail that still populates almost every length /16-/64.
+V6_LENGTHS = [(48, 0.50), (32, 0.12), (44, 0.08), (40, 0.06), (36, 0.04), (29, 0.04),
+              (46, 0.03), (47, 0.03), (56, 0.02), (64, 0.02), (28, 0.02), (42, 0.02), (30, 0.02)]
+V6_LENGTHS += [(n, 0.02 / 49) for n in range(16, 65)]
+
+def make_table(n: int, rng: random.Random):
+    lengths = rng.choices([l for l, _ in V6_LENGTHS], weights=[w for _, w in V6_LENGTHS], k=n)
+    out = {}
+    for length in lengths:
+        value = (0x2 << 125) | rng.getrandbits(125)  # inside 2000::/3
+        value = value >> (128 - length) << (128 - length)
+        out[(value, length)] = Route(f"{value:032x}/{length}", length, f"nh{len(out) % 16}")
+    return out
+
+def make_trace(table, k: int, rng: random.Random, miss_ratio: float = 0.1):
+    keys = list(table)
+    trace = []
+    for _ in range(k):
+        if rng.random() < miss_ratio:
+            trace.append(rng.getrandbits(128))
+        else:
+            value, length = rng.choice(keys)
+            trace.append(value | rng.getrandbits(128 - length))
+    return trace
+
+class LinearLengths:
+    """Baseline: one dict per length, probed longest-first over every populated length."""
+
+    def __init__(self, table):
+        self.by_len = {}
+        for (value, length), route in table.items():
+            self.by_len.setdefault(length, {})[value >> (128 - length)] = route
+        self.order = sorted(self.by_len, reverse=True)
+
+    def lookup(self, value: int):
+        for length in self.order:
+            r = self.by_len[length].get(value >> (128 - length))
+            if r is not None:
+                return r
+        return None
+
+def _ns_per_op(fn, trace) -> float:
+    start = time.perf_counter()
+    for v in trace:
+        fn(v)
+    return (time.perf_counter() - start) / len(trace) * 1e9
+
+def main() -> None:
+    sizes = [int(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000,200000").split(",")]
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    rng = random.Random(42)
+
+    for n in sizes:
+        table = make_table(n, rng)
+        t0 = time.perf_counter()
+        fib = PrefixTable(128)
+        for (value, length), route in table.items():
+            fib.insert(value, length, route)
+        build = time.perf_counter() - t0
+        trace = make_trace(table, lookups, rng)
+        linear = LinearLengths(table)
+
+        fib.lookup_batch(trace)  # warm marker caches: measure the steady state
+        single = _ns_per_op(fib.lookup, trace)
+        t0 = time.perf_counter()
+        fib.lookup_batch(trace)
+        batch = lookups / (time.perf_counter() - t0)
+        texts = [socket.inet_ntop(socket.AF_INET6, v.to_bytes(16, "big")) for v in trace]
+        dual = Fib()
+        dual.v6 = fib
+        t0 = time.perf_counter()
+        dual.lookup_batch(texts)
+        text_batch = lookups / (time.perf_counter() - t0)
+        base = _ns_per_op(linear.lookup, trace)
+
+        print(f"[bench] v6 {len(table):>7} prefixes ({len(linear.order)} lengths), build {build:5.2f}s")
+        print(f"[bench]   lookup          {single:8.0f} ns/op   (linear over lengths: {base:6.0f} ns/op)")
+        print(f"[bench]   batch (int)     {batch:10,.0f} lookups/s")
+        print(f"[bench]   batch (text)    {text_batch:10,.0f} lookups/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# my-azure-labs-collection/custom-services/my-azure-router/bench/bench_router.py
+"""Router benchmark suite: lookups, forwarding, RIB updates, memory and BGP convergence.
+
+Usage (from the router folder):
+  python bench/bench_router.py [--sizes 1000,10000,100000] [--out results.json]
+  python bench/bench_router.py --compare before.json after.json
+Tables and traces come from a seeded RNG, so two runs with the same
+--seed/--sizes measure identical work. Convergence runs against a stand-in
+BGP peer on localhost that streams real UPDATE messages followed by
+End-of-RIB. It covers the first full table and then a graceful restart that
+re-sends it with a few changes. The journal metrics write to a temporary
+directory with fsync on, so they depend on the disk as much as the CPU.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVICE_ROOT / "router"))
+sys.path.insert(0, str(SERVICE_ROOT / "bench"))
+sys.path.insert(0, str(SERVICE_ROOT.parent))  # shared/
+
+from bench_fib import _ns_per_op, make_table as make_v6_table, make_trace  # noqa: E402
+from bgp import GracefulRestart, end_of_rib, end_of_rib_family, negotiate  # noqa: E402
+from fib import Fib, PrefixTable, Route  # noqa: E402
+from flowcache import FlowCache  # noqa: E402
+from forward import Forwarder, Packet  # noqa: E402
+from journal import Journal, recover  # noqa: E402
+from policy import PolicyClassifier  # noqa: E402
+from rib import Rib  # noqa: E402
+
+FORMAT_VERSION = 1
+
+# Rough shape of the public IPv4 table: dominated by /24, then /22, /23, /20, /21 ...
+V4_LENGTHS = [(24, 0.60), (22, 0.12), (23, 0.09), (20, 0.05), (21, 0.05), (19, 0.03),
+              (16, 0.02), (18, 0.015), (17, 0.01), (13, 0.005), (14, 0.005), (15, 0.005)]
+
+def make_v4_table(n: int, rng: random.Random):
+    lengths = rng.choices([l for l, _ in V4_LENGTHS], weights=[w for _, w in V4_LENGTHS], k=n)
+    out = {}
+    for length in lengths:
+        value = rng.randrange(0x01000000, 0xE0000000)  # unicast space
+        value = value >> (32 - length) << (32 - length)
+        out[(value, length)] = Route(f"{socket.inet_ntoa(value.to_bytes(4, 'big'))}/{length}",
+                                     length, f"nh{len(out) % 16}")
+    return out
+
+def make_v4_trace(table, k: int, rng: random.Random, miss_ratio: float = 0.1):
+    keys = list(table)
+    trace = []
+    for _ in range(k):
+        if rng.random() < miss_ratio:
+            trace.append(rng.getrandbits(32))
+        else:
+            value, length = rng.choice(keys)
+            trace.append(value | rng.getrandbits(32 - length))
+    return trace
+
+def make_packets(trace, k: int, flows: int, rng: random.Random, width: int = 32):
+    """`k` packets over `flows` destinations from `trace`, Zipf-skewed like real traffic."""
+    af = socket.AF_INET if width == 32 else socket.AF_INET6
+    dsts = [socket.inet_ntop(af, v.to_bytes(width // 8, "big")) for v in trace[:flows]]
+    srcs = ["192.168.0.1", "192.168.0.2", "192.168.0.3"] if width == 32 else ["fd00::1", "fd00::2"]
+    picks = rng.choices(range(len(dsts)), weights=[1 / (i + 1) for i in range(len(dsts))], k=k)
+    return [Packet(srcs[i % len(srcs)], dsts[i], 6, 40000 + i % 1000, 443) for i in picks]
+
+def make_rules(n: int, rng: random.Random):
+    rules = []
+    for i in range(n):
+        length = rng.choice((8, 12, 16, 20, 24))
+        value = rng.getrandbits(32) >> (32 - length) << (32 - length)
+        rules.append({"name": f"r{i}", "dst": f"{socket.inet_ntoa(value.to_bytes(4, 'big'))}/{length}",
+                      "proto": "tcp", "dst_port": "443", "next_hop": "eth9"})
+    return rules
+
+# ---- timing helpers ----
+
+def _per_sec(n: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+def _forward_pps(fwd: Forwarder, packets, batch: int = 256) -> float:
+    chunks = [packets[i:i + batch] for i in range(0, len(packets), batch)]
+    fwd.forward_batch(chunks[0])  # warm-up
+    start = time.perf_counter()
+    for chunk in chunks:
+        fwd.forward_batch(chunk)
+    return len(packets) / (time.perf_counter() - start)
+
+def _table_bytes(table, width: int) -> float:
+    """Bytes allocated per route for routes + PrefixTable entries and markers."""
+    items = [(value, length, route.prefix, route.next_hop) for (value, length), route in table.items()]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    pt = PrefixTable(width)
+    for value, length, prefix, nh in items:
+        pt.insert(value, length, Route(prefix, length, nh))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(items)
+
+# ---- stand-in BGP peer ----
+
+def _bgp_message(msg_type: int, body: bytes) -> bytes:
+    return b"\xff" * 16 + struct.pack("!HB", 19 + len(body), msg_type) + body
+
+def _updates(routes, next_hop: str, max_size: int = 4096):
+    """Pack (value, length) IPv4 prefixes sharing `next_hop` into as few UPDATEs as fit."""
+    attrs = (struct.pack("!BBBB", 0x40, 1, 1, 0)                   # ORIGIN IGP
+             + struct.pack("!BBB", 0x40, 2, 0)                     # empty AS_PATH
+             + struct.pack("!BBB", 0x40, 3, 4) + socket.inet_aton(next_hop))
+    head = struct.pack("!H", 0) + struct.pack("!H", len(attrs)) + attrs
+    nlri = bytearray()
+    for value, length in routes:
+        item = bytes([length]) + value.to_bytes(4, "big")[:(length + 7) // 8]
+        if 19 + len(head) + len(nlri) + len(item) > max_size:
+            yield _bgp_message(2, head + bytes(nlri))
+            nlri.clear()
+        nlri += item
+    if nlri:
+        yield _bgp_message(2, head + bytes(nlri))
+
+def _parse_update(body: bytes):
+    """-> (next hop, [prefix text]) for an IPv4 UPDATE with NLRI (withdrawals are not used here)."""
+    (wlen,) = struct.unpack_from("!H", body)
+    (alen,) = struct.unpack_from("!H", body, 2 + wlen)
+    off, end = 4 + wlen, 4 + wlen + alen
+    next_hop = None
+    while off < end:
+        flags, code = body[off], body[off + 1]
+        if flags & 0x10:
+            (length,) = struct.unpack_from("!H", body, off + 2)
+            off += 4
+        else:
+            length = body[off + 2]
+            off += 3
+        if code == 3:
+            next_hop = socket.inet_ntoa(body[off:off + 4])
+        off += length
+    prefixes = []
+    while off < len(body):
+        length = body[off]
+        nbytes = (length + 7) // 8
+        addr = body[off + 1:off + 1 + nbytes] + b"\x00" * (4 - nbytes)
+        prefixes.append(f"{socket.inet_ntoa(addr)}/{length}")
+        off += 1 + nbytes
+    return next_hop, prefixes
+
+class StandInPeer:
+    """Serves one full table per accepted connection, then End-of-RIB, then waits to be closed."""
+
+    def __init__(self, tables):
+        self.tables = list(tables)  # one [(value, length, next_hop)] list per session
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self) -> None:
+        for table in self.tables:
+            conn, _ = self.sock.accept()
+            by_hop = {}
+            for value, length, nh in table:
+                by_hop.setdefault(nh, []).append((value, length))
+            with conn:
+                for nh, routes in by_hop.items():
+                    for msg in _updates(routes, nh):
+                        conn.sendall(msg)
+                conn.sendall(_bgp_message(2, end_of_rib(4)))
+                conn.recv(1)  # until the harness hangs up
+        self.sock.close()
+
+def _receive_table(rib: Rib, peer: str, port: int, gr) -> float:
+    """Connect, learn everything up to End-of-RIB; returns seconds from connect to converged FIB."""
+    start = time.perf_counter()
+    conn = socket.create_connection(("127.0.0.1", port))
+    rib.peer_up(peer, gr)
+    reader = conn.makefile("rb", buffering=1 << 16)
+    while True:
+        header = reader.read(19)
+        (length,) = struct.unpack_from("!H", header, 16)
+        body = reader.read(length - 19)
+        family = end_of_rib_family(body)
+        if family is not None:
+            rib.end_of_rib(peer, family)
+            break
+        next_hop, prefixes = _parse_update(body)
+        for prefix in prefixes:
+            rib.learn(peer, prefix, next_hop)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def bench_journal(prefixes, n: int, record) -> None:
+    """RIB updates with the journal attached (fsync'd group commits), then crash recovery from it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Journal(Path(tmp))
+        journal.open()
+        rib = Rib(Fib())
+        rib.journal = journal
+        rib.fib.subscribe(journal.on_fib_delta)
+        rib.peer_up("bench")
+
+        def churn():
+            for p in prefixes:
+                rib.learn("bench", p, "10.0.0.1")
+            for p in prefixes[::2]:
+                rib.withdraw("bench", p)
+            journal.wait(journal.lsn)  # count it only once it is on disk
+
+        start_lsn = journal.lsn
+        rate = _per_sec(len(prefixes) + len(prefixes[::2]), churn)
+        record("journal.rib_updates", n, rate, "updates/s")
+        record("journal.records", n, rate * (journal.lsn - start_lsn) / (len(prefixes) + len(prefixes[::2])),
+               "records/s")
+        journal.close()
+        journal = Journal(Path(tmp))
+        journal.open()
+        start = time.perf_counter()
+        _, replayed = recover(Rib(Fib()), journal)
+        record("journal.recover", n, replayed / (time.perf_counter() - start), "records/s")
+        journal.close()
+
+def bench_convergence(n: int, rng: random.Random, record) -> None:
+    table = [(value, length, f"10.255.{i % 4}.1") for i, (value, length) in enumerate(make_v4_table(n, rng))]
+    # Second session after a restart: 1% withdrawn implicitly, 1% moved to a new next hop.
+    again = []
+    for value, length, nh in table:
+        roll = rng.random()
+        if roll < 0.01:
+            continue
+        again.append((value, length, "10.255.9.1" if roll < 0.02 else nh))
+    peer = StandInPeer([table, again])
+    gr = negotiate(GracefulRestart(), GracefulRestart(restart_time=120, forwarding=frozenset({4})))
+    fib = Fib()
+    writes = []
+    fib.subscribe(writes.append)
+    rib = Rib(fib)
+    initial = _receive_table(rib, "standin", peer.port, gr)
+    record("convergence.initial", n, initial, "s")
+    record("convergence.initial_rate", n, len(table) / initial, "prefixes/s")
+    rib.peer_down("standin")
+    writes.clear()
+    restart = _receive_table(rib, "standin", peer.port, gr)
+    record("convergence.graceful_restart", n, restart, "s")
+    record("convergence.graceful_restart_fib_writes", n, len(writes), "writes")
+    peer.thread.join(timeout=5)
+
+# ---- suite ----
+
+def run(sizes, lookups: int, packets: int, converge: int, seed: int, repeat: int = 3):
+    results = []
+
+    def fastest(fn, lower_is_better: bool = False) -> float:
+        runs = [fn() for _ in range(repeat)]
+        return min(runs) if lower_is_better else max(runs)
+
+    def record(name: str, size: int, value: float, unit: str) -> None:
+        results.append({"name": name, "size": size, "value": round(value, 3), "unit": unit})
+        print(f"[bench] {name:<42} {size:>8}  {value:>14,.1f} {unit}")
+
+    for n in sizes:
+        rng = random.Random(seed + n)
+        v4, v6 = make_v4_table(n, rng), make_v6_table(n, rng)
+        for family, width, table, trace in (("v4", 32, v4, make_v4_trace(v4, lookups, rng)),
+                                            ("v6", 128, v6, make_trace(v6, lookups, rng))):
+            pt = PrefixTable(width)
+            build = _per_sec(len(table), lambda: [pt.insert(v, l, r) for (v, l), r in table.items()])
+            pt.lookup_batch(trace)  # warm marker caches: measure the steady state
+            record(f"fib.insert.{family}", n, build, "routes/s")
+            record(f"fib.lookup.{family}", n, fastest(lambda: _ns_per_op(pt.lookup, trace), True), "ns/op")
+            record(f"fib.lookup_batch.{family}", n,
+                   fastest(lambda: _per_sec(len(trace), lambda: pt.lookup_batch(trace))),
+                   "lookups/s")
+            record(f"fib.memory.{family}", n, _table_bytes(table, width), "bytes/route")
+
+            fib = Fib()
+            if width == 32:
+                fib.v4 = pt
+            else:
+                fib.v6 = pt
+            pkts = make_packets(trace, packets, min(len(trace), 10_000), rng, width)
+            record(f"forward.{family}", n, fastest(lambda: _forward_pps(Forwarder(fib), pkts)), "pps")
+            record(f"forward.{family}.flow_cache", n,
+                   fastest(lambda: _forward_pps(Forwarder(fib, cache=FlowCache(4096)), pkts)), "pps")
+            if width == 32:
+                policy = PolicyClassifier(make_rules(64, rng))
+                record(f"forward.{family}.policy64", n, fastest(lambda: _forward_pps(Forwarder(fib, policy), pkts)), "pps")
+
+        prefixes = [r.prefix for r in make_v4_table(n, rng).values()]
+        rib = Rib(Fib())
+        rib.peer_up("bench")
+        record("rib.learn", n, _per_sec(len(prefixes), lambda: [rib.learn("bench", p, "10.0.0.1") for p in prefixes]),
+               "updates/s")
+        record("rib.withdraw", n, _per_sec(len(prefixes), lambda: [rib.withdraw("bench", p) for p in prefixes]),
+               "updates/s")
+        bench_journal(prefixes, n, record)
+
+    if converge:
+        bench_convergence(converge, random.Random(seed), record)
+    return results
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+LOWER_IS_BETTER = {"ns/op", "s", "bytes/route", "writes"}
+
+def compare(before_path: str, after_path: str) -> None:
+    before = json.loads(Path(before_path).read_text(encoding="utf-8"))
+    after = json.loads(Path(after_path).read_text(encoding="utf-8"))
+    old = {(r["name"], r["size"]): r for r in before["results"]}
+    print(f"[bench] {before.get('commit')} -> {after.get('commit')}")
+    for r in after["results"]:
+        o = old.get((r["name"], r["size"]))
+        if o is None or not o["value"]:
+            continue
+        change = (r["value"] - o["value"]) / o["value"] * 100
+        better = change < 0 if r["unit"] in LOWER_IS_BETTER else change > 0
+        mark = "" if abs(change) < 5 else ("  better" if better else "  WORSE")
+        print(f"[bench] {r['name']:<42} {r['size']:>8}  {o['value']:>12,.1f} -> {r['value']:>12,.1f} "
+              f"{r['unit']:<12} {change:+6.1f}%{mark}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="My Azure Router benchmark suite")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="route table sizes (up to 1000000)")
+    ap.add_argument("--lookups", type=int, default=200_000)
+    ap.add_argument("--packets", type=int, default=200_000)
+    ap.add_argument("--converge", type=int, default=100_000, help="table size for the BGP run; 0 skips it")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per lookup/forwarding metric; best is kept")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = run(sizes, args.lookups, args.packets, args.converge, args.seed, args.repeat)
+    if args.out:
+        doc = {
+            "format": FORMAT_VERSION, "suite": "my-azure-router", "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "params": {"sizes": sizes, "lookups": args.lookups, "packets": args.packets,
+                       "converge": args.converge, "seed": args.seed, "repeat": args.repeat},
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        print(f"[bench] Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
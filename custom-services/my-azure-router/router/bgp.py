@@ -0,0 +1,133 @@
+# my-azure-router/router/bgp.py
+"""BGP graceful restart (RFC 4724): capability encoding, negotiation and End-of-RIB markers.
+
+Only the wire pieces the RIB needs live here. The Graceful Restart
+capability (code 64) carries a restart time and, for each AFI/SAFI, whether
+the sender kept its forwarding state across the restart (the F bit).
+End-of-RIB is an UPDATE with nothing in it. For IPv4 unicast it is fully
+empty. For other families it holds a single MP_UNREACH_NLRI attribute with no
+prefixes. Families are named 4 and 6, the same way `fib.parse_prefix` names
+them.
+"""
+from __future__ import annotations
+import struct
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+GR_CAPABILITY = 64
+MP_UNREACH_NLRI = 15
+AFI_SAFI = {4: (1, 1), 6: (2, 1)}  # family -> (AFI, SAFI), unicast only
+FAMILY = {v: k for k, v in AFI_SAFI.items()}
+FAMILIES = frozenset(AFI_SAFI)
+
+_R_BIT = 0x8      # restart flags: the sender has just restarted
+_N_BIT = 0x4      # RFC 8538: graceful restart also applies to NOTIFICATIONs
+_F_BIT = 0x80     # per-AFI flags: forwarding state was preserved
+_MAX_RESTART_TIME = 0xFFF
+
+@dataclass(frozen=True)
+class GracefulRestart:
+    """One side's Graceful Restart capability."""
+    restart_time: int = 120                   # seconds the peer should wait for us to come back
+    families: FrozenSet[int] = FAMILIES
+    forwarding: FrozenSet[int] = frozenset()  # families whose FIB survived the restart
+    restarting: bool = False
+    notification: bool = False
+
+@dataclass(frozen=True)
+class Negotiated:
+    """What the receiving side needs once both OPENs have been exchanged."""
+    restart_time: int          # the peer's: how long to keep its routes if it goes away
+    families: FrozenSet[int]   # advertised by both sides: retained across a restart
+    preserved: FrozenSet[int]  # of those, families the peer kept forwarding for (F bit)
+    peer_restarting: bool
+
+    def as_dict(self) -> dict:
+        """JSON-ready form, for the journal and RIB snapshots."""
+        return {"restart_time": self.restart_time, "families": sorted(self.families),
+                "preserved": sorted(self.preserved), "peer_restarting": self.peer_restarting}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Negotiated":
+        return cls(int(d["restart_time"]), frozenset(d["families"]), frozenset(d["preserved"]),
+                   bool(d["peer_restarting"]))
+
+def encode_capability(cap: GracefulRestart) -> bytes:
+    """Capability TLV (code, length, value) ready to go into an OPEN's capabilities."""
+    if not 0 <= cap.restart_time <= _MAX_RESTART_TIME:
+        raise ValueError(f"restart_time must be 0..{_MAX_RESTART_TIME} seconds")
+    flags = (_R_BIT if cap.restarting else 0) | (_N_BIT if cap.notification else 0)
+    value = struct.pack("!H", (flags << 12) | cap.restart_time)
+    for family in sorted(cap.families):
+        afi, safi = AFI_SAFI[family]
+        value += struct.pack("!HBB", afi, safi, _F_BIT if family in cap.forwarding else 0)
+    return struct.pack("!BB", GR_CAPABILITY, len(value)) + value
+
+def decode_capability(value: bytes) -> GracefulRestart:
+    """Capability value (without code/length) -> GracefulRestart; unknown AFI/SAFIs are ignored."""
+    if len(value) < 2 or (len(value) - 2) % 4:
+        raise ValueError(f"malformed graceful restart capability ({len(value)} bytes)")
+    (word,) = struct.unpack_from("!H", value)
+    families, forwarding = set(), set()
+    for off in range(2, len(value), 4):
+        afi, safi, flags = struct.unpack_from("!HBB", value, off)
+        family = FAMILY.get((afi, safi))
+        if family is None:
+            continue
+        families.add(family)
+        if flags & _F_BIT:
+            forwarding.add(family)
+    return GracefulRestart(
+        restart_time=word & _MAX_RESTART_TIME, families=frozenset(families),
+        forwarding=frozenset(forwarding), restarting=bool(word >> 12 & _R_BIT),
+        notification=bool(word >> 12 & _N_BIT),
+    )
+
+def negotiate(local: GracefulRestart, remote: Optional[GracefulRestart]) -> Optional[Negotiated]:
+    """Graceful restart is in effect for the families both sides advertise; None if there are none."""
+    if remote is None:
+        return None
+    families = local.families & remote.families
+    if not families:
+        return None
+    return Negotiated(restart_time=remote.restart_time, families=families,
+                      preserved=families & remote.forwarding, peer_restarting=remote.restarting)
+
+def end_of_rib(family: int) -> bytes:
+    """UPDATE message body signalling End-of-RIB for `family`."""
+    if family == 4:
+        return b"\x00\x00\x00\x00"
+    afi, safi = AFI_SAFI[family]
+    attr = struct.pack("!BBBHB", 0x80, MP_UNREACH_NLRI, 3, afi, safi)
+    return struct.pack("!H", 0) + struct.pack("!H", len(attr)) + attr
+
+def end_of_rib_family(body: bytes) -> Optional[int]:
+    """Family an UPDATE body marks as End-of-RIB, or None for an ordinary UPDATE."""
+    if body == b"\x00\x00\x00\x00":
+        return 4
+    if len(body) < 4 or body[:2] != b"\x00\x00":
+        return None
+    (attr_len,) = struct.unpack_from("!H", body, 2)
+    attrs = body[4:4 + attr_len]
+    if len(body) != 4 + attr_len or len(attrs) < 3 or attrs[1] != MP_UNREACH_NLRI:
+        return None
+    if attrs[0] & 0x10:  # extended length
+        (length,), head = struct.unpack_from("!H", attrs, 2), 4
+    else:
+        length, head = attrs[2], 3
+    if length != 3 or len(attrs) != head + 3:
+        return None
+    afi, safi = struct.unpack_from("!HB", attrs, head)
+    return FAMILY.get((afi, safi))
+
+def local_capability(section: dict) -> Optional[GracefulRestart]:
+    """`router.bgp.graceful_restart` config -> the capability to advertise, or None when disabled."""
+    if not section.get("enabled", False):
+        return None
+    cap = GracefulRestart(
+        restart_time=int(section.get("restart_time", 120)),
+        forwarding=FAMILIES if section.get("preserve_forwarding", True) else frozenset(),
+        notification=bool(section.get("notification", True)),
+    )
+    encode_capability(cap)  # validates the restart time range
+    return cap
@@ -0,0 +1,103 @@
+# my-azure-router/router/dataplane.py
+"""UDP front door to the forward path, for load tests and manual checks.
+
+The router has no packet I/O of its own yet, so this port stands in for it.
+Each datagram carries one packet per line, `src dst [proto [src_port [dst_port]]]`.
+The whole datagram is decided with one `forward_batch()` call. The reply has
+one line per packet, `action next_hop` (ECMP groups are resolved to the member
+the flow hashes to). Anything unparsable gets a single `error <reason>` line
+back.
+
+    printf '10.0.0.9 10.2.3.4 6 40000 443\\n' | nc -u -w1 127.0.0.1 5001
+"""
+from __future__ import annotations
+import socket
+import threading
+import time
+from typing import Optional
+
+from forward import Forwarder, Packet
+from shared.jsonlog import get_logger
+
+log = get_logger("router")
+
+MAX_DATAGRAM = 65535
+
+def parse_packets(data: bytes):
+    out = []
+    for line in data.decode("ascii").splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) < 2:
+            raise ValueError(f"need at least 'src dst': {line!r}")
+        nums = [int(f) for f in fields[2:5]]
+        out.append(Packet(fields[0], fields[1], *nums))
+    return out
+
+class DataplaneServer:
+    def __init__(self, fwd: Forwarder, host: str = "127.0.0.1", port: int = 5001,
+                 lock: Optional[threading.RLock] = None):
+        self.fwd = fwd
+        self.address = (host, port)
+        self.lock = lock  # the RIB lock: keeps lookups off tables mid-update
+        self.datagrams = 0
+        self.errors = 0
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.address[0] else socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(self.address)
+        sock.settimeout(0.5)  # wake up to notice stop()
+        self._sock = sock
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name="dataplane", daemon=True)
+        self._thread.start()
+        log.info(f"Data plane listening on udp/{self.address[0]}:{self.address[1]}")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    def handle(self, data: bytes) -> bytes:
+        try:
+            packets = parse_packets(data)
+            if self.lock is not None:
+                with self.lock:
+                    decisions = self.fwd.forward_batch(packets)
+            else:
+                decisions = self.fwd.forward_batch(packets)
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            self.errors += 1
+            return f"error {e}\n".encode()
+        return "".join(f"{d.action} {d.next_hop if d.next_hop is not None else '-'}\n"
+                       for d in decisions).encode()
+
+    def _serve(self) -> None:
+        sock = self._sock
+        while not self._stop.is_set():
+            try:
+                data, peer = sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.datagrams += 1
+            started = time.perf_counter()
+            reply = self.handle(data)
+            try:
+                sock.sendto(reply, peer)
+            except OSError:
+                pass  # the sender went away; nothing to tell it
+            # Sampled per config (logging.sample["dataplane.datagram"]); enqueue only, never disk I/O here.
+            log.event("dataplane.datagram", peer=f"{peer[0]}:{peer[1]}", bytes=len(data),
+                      error=reply.startswith(b"error"), duration_us=round((time.perf_counter() - started) * 1e6))
+
+    def stats(self) -> dict:
+        return {"datagrams": self.datagrams, "errors": self.errors}
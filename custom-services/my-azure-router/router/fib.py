@@ -0,0 +1,328 @@
+# my-azure-router/router/fib.py
+"""Dual-stack forwarding table (FIB).
+
+Each address family is a `PrefixTable`: one dict per prefix length keyed by the
+prefix's integer value, searched with binary search on prefix lengths
+(Waldvogel et al.). A lookup costs ceil(log2(L+1)) dict probes for L distinct
+prefix lengths (4 for a DFZ-shaped IPv6 table), however many routes are
+installed, and never touches `ipaddress` objects.
+"""
+from __future__ import annotations
+import ipaddress
+import socket
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+class Route(NamedTuple):
+    prefix: str
+    length: int
+    next_hop: Any
+
+class _Entry:
+    """A real prefix (`route` set), a marker for longer prefixes (`refs` > 0), or both."""
+    __slots__ = ("route", "bmp", "gen", "refs")
+
+    def __init__(self):
+        self.route: Optional[Route] = None
+        self.bmp: Optional[Route] = None  # best matching real prefix for a pure marker
+        self.gen = -1                     # table generation `bmp` was computed in
+        self.refs = 0                     # longer prefixes that need this marker
+
+def _search_path(levels: int, level: int) -> List[int]:
+    """Levels probed (and found) on the way to `level`: those need a marker."""
+    markers, lo, hi = [], 0, levels - 1
+    while lo <= hi:
+        mid = (lo + hi) >> 1
+        if mid == level:
+            break
+        if mid < level:
+            markers.append(mid)
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return markers
+
+class PrefixTable:
+    """Longest-prefix match over `width`-bit integer keys.
+
+    The binary search runs over the prefix lengths seen so far (`levels`), so a
+    table with the ~15 lengths of a real IPv6 table costs 4 probes, not 7. A
+    length that was never seen before rebuilds the markers once; lengths are
+    kept when their last prefix goes, so routine churn never triggers that.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self._levels: List[int] = []            # prefix lengths in the search tree, ascending
+        self._shifts: List[int] = []            # width - length, per level
+        self._tables: List[Dict[int, _Entry]] = []
+        self._paths: List[List[int]] = []
+        self._level_of: Dict[int, int] = {}
+        self._count = 0
+        self._default: Optional[Route] = None
+        self._gen = 0
+
+    def __len__(self) -> int:
+        return self._count + (self._default is not None)
+
+    def _add_level(self, length: int) -> None:
+        # Entries only keep their key at their own level: key << shift is the prefix value.
+        routes = [(key << self._shifts[i], e.route) for i, table in enumerate(self._tables)
+                  for key, e in table.items() if e.route is not None]
+        levels = sorted(self._levels + [length])
+        self._levels = levels
+        self._shifts = [self.width - n for n in levels]
+        self._tables = [dict() for _ in levels]
+        self._paths = [_search_path(len(levels), i) for i in range(len(levels))]
+        self._level_of = {n: i for i, n in enumerate(levels)}
+        self._count = 0
+        for value, route in routes:
+            self._place(value, route.length, route)
+
+    def insert(self, value: int, length: int, route: Route) -> None:
+        self._gen += 1  # cached marker bmps may now be shadowed by this prefix
+        if length == 0:
+            self._default = route
+            return
+        if length not in self._level_of:
+            self._add_level(length)
+        self._place(value, length, route)
+
+    def _place(self, value: int, length: int, route: Route) -> None:
+        level = self._level_of[length]
+        table = self._tables[level]
+        key = value >> self._shifts[level]
+        e = table.get(key)
+        if e is None:
+            e = table[key] = _Entry()
+        if e.route is not None:
+            e.route = route  # replace: markers are already in place
+            return
+        e.route = route
+        self._count += 1
+        for m in self._paths[level]:
+            mt = self._tables[m]
+            mk = value >> self._shifts[m]
+            me = mt.get(mk)
+            if me is None:
+                me = mt[mk] = _Entry()
+            me.refs += 1
+
+    def remove(self, value: int, length: int) -> Optional[Route]:
+        if length == 0:
+            old, self._default = self._default, None
+            self._gen += 1
+            return old
+        level = self._level_of.get(length)
+        if level is None:
+            return None
+        table = self._tables[level]
+        key = value >> self._shifts[level]
+        e = table.get(key)
+        if e is None or e.route is None:
+            return None
+        old, e.route = e.route, None
+        self._gen += 1
+        self._count -= 1
+        if e.refs == 0:
+            del table[key]
+        for m in self._paths[level]:
+            mt = self._tables[m]
+            mk = value >> self._shifts[m]
+            me = mt[mk]
+            me.refs -= 1
+            if me.refs == 0 and me.route is None:
+                del mt[mk]
+        return old
+
+    def get(self, value: int, length: int) -> Optional[Route]:
+        """The route installed for exactly value/length, if any."""
+        if length == 0:
+            return self._default
+        level = self._level_of.get(length)
+        if level is None:
+            return None
+        e = self._tables[level].get(value >> self._shifts[level])
+        return e.route if e is not None else None
+
+    def covering(self, value: int, length: int) -> Optional[Route]:
+        """Longest route strictly shorter than `length` that covers value/length."""
+        if length == 0:
+            return None
+        tables, shifts, levels = self._tables, self._shifts, self._levels
+        for i in range(len(levels) - 1, -1, -1):
+            if levels[i] < length:
+                e = tables[i].get(value >> shifts[i])
+                if e is not None and e.route is not None:
+                    return e.route
+        return self._default
+
+    def _marker_bmp(self, e: _Entry, level: int, value: int) -> Optional[Route]:
+        # Recomputed lazily, once per marker per table change, on the first lookup through it.
+        tables, shifts = self._tables, self._shifts
+        best = self._default
+        for i in range(level - 1, -1, -1):
+            r = tables[i].get(value >> shifts[i])
+            if r is not None and r.route is not None:
+                best = r.route
+                break
+        e.bmp, e.gen = best, self._gen
+        return best
+
+    def lookup(self, value: int) -> Optional[Route]:
+        tables, shifts, gen = self._tables, self._shifts, self._gen
+        best = self._default
+        lo, hi = 0, len(tables) - 1
+        while lo <= hi:
+            mid = (lo + hi) >> 1
+            e = tables[mid].get(value >> shifts[mid])
+            if e is None:
+                hi = mid - 1
+                continue
+            r = e.route
+            if r is None:
+                r = e.bmp if e.gen == gen else self._marker_bmp(e, mid, value)
+            if r is not None:
+                best = r
+            lo = mid + 1
+        return best
+
+    def lookup_batch(self, values: Iterable[int]) -> List[Optional[Route]]:
+        """Look up many keys; repeated keys in the batch are resolved once."""
+        lookup = self.lookup
+        seen: Dict[int, Optional[Route]] = {}
+        out = []
+        append = out.append
+        for v in values:
+            r = seen.get(v, seen)
+            if r is seen:
+                r = seen[v] = lookup(v)
+            append(r)
+        return out
+
+    def routes(self) -> Iterator[Route]:
+        if self._default is not None:
+            yield self._default
+        for table in self._tables:
+            for e in table.values():
+                if e.route is not None:
+                    yield e.route
+
+def parse_address(address: str) -> Tuple[int, int]:
+    """'10.0.0.1' -> (value, 4); '2001:db8::1' -> (value, 6). Faster than ipaddress."""
+    if ":" in address:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, address), "big"), 6
+    return int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big"), 4
+
+def parse_prefix(prefix: str) -> Tuple[int, int, int, str]:
+    """-> (value, length, version, canonical text). Host bits are masked off."""
+    net = ipaddress.ip_network(prefix.strip(), strict=False)
+    return int(net.network_address), net.prefixlen, net.version, str(net)
+
+class FibDelta(NamedTuple):
+    """One FIB change: `old` -> `new` at value/length (either may be None).
+
+    `covering` is set for a brand-new prefix: the shorter route that addresses
+    under it resolved to until now, i.e. the only route whose users can move.
+    """
+    version: int
+    value: int
+    length: int
+    old: Optional[Route]
+    new: Optional[Route]
+    covering: Optional[Route] = None
+
+class Fib:
+    """IPv4 + IPv6 FIB mapping prefixes to next hops (interface names or addresses)."""
+
+    def __init__(self):
+        self.v4 = PrefixTable(32)
+        self.v6 = PrefixTable(128)
+        self._listeners: List[Callable[[FibDelta], None]] = []
+
+    def subscribe(self, fn: Callable[[FibDelta], None]) -> None:
+        """Call `fn(delta)` after every add/replace/remove (e.g. to invalidate caches)."""
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn: Callable[[FibDelta], None]) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, delta: FibDelta) -> None:
+        for fn in list(self._listeners):
+            fn(delta)
+
+    def _table(self, version: int) -> PrefixTable:
+        return self.v6 if version == 6 else self.v4
+
+    def __len__(self) -> int:
+        return len(self.v4) + len(self.v6)
+
+    def counts(self) -> Dict[str, int]:
+        return {"v4": len(self.v4), "v6": len(self.v6)}
+
+    def add(self, prefix: str, next_hop: Any) -> Route:
+        value, length, version, text = parse_prefix(prefix)
+        route = Route(text, length, next_hop)
+        table = self._table(version)
+        if not self._listeners:
+            table.insert(value, length, route)
+            return route
+        old = table.get(value, length)
+        covering = table.covering(value, length) if old is None else None
+        table.insert(value, length, route)
+        self._notify(FibDelta(version, value, length, old, route, covering))
+        return route
+
+    def remove(self, prefix: str) -> Optional[Route]:
+        value, length, version, _ = parse_prefix(prefix)
+        old = self._table(version).remove(value, length)
+        if old is not None and self._listeners:
+            self._notify(FibDelta(version, value, length, old, None))
+        return old
+
+    def get(self, prefix: str) -> Optional[Route]:
+        """The route installed for exactly `prefix` (no longest-prefix match)."""
+        value, length, version, _ = parse_prefix(prefix)
+        return self._table(version).get(value, length)
+
+    def lookup(self, address: str) -> Optional[Route]:
+        value, version = parse_address(address)
+        return self._table(version).lookup(value)
+
+    def lookup_batch(self, addresses: Iterable[str]) -> List[Optional[Route]]:
+        """Resolve a batch of textual addresses (mixed families allowed), in order."""
+        v4, v6 = self.v4.lookup, self.v6.lookup
+        pton, AF4, AF6 = socket.inet_pton, socket.AF_INET, socket.AF_INET6
+        seen: Dict[str, Optional[Route]] = {}
+        out = []
+        append = out.append
+        for a in addresses:
+            r = seen.get(a, seen)
+            if r is seen:
+                if ":" in a:
+                    r = v6(int.from_bytes(pton(AF6, a), "big"))
+                else:
+                    r = v4(int.from_bytes(pton(AF4, a), "big"))
+                seen[a] = r
+            append(r)
+        return out
+
+    def routes(self) -> Iterator[Route]:
+        yield from self.v4.routes()
+        yield from self.v6.routes()
+
+    def sync(self, table: Dict[str, Any]) -> Tuple[int, int]:
+        """Make the FIB equal to `table` ({prefix: next_hop}); returns (changed, removed)."""
+        wanted: Dict[str, Any] = {}
+        for prefix, next_hop in table.items():
+            wanted[parse_prefix(prefix)[3]] = next_hop
+        current = {r.prefix: r.next_hop for r in self.routes()}
+        changed = removed = 0
+        for prefix in current.keys() - wanted.keys():
+            self.remove(prefix)
+            removed += 1
+        for prefix, next_hop in wanted.items():
+            if current.get(prefix, current) != next_hop:
+                self.add(prefix, next_hop)
+                changed += 1
+        return changed, removed
@@ -0,0 +1,123 @@
+# my-azure-router/router/flowcache.py
+"""Exact-match destination cache in front of the FIB.
+
+A fixed number of slots is preallocated as parallel arrays (key, route,
+reference bit) and recycled with the CLOCK algorithm, so the cache never
+grows and never allocates per entry. The key -> slot directory is the
+built-in dict (itself an open-addressed hash table, probed in C): a probe
+loop written in Python would cost more than the FIB lookup it is meant to
+skip.
+
+Invalidation is precise. For every FIB delta only the entries that can
+resolve differently are dropped: users of the removed/replaced route, or,
+for a new prefix, users of the route it now shadows whose address falls
+inside it. Misses (no route) are never cached.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Set
+
+from fib import FibDelta, Route
+
+V6_TAG = 1 << 128  # keeps IPv6 keys apart from IPv4 keys in one directory
+
+def cache_key(version: int, value: int) -> int:
+    return value | V6_TAG if version == 6 else value
+
+class FlowCache:
+    def __init__(self, capacity: int = 4096):
+        if capacity < 1:
+            raise ValueError("flow cache capacity must be >= 1")
+        self.capacity = capacity
+        self._keys: List[Optional[int]] = [None] * capacity
+        self._routes: List[Optional[Route]] = [None] * capacity
+        self._ref = bytearray(capacity)
+        self._slot: Dict[int, int] = {}
+        self._users: Dict[str, Set[int]] = {}  # route prefix -> slots resolved to it
+        self._free = list(range(capacity - 1, -1, -1))
+        self._hand = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def get(self, key: int) -> Optional[Route]:
+        slot = self._slot.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._ref[slot] = 1
+        return self._routes[slot]
+
+    def put(self, key: int, route: Route) -> None:
+        slot = self._slot.get(key)
+        if slot is not None:
+            self._unlink(slot)
+        elif self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._evict()
+        self._keys[slot] = key
+        self._routes[slot] = route
+        self._ref[slot] = 0  # a second hit before the hand comes round earns a reprieve
+        self._slot[key] = slot
+        self._users.setdefault(route.prefix, set()).add(slot)
+
+    def _evict(self) -> int:
+        ref, cap = self._ref, self.capacity
+        hand = self._hand
+        while ref[hand]:
+            ref[hand] = 0
+            hand = (hand + 1) % cap
+        self._hand = (hand + 1) % cap
+        self._unlink(hand)
+        del self._slot[self._keys[hand]]
+        self.evictions += 1
+        return hand
+
+    def _unlink(self, slot: int) -> None:
+        users = self._users.get(self._routes[slot].prefix)
+        if users is not None:
+            users.discard(slot)
+            if not users:
+                del self._users[self._routes[slot].prefix]
+
+    def _drop(self, slot: int) -> None:
+        self._unlink(slot)
+        del self._slot[self._keys[slot]]
+        self._keys[slot] = None
+        self._routes[slot] = None
+        self._ref[slot] = 0
+        self._free.append(slot)
+        self.invalidations += 1
+
+    def on_fib_delta(self, d: FibDelta) -> None:
+        if d.old is not None:
+            # Replaced or withdrawn: everything that resolved to it must look up again.
+            for slot in list(self._users.get(d.old.prefix, ())):
+                self._drop(slot)
+        elif d.covering is not None:
+            # New, more specific prefix: only covering-route users inside it move.
+            width = 128 if d.version == 6 else 32
+            shift = width - d.length
+            want = d.value >> shift
+            mask = V6_TAG - 1
+            for slot in list(self._users.get(d.covering.prefix, ())):
+                if (self._keys[slot] & mask) >> shift == want:
+                    self._drop(slot)
+
+    def clear(self) -> None:
+        for slot in list(self._slot.values()):
+            self._drop(slot)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._slot), "capacity": self.capacity,
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions, "invalidations": self.invalidations,
+        }
@@ -0,0 +1,105 @@
+# my-azure-router/router/forward.py
+"""Forward path: FIB lookup, ECMP member choice, then policy routing, for single packets or batches."""
+from __future__ import annotations
+import socket
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from fib import Fib, Route
+from flowcache import V6_TAG, FlowCache
+from policy import PolicyClassifier
+
+class Packet(NamedTuple):
+    src: str
+    dst: str
+    proto: int = 6
+    src_port: int = 0
+    dst_port: int = 0
+    size: int = 64
+
+class Decision(NamedTuple):
+    action: str                  # forward | drop | no_route
+    next_hop: Any = None
+    route: Optional[Route] = None
+    rule: Optional[str] = None   # policy rule that decided, if any
+
+NO_ROUTE = Decision("no_route")
+
+class Forwarder:
+    """Owns the forwarding decision; FIB, policy and flow cache can be swapped independently."""
+
+    def __init__(self, fib: Fib, policy: Optional[PolicyClassifier] = None,
+                 cache: Optional[FlowCache] = None):
+        self.fib = fib
+        self.policy = policy
+        self.cache: Optional[FlowCache] = None
+        self.stats: Dict[str, int] = {"forwarded": 0, "dropped": 0, "no_route": 0}
+        self.set_cache(cache)
+
+    def set_policy(self, policy: Optional[PolicyClassifier]) -> None:
+        self.policy = policy
+
+    def set_cache(self, cache: Optional[FlowCache]) -> None:
+        if self.cache is not None:
+            self.fib.unsubscribe(self.cache.on_fib_delta)
+        self.cache = cache
+        if cache is not None:
+            self.fib.subscribe(cache.on_fib_delta)
+
+    def _decide(self, route: Optional[Route], next_hop: Any, rule) -> Decision:
+        if rule is not None:
+            if rule.action == "drop":
+                return Decision("drop", None, route, rule.name)
+            return Decision("forward", rule.next_hop, route, rule.name)
+        if route is None:
+            return NO_ROUTE
+        return Decision("forward", next_hop, route)
+
+    def forward(self, pkt: Packet) -> Decision:
+        return self.forward_batch((pkt,))[0]
+
+    def forward_batch(self, packets: Iterable[Packet]) -> List[Decision]:
+        """Decide a whole batch: address parsing, FIB lookups and classification run in tight loops."""
+        pton, AF4, AF6 = socket.inet_pton, socket.AF_INET, socket.AF_INET6
+        from_bytes = int.from_bytes
+        v4, v6 = self.fib.v4.lookup, self.fib.v6.lookup
+        policy, cache = self.policy, self.cache
+        cache_get = cache.get if cache is not None else None
+        routes: Dict[int, Optional[Route]] = {}
+        keys = []
+        found = []
+        hops = []
+        for p in packets:
+            if ":" in p.dst:
+                version, af, lookup = 6, AF6, v6
+                dst = from_bytes(pton(af, p.dst), "big")
+                key = dst | V6_TAG
+            else:
+                version, af, lookup = 4, AF4, v4
+                dst = key = from_bytes(pton(af, p.dst), "big")
+            route = routes.get(key, routes)
+            if route is routes:
+                route = cache_get(key) if cache_get is not None else None
+                if route is None:
+                    route = lookup(dst)
+                    if route is not None and cache is not None:
+                        cache.put(key, route)
+                routes[key] = route
+            found.append(route)
+            nh = route.next_hop if route is not None else None
+            src = None
+            if type(nh) is tuple:
+                # ECMP group: a 5-tuple hash keeps every flow on one member.
+                src = from_bytes(pton(af, p.src), "big") if p.src else 0
+                nh = nh[hash((src, dst, p.proto, p.src_port, p.dst_port)) % len(nh)]
+            hops.append(nh)
+            if policy is not None:
+                if src is None:
+                    src = from_bytes(pton(af, p.src), "big") if p.src else 0
+                keys.append((version, src, dst, p.proto, p.dst_port, nh))
+        rules = policy.classify_batch(keys) if policy is not None else [None] * len(found)
+        decide = self._decide
+        out = [decide(route, nh, rule) for route, nh, rule in zip(found, hops, rules)]
+        stats = self.stats
+        for d in out:
+            stats["forwarded" if d.action == "forward" else "dropped" if d.action == "drop" else "no_route"] += 1
+        return out
@@ -0,0 +1,447 @@
+# my-azure-router/router/journal.py
+"""Append-only journal of RIB/FIB mutations and peer events, with crash recovery.
+
+Every RIB input (static table, next-hop reachability, peer up/down, learn,
+withdraw, End-of-RIB, timer expiry) and every resulting FIB change becomes one
+record with a log sequence number (LSN). Records go into segment files
+`journal-<first lsn>.seg` that roll over at `segment_bytes`. Records are
+written by one committer thread. Whatever piled up while the previous fsync
+ran goes out with one write() and one fsync (group commit). Appending only
+encodes the record and queues it, so the RIB never waits on the disk unless
+more than `max_pending_bytes` is already queued.
+
+On disk a record is `<len u32><crc32 u32><lsn u64><ts f64><type u8>` followed
+by `len` bytes of compact JSON, little-endian. The CRC covers everything after
+itself. A torn record at the end of the last segment (a crash mid-write) fails
+its length or CRC check and is cut off when the journal is reopened. New
+segments are written under a `.tmp` name and renamed into place once their
+header is on disk; a last segment whose header is still short or invalid (a
+crash mid-rollover) holds no records and is recreated on open.
+
+Recovery loads the newest snapshot (`snapshot-<lsn>.json`: the RIB's state as
+of that LSN), then replays later RIB records through the same `Rib` methods
+that produced them. FIB records are not replayed: the FIB is rebuilt from the
+RIB. `checkpoint()` writes a snapshot once the journal is durable up to it,
+then deletes segments that hold only older records (keeping the last
+`keep_segments` for slow tailers).
+
+`JournalReader` tails the segments from any LSN, following rollovers. That
+makes the journal a local stand-in for an event stream: run
+
+    python router/journal.py tail --follow
+
+to print each record as a JSON line.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from bgp import Negotiated
+
+STATIC, REACHABLE, PEER_UP, PEER_DOWN, LEARN, WITHDRAW, END_OF_RIB, EXPIRE = range(1, 9)
+FIB = 16
+TYPE_NAMES = {STATIC: "static", REACHABLE: "reachable", PEER_UP: "peer_up", PEER_DOWN: "peer_down",
+              LEARN: "learn", WITHDRAW: "withdraw", END_OF_RIB: "end_of_rib", EXPIRE: "expire", FIB: "fib"}
+
+MAGIC = b"RJNL"
+VERSION = 1
+_SEGMENT = struct.Struct("<4sHHQ")  # magic, version, reserved, first lsn
+_HEAD = struct.Struct("<II")        # payload length, crc32 of body + payload
+_BODY = struct.Struct("<QdB")       # lsn, ts, type
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+class Record(NamedTuple):
+    lsn: int
+    ts: float
+    type: int
+    data: Any
+
+    def as_dict(self) -> dict:
+        return {"lsn": self.lsn, "ts": self.ts, "type": TYPE_NAMES.get(self.type, self.type), "data": self.data}
+
+def _segment_name(first_lsn: int) -> str:
+    return f"journal-{first_lsn:016x}.seg"
+
+def _snapshot_name(lsn: int) -> str:
+    return f"snapshot-{lsn:016x}.json"
+
+def _listed(directory: Path, prefix: str, suffix: str) -> List[Tuple[int, Path]]:
+    out = []
+    for p in directory.glob(f"{prefix}-*{suffix}"):
+        try:
+            out.append((int(p.name[len(prefix) + 1:-len(suffix)], 16), p))
+        except ValueError:
+            continue  # e.g. a leftover .tmp
+    return sorted(out)
+
+def segments(directory: Path) -> List[Tuple[int, Path]]:
+    """(first lsn, path) of every segment, oldest first."""
+    return _listed(directory, "journal", ".seg")
+
+def _scan(buf, pos: int) -> Iterator[Tuple[int, Record]]:
+    """Yield (end offset, record) for each intact record from `pos`; stop at the first torn one."""
+    n = len(buf)
+    head, body_size = _HEAD.size, _BODY.size
+    while pos + head + body_size <= n:
+        length, crc = _HEAD.unpack_from(buf, pos)
+        end = pos + head + body_size + length
+        if end > n or zlib.crc32(buf[pos + head:end]) != crc:
+            return
+        lsn, ts, rtype = _BODY.unpack_from(buf, pos + head)
+        yield end, Record(lsn, ts, rtype, json.loads(bytes(buf[pos + head + body_size:end])))
+        pos = end
+
+def _read_segment(path: Path) -> Tuple[int, bytes]:
+    """(first lsn, bytes after the header); raises ValueError if the header is not ours."""
+    data = path.read_bytes()
+    if len(data) < _SEGMENT.size:
+        raise ValueError(f"{path.name}: truncated segment header")
+    magic, version, _, first = _SEGMENT.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path.name}: not a version {VERSION} journal segment")
+    return first, data[_SEGMENT.size:]
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name == "nt":
+        return  # directory handles can't be fsynced on Windows; NTFS journals the rename
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class Journal:
+    def __init__(self, directory: Path, segment_bytes: int = 64 * 1024 * 1024, fsync: bool = True,
+                 max_pending_bytes: int = 16 * 1024 * 1024, keep_segments: int = 4):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.max_pending_bytes = max_pending_bytes
+        self.keep_segments = keep_segments
+        self.lsn = 0              # last LSN handed out
+        self.durable_lsn = 0      # last LSN written (and fsynced, if enabled)
+        self.snapshot_lsn = 0
+        self.appends = 0
+        self.commits = 0
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._file = None
+        self._size = 0
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- lifecycle ----
+
+    def open(self) -> None:
+        """Find the end of the journal, cut off a torn tail, and start the committer."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snaps = _listed(self.directory, "snapshot", ".json")
+        self.snapshot_lsn = snaps[-1][0] if snaps else 0
+        for tmp in self.directory.glob("journal-*.tmp"):
+            tmp.unlink(missing_ok=True)  # a rollover that never got renamed into place
+        segs = segments(self.directory)
+        last = self.snapshot_lsn
+        if segs:
+            first, path = segs[-1]
+            try:
+                first, data = _read_segment(path)
+            except ValueError:
+                # Torn rollover: records are only written after the header, so there are none to keep.
+                self._roll(first)
+                data = b""
+            end, last = 0, max(last, first - 1)
+            for end, rec in _scan(data, 0):
+                last = max(last, rec.lsn)
+            if end < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(_SEGMENT.size + end)
+            if self._file is None:
+                self._file = open(path, "ab")
+                self._size = _SEGMENT.size + end
+        self.lsn = self.durable_lsn = last
+        self._thread = threading.Thread(target=self._run, name="journal-commit", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ---- writing ----
+
+    def append(self, rtype: int, data: Any) -> int:
+        """Queue one record and return its LSN. Durable once `wait(lsn)` returns True."""
+        payload = _dumps(data).encode("utf-8")
+        ts = time.time()
+        with self._cond:
+            if self._error is not None:
+                raise OSError(f"journal commit failed: {self._error}")
+            while self._pending_bytes >= self.max_pending_bytes and not self._closing:
+                self._cond.wait()  # the disk can't keep up; this is the only place appends wait
+            self.lsn += 1
+            body = _BODY.pack(self.lsn, ts, rtype)
+            self._pending.append(_HEAD.pack(len(payload), zlib.crc32(payload, zlib.crc32(body))) + body + payload)
+            self._pending_bytes += _HEAD.size + len(body) + len(payload)
+            self.appends += 1
+            if len(self._pending) == 1:
+                self._cond.notify_all()
+            return self.lsn
+
+    def on_fib_delta(self, delta) -> None:
+        """Fib.subscribe() hook: one FIB record per install/replace/withdraw."""
+        route = delta.new or delta.old
+        hop = delta.new.next_hop if delta.new is not None else None
+        self.append(FIB, [route.prefix, list(hop) if isinstance(hop, tuple) else hop])
+
+    def wait(self, lsn: int, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.durable_lsn >= lsn or self._error is not None, timeout) \
+                and self._error is None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+                last = self.lsn
+                self._cond.notify_all()  # unblock appends waiting on max_pending_bytes
+            try:
+                self._write(last - len(batch) + 1, b"".join(batch))
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self.durable_lsn = last
+                self.commits += 1
+                self._cond.notify_all()
+
+    def _write(self, first_lsn: int, chunk: bytes) -> None:
+        if self._file is None or self._size >= self.segment_bytes:
+            self._roll(first_lsn)
+        self._file.write(chunk)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._size += len(chunk)
+
+    def _roll(self, first_lsn: int) -> None:
+        """Start segment `first_lsn`; it only appears under its .seg name with a complete header."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        path = self.directory / _segment_name(first_lsn)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_SEGMENT.pack(MAGIC, VERSION, 0, first_lsn))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(self.directory)
+        self._file = open(path, "ab")
+        self._size = _SEGMENT.size
+
+    # ---- snapshots and recovery ----
+
+    def records(self, after_lsn: int = 0) -> Iterator[Record]:
+        """Every intact record with an LSN above `after_lsn`, oldest first."""
+        segs = segments(self.directory)
+        for i, (first, path) in enumerate(segs):
+            if i + 1 < len(segs) and segs[i + 1][0] <= after_lsn + 1:
+                continue  # wholly before the range asked for
+            try:
+                _, data = _read_segment(path)
+            except ValueError:
+                if i + 1 < len(segs):
+                    raise
+                break  # torn rollover at the tail: no records in it
+            for _, rec in _scan(data, 0):
+                if rec.lsn > after_lsn:
+                    yield rec
+
+    def load_snapshot(self) -> Tuple[int, Optional[dict]]:
+        for lsn, path in reversed(_listed(self.directory, "snapshot", ".json")):
+            try:
+                doc = json.loads(path.read_text(encoding="utf-8"))
+                return int(doc["lsn"]), doc["rib"]
+            except (OSError, ValueError, KeyError):
+                continue  # fall back to the one before
+        return 0, None
+
+    def checkpoint(self, rib, timeout: float = 10.0) -> Optional[int]:
+        """Snapshot `rib` at the current LSN and prune what it makes redundant. None if the
+        journal could not be made durable up to that LSN in time."""
+        with rib.lock:  # every append happens under this lock, so LSN and state agree
+            lsn, state = self.lsn, rib.snapshot()
+        if lsn <= self.snapshot_lsn:
+            return lsn
+        # Never let a snapshot get ahead of the journal: recovery would skip LSNs that were never written.
+        if not self.wait(lsn, timeout):
+            return None
+        path = self.directory / _snapshot_name(lsn)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "lsn": lsn, "ts": time.time(), "rib": state}, f, separators=(",", ":"))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(self.directory)
+        self.snapshot_lsn = lsn
+        self._prune(lsn)
+        return lsn
+
+    def _prune(self, snapshot_lsn: int) -> None:
+        for old, path in _listed(self.directory, "snapshot", ".json")[:-2]:
+            path.unlink(missing_ok=True)
+        segs = segments(self.directory)
+        for i, (first, path) in enumerate(segs[:max(len(segs) - self.keep_segments, 0)]):
+            if segs[i + 1][0] <= snapshot_lsn + 1:
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {"lsn": self.lsn, "durable_lsn": self.durable_lsn, "snapshot_lsn": self.snapshot_lsn,
+                "commits": self.commits, "segments": len(segments(self.directory))}
+
+def replay(rib, records) -> int:
+    """Re-apply journaled RIB inputs to `rib` (whose journal must be detached). Returns the count."""
+    n = 0
+    for rec in records:
+        t, d = rec.type, rec.data
+        if t == LEARN:
+            rib.learn(d[0], d[1], d[2])
+        elif t == WITHDRAW:
+            rib.withdraw(d[0], d[1])
+        elif t == REACHABLE:
+            rib.set_reachable(d[0], d[1])
+        elif t == PEER_UP:
+            rib.peer_up(d[0], Negotiated.from_dict(d[1]) if d[1] else None, d[2])
+        elif t == PEER_DOWN:
+            rib.peer_down(d[0], d[1])
+        elif t == END_OF_RIB:
+            rib.end_of_rib(d[0], d[1])
+        elif t == EXPIRE:
+            rib.expire(d)
+        elif t == STATIC:
+            rib.set_static(d)
+        else:
+            continue  # FIB records describe effects, not inputs
+        n += 1
+    return n
+
+def recover(rib, journal: Journal) -> Tuple[int, int]:
+    """Rebuild `rib` (and its FIB) from the newest snapshot plus the journal after it.
+    Returns (snapshot lsn, records replayed). Call before attaching the journal to the RIB."""
+    snap_lsn, state = journal.load_snapshot()
+    if state is not None:
+        rib.restore(state)
+    return snap_lsn, replay(rib, journal.records(snap_lsn))
+
+class JournalReader:
+    """Follows the journal from an LSN, across segment rollovers, without ever writing to it."""
+
+    def __init__(self, directory: Path, after_lsn: int = 0):
+        self.directory = Path(directory)
+        self.next_lsn = after_lsn + 1
+        self.skipped = 0          # LSNs pruned before this reader got to them
+        self._first = 0           # first LSN of the segment being read
+        self._path: Optional[Path] = None
+        self._offset = 0
+
+    def _open(self, first: int, path: Path) -> None:
+        if first > self.next_lsn:
+            self.skipped += first - self.next_lsn
+            self.next_lsn = first
+        self._first, self._path, self._offset = first, path, _SEGMENT.size
+
+    def _seek(self) -> bool:
+        segs = segments(self.directory)
+        if not segs:
+            return False
+        older = [s for s in segs if s[0] <= self.next_lsn]
+        self._open(*(older[-1] if older else segs[0]))
+        return True
+
+    def poll(self, limit: int = 10000) -> List[Record]:
+        """Records appended since the last call (at most `limit`); [] when caught up."""
+        if self._path is None and not self._seek():
+            return []
+        out: List[Record] = []
+        while len(out) < limit:
+            try:
+                with open(self._path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:  # pruned under us
+                if not self._seek():
+                    break
+                continue
+            got, end = len(out), 0
+            for end, rec in _scan(data, 0):
+                if rec.lsn >= self.next_lsn:
+                    out.append(rec)
+                    self.next_lsn = rec.lsn + 1
+                    if len(out) >= limit:
+                        break
+            self._offset += end
+            if len(out) > got:
+                continue
+            # Nothing more here. Once the writer has rolled over, this segment is finished.
+            newer = [s for s in segments(self.directory) if s[0] > self._first]
+            if not newer:
+                break
+            self._open(*newer[0])
+        return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Print router journal records as JSON lines.")
+    ap.add_argument("command", choices=["tail", "stats"])
+    ap.add_argument("--dir", type=Path, default=Path(__file__).resolve().parents[1] / ".data" / "journal")
+    ap.add_argument("--from", dest="from_lsn", type=int, default=0, help="start after this LSN")
+    ap.add_argument("--follow", action="store_true", help="keep waiting for new records")
+    ap.add_argument("--interval", type=float, default=0.2)
+    args = ap.parse_args(argv)
+    if args.command == "stats":
+        segs = segments(args.dir)
+        print(json.dumps({"segments": len(segs), "bytes": sum(p.stat().st_size for _, p in segs),
+                          "first_lsn": segs[0][0] if segs else None}))
+        return 0
+    reader = JournalReader(args.dir, args.from_lsn)
+    out = sys.stdout
+    try:
+        while True:
+            batch = reader.poll()
+            for rec in batch:
+                out.write(json.dumps(rec.as_dict(), separators=(",", ":")) + "\n")
+            out.flush()
+            if not batch:
+                if not args.follow:
+                    return 0
+                time.sleep(args.interval)
+    except (KeyboardInterrupt, BrokenPipeError):
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,21 +7,54 @@ import sys
 import time
 from pathlib import Path
 
+from my_router_setup import CONFIG, PROJECT_ROOT  # first: puts custom-services/ on sys.path for shared/
+from bgp import local_capability
+from dataplane import DataplaneServer
+from fib import Fib
+from flowcache import FlowCache
+from forward import Forwarder
+from journal import Journal, recover
+from policy import PolicyClassifier
+from probes import ProbeScheduler
+from rib import Rib
+from shared import jsonlog
+
+log = jsonlog.get_logger("router")
+
 __version__ = "0.1.0"
 
 _running = True
 
 def _handle_sig(signum, frame):
     global _running
-    print(f"[router] Received signal {signum}; graceful shutdown requested.")
+    log.info(f"Received signal {signum}; graceful shutdown requested.")
     _running = False
 
-def _write_heartbeat(hb_path: Path, status: str = "ok"):
+def _write_heartbeat(hb_path: Path, status: str = "ok", fwd: Forwarder | None = None,
+                     probes: ProbeScheduler | None = None, rib: Rib | None = None,
+                     dataplane: DataplaneServer | None = None, journal: Journal | None = None):
     payload = {
         "ts": time.time(),
         "status": status,
         "version": __version__
     }
+    if fwd is not None:
+        payload["routes"] = fwd.fib.counts()
+        payload["forwarding"] = dict(fwd.stats)
+        if fwd.policy is not None:
+            payload["policy_hits"] = fwd.policy.counters()
+        if fwd.cache is not None:
+            payload["flow_cache"] = fwd.cache.stats()
+    if probes is not None and probes.targets:
+        payload["probes"] = probes.summary()
+    if dataplane is not None:
+        payload["dataplane"] = dataplane.stats()
+    if journal is not None:
+        payload["journal"] = journal.stats()
+    if rib is not None:
+        peers = rib.peers()
+        if peers:
+            payload["peers"] = peers
     hb_path.write_text(json.dumps(payload), encoding="utf-8")
 
 def _remove_heartbeat(hb_path: Path):
@@ -30,9 +63,99 @@ def _remove_heartbeat(hb_path: Path):
     except Exception:
         pass
 
+def _sync_routes(rib: Rib, cfg: dict) -> None:
+    try:
+        changed, removed = rib.set_static(cfg.get("router", {}).get("routing_table", {}))
+    except ValueError as e:
+        log.warning(f"routing_table rejected, keeping current FIB: {e}")
+        return
+    counts = rib.fib.counts()
+    log.info(f"FIB synced: {changed} added/changed, {removed} removed (v4={counts['v4']}, v6={counts['v6']})")
+
+def _load_policy(fwd: Forwarder, cfg: dict) -> None:
+    rules = cfg.get("router", {}).get("policies", [])
+    try:
+        policy = PolicyClassifier(rules) if rules else None
+    except (ValueError, TypeError) as e:
+        log.warning(f"policies rejected, keeping current rules: {e}")
+        return
+    if policy is not None and fwd.policy is not None:
+        # Keep hit counters for rules that survived the edit (matched by name).
+        old = fwd.policy.counters()
+        for rule in policy.rules:
+            policy.hits[rule.priority] = old.get(rule.name, 0)
+    fwd.set_policy(policy)
+    if rules:
+        log.info(f"Policy compiled: {len(rules)} rules")
+
+def _load_flow_cache(fwd: Forwarder, cfg: dict) -> None:
+    fc = cfg.get("router", {}).get("flow_cache", {})
+    if not fc.get("enabled", False):
+        if fwd.cache is not None:
+            log.info("Flow cache disabled")
+        fwd.set_cache(None)
+        return
+    capacity = int(fc.get("capacity", 4096))
+    if fwd.cache is None or fwd.cache.capacity != capacity:
+        fwd.set_cache(FlowCache(capacity))
+        log.info(f"Flow cache enabled: {capacity} entries")
+
+def _load_probes(probes: ProbeScheduler, cfg: dict) -> None:
+    pcfg = cfg.get("router", {}).get("probes", {})
+    probes.interval_sec = float(pcfg.get("interval_sec", 2.0))
+    probes.timeout_sec = float(pcfg.get("timeout_sec", 1.0))
+    probes.jitter = float(pcfg.get("jitter", 0.2))
+    probes.rise = int(pcfg.get("rise", 2))
+    probes.fall = int(pcfg.get("fall", 3))
+    probes.set_max_concurrent(int(pcfg.get("max_concurrent", 512)))
+    try:
+        probes.set_targets(pcfg.get("targets", {}) if pcfg.get("enabled", False) else {})
+    except (ValueError, TypeError) as e:
+        log.warning(f"probes rejected, keeping current targets: {e}")
+
+def _load_bgp(rib: Rib, cfg: dict) -> None:
+    gr = cfg.get("router", {}).get("bgp", {}).get("graceful_restart", {})
+    try:
+        cap = local_capability(gr)
+    except (ValueError, TypeError) as e:
+        log.warning(f"graceful_restart rejected, keeping current settings: {e}")
+        return
+    rib.stale_path_time = float(gr.get("stale_path_time", 360))
+    rib.graceful_restart = cap
+    if cap is not None:
+        log.info(f"Graceful restart: restart_time={cap.restart_time}s, stale_path_time={rib.stale_path_time:g}s")
+
+def _open_journal(rib: Rib, cfg: dict) -> Journal | None:
+    """Rebuild the RIB from the journal (snapshot + replay), then start journaling to it."""
+    jcfg = cfg.get("router", {}).get("journal", {})
+    if not jcfg.get("enabled", False):
+        return None
+    path = Path(jcfg.get("dir", ".data/journal"))
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    journal = Journal(path, segment_bytes=int(jcfg.get("segment_mb", 64)) * 1024 * 1024,
+                      fsync=bool(jcfg.get("fsync", True)), keep_segments=int(jcfg.get("keep_segments", 4)))
+    journal.open()
+    started = time.perf_counter()
+    snap_lsn, replayed = recover(rib, journal)
+    rib.journal = journal
+    rib.fib.subscribe(journal.on_fib_delta)
+    rib.restarted()  # sessions and probe state died with the old process; this is journaled too
+    log.info(f"Journal: recovered snapshot LSN {snap_lsn} + {replayed} records in "
+             f"{time.perf_counter() - started:.2f}s; now at LSN {journal.lsn} ({path})")
+    return journal
+
+def _apply_config(fwd: Forwarder, rib: Rib, probes: ProbeScheduler, cfg: dict) -> None:
+    jsonlog.configure("router", cfg.get("logging"), PROJECT_ROOT)
+    _load_flow_cache(fwd, cfg)
+    _load_bgp(rib, cfg)
+    _sync_routes(rib, cfg)
+    _load_policy(fwd, cfg)
+    _load_probes(probes, cfg)
+
 def main():
     if len(sys.argv) < 2:
-        print("[router] Missing heartbeat path argument.")
+        log.error("Missing heartbeat path argument.")
         sys.exit(2)
 
     hb_path = Path(sys.argv[1]).resolve()
@@ -43,15 +166,43 @@ def main():
     if hasattr(signal, "SIGBREAK"):             # Windows Ctrl+Break
         signal.signal(signal.SIGBREAK, _handle_sig)
 
-    print("[router] Router process starting ...")
+    log.info("Router process starting ...")
+    fib = Fib()
+    fwd = Forwarder(fib)
+    rib = Rib(fib)
+    # Unreachable next hops are withdrawn from the FIB (or dropped from their ECMP group).
+    probes = ProbeScheduler(rib.set_reachable)  # settings, max_concurrent included, come from _apply_config
+    journal = _open_journal(rib, CONFIG.get())  # before config: its static table diff is journaled on top
+    snapshot_every = int(CONFIG.get().get("router", {}).get("journal", {}).get("snapshot_every", 100000))
+    _apply_config(fwd, rib, probes, CONFIG.get())
+    probes.start()
+    dcfg = CONFIG.get().get("router", {}).get("dataplane", {})
+    dataplane = None
+    if dcfg.get("enabled", False):
+        dataplane = DataplaneServer(fwd, dcfg.get("host", "127.0.0.1"), int(dcfg.get("port", 5001)), lock=rib.lock)
+        dataplane.start()
+    CONFIG.subscribe(lambda cfg: _apply_config(fwd, rib, probes, cfg))
+    CONFIG.watch()
     try:
         while _running:
-            _write_heartbeat(hb_path, status="ok")
+            rib.expire()  # graceful-restart timers: one deadline per peer
+            if journal is not None and journal.lsn - journal.snapshot_lsn >= snapshot_every:
+                journal.checkpoint(rib)
+            _write_heartbeat(hb_path, status="ok", fwd=fwd, probes=probes, rib=rib, dataplane=dataplane,
+                             journal=journal)
             time.sleep(1.0)  # <- your main loop work interval
     finally:
+        CONFIG.stop()
+        probes.stop()
+        if dataplane is not None:
+            dataplane.stop()
+        if journal is not None:
+            journal.checkpoint(rib)  # a clean stop restarts from the snapshot alone
+            journal.close()
         _write_heartbeat(hb_path, status="stopping")
         _remove_heartbeat(hb_path)
-        print("[router] Router process stopped.")
+        log.info("Router process stopped.")
+        jsonlog.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
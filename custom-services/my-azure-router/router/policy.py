@@ -0,0 +1,173 @@
+# my-azure-router/router/policy.py
+"""Policy-based routing: compile ordered match rules once, classify packets by tuple-space search.
+
+Rules are grouped by their (source length, destination length) pair, the
+"tuple". Each tuple is one dict keyed by the masked (src, dst) bits, so a
+packet costs one probe per tuple instead of one predicate call per rule.
+Protocol, destination port range and FIB next hop (`via`) are checked only
+on the few rules in the matching bucket. Tuples are visited in order of
+their best rule, and the search stops as soon as no remaining tuple can
+beat the match already found.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fib import parse_prefix
+
+PROTOCOLS = {"icmp": 1, "tcp": 6, "udp": 17, "icmpv6": 58}
+WIDTH = {4: 32, 6: 128}
+
+@dataclass(frozen=True)
+class PolicyRule:
+    name: str
+    priority: int                       # position in the config list; lower wins
+    src: Tuple[int, int]                # (value, length); length 0 = any
+    dst: Tuple[int, int]
+    family: Optional[int]               # 4 / 6, or None when neither side names a prefix
+    proto: Optional[int] = None
+    ports: Optional[Tuple[int, int]] = None  # inclusive destination port range
+    via: Optional[str] = None           # match the next hop the FIB chose
+    action: str = "forward"             # forward | drop
+    next_hop: Any = None                # override for action=forward
+
+def _port_range(spec: Any) -> Optional[Tuple[int, int]]:
+    if spec in (None, "", "any"):
+        return None
+    lo, _, hi = str(spec).partition("-")
+    lo_i, hi_i = int(lo), int(hi or lo)
+    if not 0 <= lo_i <= hi_i <= 65535:
+        raise ValueError(f"bad port range {spec!r}")
+    return lo_i, hi_i
+
+def _proto(spec: Any) -> Optional[int]:
+    if spec in (None, "", "any"):
+        return None
+    if isinstance(spec, int):
+        return spec
+    return PROTOCOLS[str(spec).lower()] if not str(spec).isdigit() else int(spec)
+
+def parse_rule(raw: dict, priority: int) -> PolicyRule:
+    """One `router.policies` entry -> PolicyRule. Raises ValueError on bad input."""
+    family = None
+    sides = {}
+    for side in ("src", "dst"):
+        if raw.get(side):
+            value, length, version, _ = parse_prefix(raw[side])
+            if family and family != version:
+                raise ValueError(f"policy {raw.get('name')!r}: src and dst are different families")
+            family = version
+            sides[side] = (value, length)
+        else:
+            sides[side] = (0, 0)
+    action = raw.get("action", "forward")
+    if action not in ("forward", "drop"):
+        raise ValueError(f"policy {raw.get('name')!r}: unknown action {action!r}")
+    if action == "forward" and raw.get("next_hop") is None:
+        raise ValueError(f"policy {raw.get('name')!r}: forward needs a next_hop")
+    try:
+        proto = _proto(raw.get("proto"))
+    except KeyError:
+        raise ValueError(f"policy {raw.get('name')!r}: unknown proto {raw.get('proto')!r}")
+    return PolicyRule(
+        name=str(raw.get("name") or f"rule-{priority}"), priority=priority,
+        src=sides["src"], dst=sides["dst"], family=family, proto=proto,
+        ports=_port_range(raw.get("dst_port")), via=raw.get("via"),
+        action=action, next_hop=raw.get("next_hop"),
+    )
+
+class _Tuple:
+    """All rules sharing one (src length, dst length) pair."""
+    __slots__ = ("src_shift", "dst_shift", "best", "buckets")
+
+    def __init__(self, width: int, src_len: int, dst_len: int):
+        self.src_shift = width - src_len
+        self.dst_shift = width - dst_len
+        self.best = 1 << 30  # lowest priority number held here
+        self.buckets: Dict[Tuple[int, int], List[PolicyRule]] = {}
+
+class PolicyClassifier:
+    """Compiled form of `router.policies`; rebuild it to change rules, classify many times."""
+
+    def __init__(self, rules: Iterable[dict]):
+        self.rules: List[PolicyRule] = [parse_rule(raw, i) for i, raw in enumerate(rules)]
+        names = set()
+        for rule in self.rules:  # counters() and reloads key hit counts by name
+            if rule.name in names:
+                raise ValueError(f"policy {rule.name!r}: name used by more than one rule")
+            names.add(rule.name)
+        self.hits = [0] * len(self.rules)
+        self.misses = 0
+        self._spaces: Dict[int, List[_Tuple]] = {}
+        for version, width in WIDTH.items():
+            tuples: Dict[Tuple[int, int], _Tuple] = {}
+            for rule in self.rules:
+                if rule.family not in (None, version):
+                    continue
+                t = tuples.get((rule.src[1], rule.dst[1]))
+                if t is None:
+                    t = tuples[(rule.src[1], rule.dst[1])] = _Tuple(width, rule.src[1], rule.dst[1])
+                key = (rule.src[0] >> t.src_shift, rule.dst[0] >> t.dst_shift)
+                t.buckets.setdefault(key, []).append(rule)  # rules arrive in priority order
+                t.best = min(t.best, rule.priority)
+            self._spaces[version] = sorted(tuples.values(), key=lambda t: t.best)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, version: int, src: int, dst: int, proto: int, dport: int,
+              via: Any = None) -> Optional[PolicyRule]:
+        """Highest-priority rule matching the packet, or None. Does not count hits."""
+        found: Optional[PolicyRule] = None
+        best = 1 << 30
+        for t in self._spaces.get(version, ()):
+            if t.best >= best:
+                break  # every later tuple only holds lower-priority rules
+            bucket = t.buckets.get((src >> t.src_shift, dst >> t.dst_shift))
+            if bucket is None:
+                continue
+            for rule in bucket:
+                if rule.priority >= best:
+                    break
+                if rule.proto is not None and rule.proto != proto:
+                    continue
+                if rule.ports is not None and not rule.ports[0] <= dport <= rule.ports[1]:
+                    continue
+                if rule.via is not None and rule.via != via:
+                    continue
+                found, best = rule, rule.priority
+                break
+        return found
+
+    def classify(self, version: int, src: int, dst: int, proto: int, dport: int,
+                 via: Any = None) -> Optional[PolicyRule]:
+        rule = self.match(version, src, dst, proto, dport, via)
+        if rule is None:
+            self.misses += 1
+        else:
+            self.hits[rule.priority] += 1
+        return rule
+
+    def classify_batch(self, keys: Iterable[Tuple[int, int, int, int, int, Any]]) -> List[Optional[PolicyRule]]:
+        """Classify (version, src, dst, proto, dport, via) tuples; repeated flows match once."""
+        match, hits = self.match, self.hits
+        seen: Dict[tuple, Optional[PolicyRule]] = {}
+        out = []
+        append = out.append
+        misses = 0
+        for key in keys:
+            rule = seen.get(key, seen)
+            if rule is seen:
+                rule = seen[key] = match(*key)
+            if rule is None:
+                misses += 1
+            else:
+                hits[rule.priority] += 1
+            append(rule)
+        self.misses += misses
+        return out
+
+    def counters(self) -> Dict[str, int]:
+        out = {rule.name: self.hits[rule.priority] for rule in self.rules}
+        out["<no match>"] = self.misses
+        return out
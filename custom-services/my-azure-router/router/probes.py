@@ -0,0 +1,224 @@
+# my-azure-router/router/probes.py
+"""Next-hop health probes on one asyncio event loop.
+
+Every target is a coroutine on a single loop running in one background thread,
+so hundreds or thousands of next hops cost a few KB each, not a thread each.
+Probes are TCP connects or UDP echoes. They start at random offsets and
+re-arm with jittered intervals, so they never fire in bursts. A semaphore caps
+how many are in flight. State changes use hysteresis: `fall` consecutive
+failures take a target down and `rise` consecutive successes bring it back, so
+one lost packet does not flap routes.
+"""
+from __future__ import annotations
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from shared.jsonlog import get_logger
+
+log = get_logger("router")
+
+class ProbeTarget:
+    __slots__ = ("address", "kind", "port", "up", "ok_streak", "fail_streak",
+                 "rtt_ms", "error", "checks", "failures", "changed_at")
+
+    def __init__(self, address: str, kind: str = "tcp", port: int = 0):
+        if kind not in ("tcp", "udp"):
+            raise ValueError(f"probe type for {address} must be tcp or udp, not {kind!r}")
+        self.address = address
+        self.kind = kind
+        self.port = port
+        self.up = True  # innocent until proven guilty: don't blackhole routes at startup
+        self.ok_streak = 0
+        self.fail_streak = 0
+        self.rtt_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checks = 0
+        self.failures = 0
+        self.changed_at = time.time()
+
+    def as_dict(self) -> dict:
+        return {"type": self.kind, "port": self.port, "state": "up" if self.up else "down",
+                "rtt_ms": self.rtt_ms, "error": self.error, "checks": self.checks,
+                "failures": self.failures, "since": self.changed_at}
+
+class _Echo(asyncio.DatagramProtocol):
+    def __init__(self, done: asyncio.Future):
+        self.done = done
+
+    def datagram_received(self, data, addr):
+        if not self.done.done():
+            self.done.set_result(True)
+
+    def error_received(self, exc):
+        if not self.done.done():
+            self.done.set_exception(exc)
+
+async def probe_tcp(host: str, port: int, timeout: float) -> None:
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+async def probe_udp(host: str, port: int, timeout: float) -> None:
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _Echo(done), remote_addr=(host, port))
+    try:
+        transport.sendto(b"my-azure-router probe")
+        await asyncio.wait_for(done, timeout)
+    finally:
+        transport.close()
+
+PROBES = {"tcp": probe_tcp, "udp": probe_udp}
+
+class ProbeScheduler:
+    """Runs probes for `targets` and calls `on_change(address, up)` on state transitions."""
+
+    def __init__(self, on_change: Callable[[str, bool], None], interval_sec: float = 2.0,
+                 timeout_sec: float = 1.0, jitter: float = 0.2, rise: int = 2, fall: int = 3,
+                 max_concurrent: int = 512):
+        self.on_change = on_change
+        self.interval_sec = interval_sec
+        self.timeout_sec = timeout_sec
+        self.jitter = jitter
+        self.rise = rise
+        self.fall = fall
+        self.max_concurrent = max_concurrent
+        self.targets: Dict[str, ProbeTarget] = {}
+        self._lock = threading.Lock()  # targets and their up/down state, read by summary() off-loop
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    # ---- lifecycle (called from other threads) ----
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="probes", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._sem = asyncio.Semaphore(self.max_concurrent)
+        for address in list(self.targets):
+            self._spawn(address)
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*self._tasks.values(), return_exceptions=True))
+            self._tasks.clear()
+            loop.close()
+            self._loop = None
+
+    def stop(self, timeout: float = 3.0) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def set_max_concurrent(self, n: int) -> None:
+        """Resize the in-flight cap. Probes already holding a slot finish under the old one."""
+        if n == self.max_concurrent:
+            return
+        self.max_concurrent = n
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: setattr(self, "_sem", asyncio.Semaphore(n)))
+
+    def set_targets(self, targets: Dict[str, dict]) -> None:
+        """Replace the target set ({address: {"type": "tcp", "port": 22}}); keeps state of unchanged ones."""
+        wanted = {addr: ProbeTarget(addr, spec.get("type", "tcp"), int(spec.get("port", 0)))
+                  for addr, spec in targets.items()}
+
+        def apply() -> None:
+            released = []
+            with self._lock:
+                for addr in list(self.targets):
+                    old, new = self.targets[addr], wanted.get(addr)
+                    if new is None or (new.kind, new.port) != (old.kind, old.port):
+                        task = self._tasks.pop(addr, None)
+                        if task:
+                            task.cancel()
+                        del self.targets[addr]
+                        if not old.up:
+                            released.append(addr)
+                added = [addr for addr in wanted if addr not in self.targets]
+                for addr in added:
+                    self.targets[addr] = wanted[addr]
+            for addr in released:
+                self.on_change(addr, True)  # no longer probed: stop holding routes down
+            if self._loop is not None:
+                for addr in added:
+                    self._spawn(addr)
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(apply)
+        else:
+            apply()
+
+    # ---- probing (event loop thread) ----
+
+    def _spawn(self, address: str) -> None:
+        self._tasks[address] = self._loop.create_task(self._run_target(self.targets[address]))
+
+    def _next_delay(self) -> float:
+        j = self.jitter
+        return self.interval_sec * random.uniform(1.0 - j, 1.0 + j)
+
+    async def _run_target(self, t: ProbeTarget) -> None:
+        await asyncio.sleep(random.uniform(0, self.interval_sec))  # spread the first round
+        probe = PROBES[t.kind]
+        while True:
+            async with self._sem:
+                start = time.perf_counter()
+                try:
+                    await probe(t.address, t.port, self.timeout_sec)
+                except (OSError, asyncio.TimeoutError) as e:
+                    self._record(t, False, str(e) or type(e).__name__)
+                else:
+                    t.rtt_ms = round((time.perf_counter() - start) * 1000, 2)
+                    self._record(t, True, None)
+            await asyncio.sleep(self._next_delay())
+
+    def _record(self, t: ProbeTarget, ok: bool, error: Optional[str]) -> None:
+        t.checks += 1
+        t.error = error
+        if ok:
+            t.ok_streak += 1
+            t.fail_streak = 0
+            flip = not t.up and t.ok_streak >= self.rise
+        else:
+            t.failures += 1
+            t.fail_streak += 1
+            t.ok_streak = 0
+            flip = t.up and t.fail_streak >= self.fall
+        if flip:
+            with self._lock:
+                t.up = not t.up
+                t.changed_at = time.time()
+            log.info(f"Next hop {t.address} is {'UP' if t.up else 'DOWN'} ({t.kind}/{t.port})")
+            try:
+                self.on_change(t.address, t.up)
+            except Exception as e:
+                log.error(f"Applying probe result for {t.address} failed: {e}")
+
+    def summary(self) -> dict:
+        """Called from the main thread while the loop thread may be changing targets."""
+        with self._lock:
+            down = [t.address for t in self.targets.values() if not t.up]
+            total = len(self.targets)
+        return {"targets": total, "down": sorted(down)}
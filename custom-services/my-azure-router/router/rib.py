@@ -0,0 +1,372 @@
+# my-azure-router/router/rib.py
+"""Routing information base: configured and learned routes in, reachable routes out to the FIB.
+
+A route maps a prefix to one or more next hops (more than one = an ECMP
+group). Static routes come from config. Learned routes come from BGP peers,
+one path per (peer, prefix). A static route wins over learned ones while any
+of its next hops is reachable. Learned paths for the same prefix are merged
+into one ECMP group. Only next hops that are currently reachable are
+installed: when a probe marks a next hop down, every prefix using it is
+reinstalled with the surviving members, or withdrawn once none are left.
+`_by_next_hop` keeps that fan-out proportional to the prefixes actually
+affected.
+
+Graceful restart (RFC 4724, receiving side): when a session with graceful
+restart negotiated goes down, its paths stay installed. Bumping the peer's
+generation marks them all stale in O(1): a path is stale if it was learned in
+an earlier generation than the peer's current one. Re-advertised paths become
+fresh again. Unchanged ones cause no FIB write. Whatever is still stale when
+End-of-RIB arrives, or when the restart or stale-path timer runs out, is
+removed in one sweep over that peer's paths. Nothing is scheduled per route:
+`expire()` checks one deadline per peer.
+
+With a journal attached (`router/journal.py`), every call that changes state
+records its inputs first, including the `now` it ran with. Replaying the
+records through the same methods on a restored snapshot therefore rebuilds
+exactly the same RIB.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from bgp import FAMILIES, GracefulRestart, Negotiated
+from fib import Fib, parse_prefix
+from journal import END_OF_RIB, EXPIRE, LEARN, PEER_DOWN, PEER_UP, REACHABLE, STATIC, WITHDRAW
+from shared.jsonlog import get_logger
+
+log = get_logger("router")
+
+NextHops = Tuple[str, ...]
+
+def next_hops(value: Any) -> NextHops:
+    """Config value -> tuple of next hops: "eth0" or ["10.0.0.4", "10.0.0.5"]."""
+    if isinstance(value, (list, tuple)):
+        return tuple(str(v) for v in value)
+    return (str(value),)
+
+class _Path:
+    __slots__ = ("hops", "family", "gen")
+
+    def __init__(self, hops: NextHops, family: int, gen: int):
+        self.hops = hops
+        self.family = family
+        self.gen = gen
+
+class _Peer:
+    __slots__ = ("name", "state", "gen", "gr", "paths", "stale", "deadline")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "up"                        # up | restarting | down
+        self.gen = 0                             # paths with an older gen are stale
+        self.gr: Optional[Negotiated] = None     # from the current/last OPEN exchange
+        self.paths: Dict[str, _Path] = {}        # adj-RIB-in: prefix -> path
+        self.stale: Set[int] = set()             # families still holding stale paths
+        self.deadline: Optional[float] = None    # restart timer, then stale-path timer
+
+class Rib:
+    def __init__(self, fib: Fib, stale_path_time: float = 360.0):
+        self.fib = fib
+        self.stale_path_time = stale_path_time
+        self.graceful_restart: Optional[GracefulRestart] = None  # what we advertise in OPEN
+        self._static: Dict[str, NextHops] = {}
+        self._learned: Dict[str, Dict[str, _Path]] = {}  # prefix -> peer -> path
+        self._peers: Dict[str, _Peer] = {}
+        self._by_next_hop: Dict[str, Set[str]] = {}
+        self._down: Set[str] = set()
+        # Config reloads, probe results and peer events arrive on different threads.
+        self.lock = threading.RLock()
+        self.journal = None  # a journal.Journal once recovery is done; records are appended under `lock`
+
+    def _record(self, rtype: int, data: Any) -> None:
+        if self.journal is not None:
+            self.journal.append(rtype, data)
+
+    def _index(self, prefix: str, hops: Iterable[str], add: bool) -> None:
+        for nh in hops:
+            if add:
+                self._by_next_hop.setdefault(nh, set()).add(prefix)
+            else:
+                users = self._by_next_hop.get(nh)
+                if users is not None:
+                    users.discard(prefix)
+                    if not users:
+                        del self._by_next_hop[nh]
+
+    def _uses(self, prefix: str) -> Set[str]:
+        hops = set(self._static.get(prefix, ()))
+        for path in self._learned.get(prefix, {}).values():
+            hops.update(path.hops)
+        return hops
+
+    def _select(self, prefix: str) -> NextHops:
+        down = self._down
+        static = self._static.get(prefix)
+        if static:
+            live = tuple(nh for nh in static if nh not in down)
+            if live:
+                return live
+        paths = self._learned.get(prefix)
+        if not paths:
+            return ()
+        merged = dict.fromkeys(nh for peer in sorted(paths) for nh in paths[peer].hops)
+        return tuple(nh for nh in merged if nh not in down)
+
+    def _install(self, prefix: str) -> None:
+        live = self._select(prefix)
+        if not live:
+            self.fib.remove(prefix)
+            return
+        want = live[0] if len(live) == 1 else live
+        current = self.fib.get(prefix)
+        if current is None or current.next_hop != want:
+            self.fib.add(prefix, want)
+
+    def _refresh(self, prefix: str, before: Set[str]) -> None:
+        after = self._uses(prefix)
+        self._index(prefix, before - after, add=False)
+        self._index(prefix, after - before, add=True)
+        self._install(prefix)
+
+    # ---- static routes ----
+
+    def set_static(self, table: Dict[str, Any]) -> Tuple[int, int]:
+        """Make the static routes equal `table`; returns (added/changed, removed)."""
+        wanted = {parse_prefix(p)[3]: next_hops(v) for p, v in table.items()}
+        with self.lock:
+            if wanted == self._static:
+                return 0, 0
+            self._record(STATIC, {p: list(h) for p, h in wanted.items()})
+            changed = removed = 0
+            for prefix in list(self._static.keys() - wanted.keys()):
+                before = self._uses(prefix)
+                del self._static[prefix]
+                self._refresh(prefix, before)
+                removed += 1
+            for prefix, hops in wanted.items():
+                if self._static.get(prefix) == hops:
+                    continue
+                before = self._uses(prefix)
+                self._static[prefix] = hops
+                self._refresh(prefix, before)
+                changed += 1
+            return changed, removed
+
+    # ---- next-hop reachability ----
+
+    def set_reachable(self, next_hop: str, up: bool) -> int:
+        """Record a next hop's reachability; returns the number of prefixes it touched."""
+        with self.lock:
+            if up == (next_hop not in self._down):
+                return 0
+            self._record(REACHABLE, [next_hop, up])
+            if up:
+                self._down.discard(next_hop)
+            else:
+                self._down.add(next_hop)
+            prefixes = list(self._by_next_hop.get(next_hop, ()))
+            for prefix in prefixes:
+                self._install(prefix)
+            return len(prefixes)
+
+    def down(self) -> Set[str]:
+        with self.lock:
+            return set(self._down)
+
+    def next_hops(self) -> Set[str]:
+        with self.lock:
+            return set(self._by_next_hop)
+
+    # ---- learned routes and graceful restart ----
+
+    def peer_up(self, peer: str, gr: Optional[Negotiated] = None, now: Optional[float] = None) -> int:
+        """Session established with `gr` negotiated (or None). Returns stale paths dropped at once."""
+        now = time.time() if now is None else now
+        with self.lock:
+            p = self._peers.get(peer)
+            if p is None:
+                p = self._peers[peer] = _Peer(peer)
+            elif p.state == "up":
+                self.peer_down(peer, now)  # a new session replaces the old one: that is a restart
+            self._record(PEER_UP, [peer, gr.as_dict() if gr is not None else None, now])
+            flushed = 0
+            if p.stale:
+                # Families the peer did not keep forwarding for cannot wait for End-of-RIB.
+                keep = gr.preserved if gr is not None else frozenset()
+                flushed = self._sweep(p, p.stale - keep)
+                p.deadline = now + self.stale_path_time if p.stale else None
+            p.state = "up"
+            p.gr = gr
+            return flushed
+
+    def peer_down(self, peer: str, now: Optional[float] = None) -> int:
+        """Session lost. Paths in graceful-restart families are kept and marked stale,
+        the rest are withdrawn. Returns the number withdrawn."""
+        now = time.time() if now is None else now
+        with self.lock:
+            p = self._peers.get(peer)
+            if p is None or p.state != "up":
+                return 0
+            self._record(PEER_DOWN, [peer, now])
+            gr = p.gr
+            retain = gr.families if gr is not None and gr.restart_time > 0 else frozenset()
+            p.gen += 1  # every path learned so far is now stale
+            flushed = self._sweep(p, FAMILIES - retain)
+            p.stale = set(retain)
+            if retain:
+                p.state = "restarting"
+                p.deadline = now + gr.restart_time
+                log.info(f"Peer {peer} down; keeping {len(p.paths)} paths stale for {gr.restart_time}s")
+            else:
+                p.state = "down"
+                p.deadline = None
+                log.info(f"Peer {peer} down; withdrew {flushed} paths")
+            return flushed
+
+    def learn(self, peer: str, prefix: str, value: Any) -> None:
+        """Install or refresh `peer`'s path to `prefix`; a stale path becomes fresh again."""
+        _, _, family, key = parse_prefix(prefix)
+        hops = next_hops(value)
+        with self.lock:
+            p = self._peers.get(peer)
+            if p is None or p.state != "up":
+                raise ValueError(f"peer {peer} has no established session")
+            self._record(LEARN, [peer, key, list(hops)])
+            before = self._uses(key)
+            path = p.paths.get(key)
+            if path is None:
+                path = p.paths[key] = _Path(hops, family, p.gen)
+                self._learned.setdefault(key, {})[peer] = path
+            else:
+                path.hops, path.gen = hops, p.gen
+            self._refresh(key, before)
+
+    def withdraw(self, peer: str, prefix: str) -> bool:
+        key = parse_prefix(prefix)[3]
+        with self.lock:
+            p = self._peers.get(peer)
+            if p is None or key not in p.paths:
+                return False
+            self._record(WITHDRAW, [peer, key])
+            before = self._uses(key)
+            self._unlearn(p, key)
+            self._refresh(key, before)
+            return True
+
+    def end_of_rib(self, peer: str, family: int) -> int:
+        """The peer has re-sent everything for `family`: drop what is still stale. Returns the count."""
+        with self.lock:
+            p = self._peers.get(peer)
+            if p is None or p.state != "up" or family not in p.stale:
+                return 0
+            self._record(END_OF_RIB, [peer, family])
+            swept = self._sweep(p, {family})
+            if not p.stale:
+                p.deadline = None
+            log.info(f"Peer {peer} End-of-RIB IPv{family}: swept {swept} stale paths")
+            return swept
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Run out restart/stale-path timers that have passed; call periodically. Returns paths swept."""
+        now = time.time() if now is None else now
+        swept = 0
+        with self.lock:
+            if any(p.deadline is not None and now >= p.deadline for p in self._peers.values()):
+                self._record(EXPIRE, now)
+            for p in self._peers.values():
+                if p.deadline is None or now < p.deadline:
+                    continue
+                n = self._sweep(p, set(p.stale))
+                swept += n
+                p.deadline = None
+                if p.state == "restarting":
+                    p.state = "down"
+                log.info(f"Peer {p.name} graceful restart timer expired: swept {n} stale paths")
+        return swept
+
+    def _unlearn(self, p: _Peer, prefix: str) -> None:
+        del p.paths[prefix]
+        paths = self._learned[prefix]
+        del paths[p.name]
+        if not paths:
+            del self._learned[prefix]
+
+    def _sweep(self, p: _Peer, families: Iterable[int]) -> int:
+        """One pass over the peer's paths: remove the stale ones in `families`, then fix the FIB."""
+        families = set(families)
+        if not families:
+            return 0
+        gen = p.gen
+        gone = [prefix for prefix, path in p.paths.items() if path.gen < gen and path.family in families]
+        for prefix in gone:
+            before = self._uses(prefix)
+            self._unlearn(p, prefix)
+            self._refresh(prefix, before)
+        p.stale -= families
+        return len(gone)
+
+    # ---- snapshots (see journal.py) ----
+
+    def snapshot(self) -> dict:
+        """The whole RIB as plain JSON-ready data; `restore()` takes it back."""
+        with self.lock:
+            return {
+                "static": {prefix: list(hops) for prefix, hops in self._static.items()},
+                "down": sorted(self._down),
+                "peers": {
+                    p.name: {
+                        "state": p.state, "gen": p.gen, "gr": p.gr.as_dict() if p.gr is not None else None,
+                        "stale": sorted(p.stale), "deadline": p.deadline,
+                        "paths": {prefix: [list(path.hops), path.family, path.gen] for prefix, path in p.paths.items()},
+                    }
+                    for p in self._peers.values()
+                },
+            }
+
+    def restore(self, state: dict) -> None:
+        """Replace the RIB with a snapshot and make the FIB match it."""
+        with self.lock:
+            old = set(self._static) | set(self._learned)
+            self._static = {prefix: next_hops(hops) for prefix, hops in state.get("static", {}).items()}
+            self._down = set(state.get("down", ()))
+            self._peers, self._learned, self._by_next_hop = {}, {}, {}
+            for name, d in state.get("peers", {}).items():
+                p = self._peers[name] = _Peer(name)
+                p.state, p.gen, p.deadline = d["state"], d["gen"], d["deadline"]
+                p.gr = Negotiated.from_dict(d["gr"]) if d["gr"] else None
+                p.stale = set(d["stale"])
+                for prefix, (hops, family, gen) in d["paths"].items():
+                    path = p.paths[prefix] = _Path(tuple(hops), family, gen)
+                    self._learned.setdefault(prefix, {})[name] = path
+            for prefix in old - self._static.keys() - self._learned.keys():
+                self.fib.remove(prefix)
+            for prefix in self._static.keys() | self._learned.keys():
+                self._index(prefix, self._uses(prefix), add=True)
+                self._install(prefix)
+
+    def restarted(self, now: Optional[float] = None) -> None:
+        """After recovery: sessions and probe results did not survive the process.
+
+        Peers that were up are taken down, so graceful restart keeps their paths
+        stale until they come back. Next hops start out reachable again, matching
+        the probe scheduler, which only reports changes.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            for hop in sorted(self._down):
+                self.set_reachable(hop, True)
+            for name in sorted(self._peers):
+                self.peer_down(name, now)
+
+    def peers(self, now: Optional[float] = None) -> Dict[str, dict]:
+        now = time.time() if now is None else now
+        with self.lock:
+            return {
+                p.name: {
+                    "state": p.state, "paths": len(p.paths),
+                    "stale_families": sorted(p.stale),
+                    "timer_sec": round(max(0.0, p.deadline - now), 1) if p.deadline is not None else None,
+                }
+                for p in self._peers.values()
+            }
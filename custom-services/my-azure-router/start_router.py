@@ -9,10 +9,12 @@ import json
 from pathlib import Path
 
 # Import setup (works because start_router.py is one level above /router)
-from router.my_router_setup import setup_router_env, PROJECT_ROOT, APP_JSON
+from router.my_router_setup import setup_router_env, PROJECT_ROOT, CONFIG
+from shared.telemetry import ResourceSampler
 
 # Globals for the controller session
 _router_proc: subprocess.Popen | None = None
+_telemetry = ResourceSampler()  # CPU/RSS/fds/threads per child; see shared/telemetry.py
 _python_in_venv: Path | None = None
 _heartbeat_file: Path | None = None
 
@@ -46,6 +48,7 @@ def start_router() -> None:
             [str(_python_in_venv), str(router_script), str(_heartbeat_file)]
         )
     print(f"[ctl] Router PID: {_router_proc.pid}")
+    _telemetry.watch("router", _router_proc.pid)
 
 def stop_router_soft(timeout: float = 5.0) -> None:
     global _router_proc
@@ -107,6 +110,18 @@ def router_status() -> None:
             print(f"[status] Heartbeat unreadable: {e}")
     else:
         print("[status] No heartbeat file found.")
+    for line in _telemetry.status_lines("router"):
+        print(f"[status] {line}")
+
+def router_trend(arg: str = "") -> None:
+    try:
+        minutes = float(arg) if arg else None
+    except ValueError:
+        print(f"[ctl] Not a number of minutes: {arg}")
+        return
+    window = minutes * 60 if minutes else _telemetry.history * _telemetry.interval_sec
+    for line in _telemetry.trend_lines("router", window):
+        print(f"[status] {line}")
 
 def _print_help():
     print(
@@ -116,13 +131,14 @@ def _print_help():
         "  kill               Hard kill (immediate)\n"
         "  restart            Restart router\n"
         "  router-status | rs Show router status/health\n"
+        "  trend [minutes]    Resource trends (CPU, RSS, fds, threads, ctx switches)\n"
         "  help               Show this help\n"
         "  q | quit | exit    Exit controller (graceful stop)\n"
     )
 
 def _load_cfg_preview():
     try:
-        cfg = json.loads(Path(APP_JSON).read_text(encoding="utf-8"))
+        cfg = CONFIG.get()
         ft = cfg.get("first-time-setup")
         conf = cfg.get("configured")
         host = cfg.get("router", {}).get("host")
@@ -136,6 +152,9 @@ def main():
 
     # Run environment + config setup first
     _python_in_venv, cfg, _heartbeat_file = setup_router_env()
+    tcfg = cfg.get("telemetry", {})
+    _telemetry.interval_sec = float(tcfg.get("interval_sec", 2.0))
+    _telemetry.history = int(tcfg.get("history", 1800))
 
     # Preview config flags for clarity
     _load_cfg_preview()
@@ -161,6 +180,8 @@ def main():
                 restart_router()
             elif cmd in ("router-status", "rs"):
                 router_status()
+            elif cmd.partition(" ")[0] in ("trend", "t"):
+                router_trend(cmd.partition(" ")[2].strip())
             elif cmd in ("help", "?"):
                 _print_help()
             elif cmd == "":
@@ -172,6 +193,7 @@ def main():
     finally:
         # Ensure graceful shutdown on exit
         stop_router_soft(timeout=3.0)
+        _telemetry.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,2 @@
+# my-azure-labs-collection/custom-services/shared/__init__.py
+# Code shared by the custom services. Entry points put custom-services/ on sys.path.
@@ -0,0 +1,176 @@
+# my-azure-labs-collection/custom-services/shared/config.py
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+Signature = Tuple[int, int, int]  # (inode, mtime_ns, size)
+
+class ConfigError(ValueError):
+    pass
+
+def _read_json(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_json(path: Path, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+class ConfigStore:
+    """One parsed, validated copy of a service's app.json.
+
+    get() only ever returns the cached dict; the file is re-read by refresh(),
+    and only when its (inode, mtime, size) signature changed. watch() runs
+    refresh() in a daemon thread so request handlers never touch the disk.
+    Subscribers are called with the new config after every successful reload.
+    """
+
+    def __init__(self, app_json: Path, template_json: Optional[Path] = None, model: Any = None):
+        self.app_json = Path(app_json)
+        self.template_json = Path(template_json) if template_json else None
+        self.model = model  # optional pydantic model; anything with model_validate()
+        self._cfg: Optional[dict] = None
+        self._sig: Optional[Signature] = None
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    # --- first-time setup policy (shared by every my_*_setup.py) ---
+
+    def _reset_from_template(self) -> dict:
+        print("[setup] Resetting configuration from template.app.json ...")
+        template = _read_json(self.template_json)
+        _write_json(self.app_json, template)
+        return template
+
+    def _backup_unreadable(self, err: Exception) -> Path:
+        backup = self.app_json.with_name(f"{self.app_json.name}.bad-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.replace(self.app_json, backup)
+        print(f"[setup] app.json is unreadable ({err}); moved it to {backup.name}.")
+        return backup
+
+    def ensure(self) -> dict:
+        """Make sure app.json exists and apply the template/first-time-setup rules:
+           - if app.json is not valid JSON: back it up beside itself, reset to template
+           - if configured == false: reset to template (clean start)
+           - elif first-time-setup == true: mark configured true & first-time-setup false
+           - else: leave as-is
+        """
+        self.app_json.parent.mkdir(parents=True, exist_ok=True)
+        if self.template_json is None or not self.template_json.exists():
+            raise FileNotFoundError(f"Missing template file: {self.template_json}")
+
+        if not self.app_json.exists():
+            print("[setup] app.json not found; creating it from template ...")
+            cfg = self._reset_from_template()
+        else:
+            try:
+                cfg = _read_json(self.app_json)
+                if not isinstance(cfg, dict):
+                    raise ValueError("top level is not an object")
+            except ValueError as e:  # JSONDecodeError and UnicodeDecodeError included
+                self._backup_unreadable(e)
+                cfg = {}  # not configured -> reset below
+
+        if not cfg.get("configured", False):
+            cfg = self._reset_from_template()
+        elif cfg.get("first-time-setup", False):
+            print("[setup] First-time setup detected; flipping flags and saving ...")
+            cfg["configured"] = True
+            cfg["first-time-setup"] = False
+            _write_json(self.app_json, cfg)
+
+        self.load()
+        print("[setup] Config ready.")
+        return self.get()
+
+    # --- cached loading ---
+
+    def _signature(self, path: Path) -> Optional[Signature]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _source(self) -> Path:
+        # Fall back to the template when setup has not produced app.json yet.
+        if self.app_json.exists() or self.template_json is None:
+            return self.app_json
+        return self.template_json
+
+    def _validate(self, data: dict) -> dict:
+        if not isinstance(data, dict):
+            raise ConfigError(f"{self.app_json.name}: top level must be an object")
+        if self.model is not None:
+            try:
+                self.model.model_validate(data)
+            except Exception as e:
+                raise ConfigError(f"{self.app_json.name} is invalid: {e}") from e
+        return data
+
+    def load(self) -> dict:
+        """Parse + validate from disk unconditionally and notify subscribers."""
+        src = self._source()
+        sig = self._signature(src)
+        cfg = self._validate(_read_json(src))
+        with self._lock:
+            self._cfg, self._sig = cfg, sig
+            subscribers = list(self._subscribers)
+        for cb in subscribers:
+            try:
+                cb(cfg)
+            except Exception as e:
+                print(f"[config] Subscriber failed: {e}")
+        return cfg
+
+    def get(self) -> dict:
+        cfg = self._cfg
+        if cfg is None:
+            cfg = self.load()
+        return cfg
+
+    def refresh(self) -> bool:
+        """Reload if the file changed; keep the last good config if the new one is invalid."""
+        if self._signature(self._source()) == self._sig:
+            return False
+        try:
+            self.load()
+            return True
+        except (ConfigError, ValueError, OSError) as e:
+            print(f"[config] Keeping previous config: {e}")
+            self._sig = self._signature(self._source())  # don't retry the same bad file
+            return False
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def watch(self, interval_sec: float = 1.0) -> None:
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def _run():
+            while not self._stop.wait(interval_sec):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=_run, name="config-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+def config_model(service: str):
+    """Return the pydantic model for `service`, or None when pydantic isn't installed
+    (the controllers run setup with the system interpreter, before the venv exists)."""
+    try:
+        from shared import schemas
+    except ImportError:
+        return None
+    return schemas.MODELS.get(service)
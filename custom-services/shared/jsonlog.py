@@ -0,0 +1,312 @@
+# my-azure-labs-collection/custom-services/shared/jsonlog.py
+"""Structured JSON logging that never makes the caller wait.
+
+A log call builds one tuple and stores it in a fixed-size `RingBuffer`. The
+slot is claimed with next() on an itertools.count, which is atomic under the
+GIL, so producers never take a lock, never allocate a buffer and never touch
+the disk. One writer thread per process drains the ring in batches. It turns
+records into JSON lines, writes each batch with a single write(), and rotates
+the file by size. If producers outrun the writer, the oldest unwritten
+records are overwritten, and the next batch reports how many in a
+`log.dropped` record. A lost line is better than a stalled packet or request.
+
+High-rate events can be sampled by event name, keeping 1 in N. A kept record
+carries `"sample": N` so counts can be scaled back up. Until configure() has
+run, or when logging is disabled, messages are printed to stdout as
+`[service] message`, the way the services always have.
+
+The writer is a real OS thread even when gevent has monkey-patched
+`threading` (the frontend's gevent mode): as a greenlet its disk writes would
+run on the hub and stall every open connection.
+"""
+from __future__ import annotations
+import itertools
+import json
+import os
+import _thread
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+class RingBuffer:
+    """Many producers, one consumer; producers overwrite rather than wait."""
+
+    def __init__(self, capacity: int = 65536):
+        if capacity < 1:
+            raise ValueError("ring capacity must be >= 1")
+        self.capacity = capacity
+        self._slots: List[Optional[tuple]] = [None] * capacity
+        self._claim = itertools.count()
+        self._read = 0
+        self._stalled = -1
+        self.dropped = 0
+
+    def put(self, item: Any) -> None:
+        seq = next(self._claim)
+        self._slots[seq % self.capacity] = (seq, item)
+
+    def drain(self, limit: int) -> List[Any]:
+        """Up to `limit` items in order. Only the writer thread may call this."""
+        slots, cap = self._slots, self.capacity
+        read = self._read
+        out: List[Any] = []
+        while len(out) < limit:
+            entry = slots[read % cap]
+            if entry is None or entry[0] < read:
+                nxt = slots[(read + 1) % cap]
+                if nxt is None or nxt[0] <= read:
+                    break  # nothing new
+                # Later records exist: the producer of `read` is between claim and store,
+                # or a preempted producer stored it over a newer lap. Give it one more drain.
+                if self._stalled != read:
+                    self._stalled = read
+                    break
+                self.dropped += 1
+                read += 1
+                continue
+            seq, item = entry
+            if seq > read:
+                # Lapped: everything older than the last `cap` claims was overwritten.
+                oldest = seq - cap + 1
+                self.dropped += oldest - read
+                read = oldest
+                continue
+            out.append(item)
+            read += 1
+        self._read = read
+        return out
+
+def _native_thread():
+    """(start_new_thread, allocate_lock) as they were before any gevent monkey-patching.
+
+    The original `threading.Thread` is no help: it still starts through the patched `_thread`.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is not None and monkey.is_module_patched("_thread"):
+        return tuple(monkey.get_original("_thread", ["start_new_thread", "allocate_lock"]))
+    return _thread.start_new_thread, _thread.allocate_lock
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+class LogWriter:
+    """Drains a ring into a size-rotated JSON-lines file (and optionally echoes messages to stdout)."""
+
+    def __init__(self, ring: RingBuffer, path: Path, service: str, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 5, console: bool = True, flush_interval_sec: float = 0.2,
+                 batch: int = 4096):
+        self.ring = ring
+        self.path = path
+        self.service = service
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.console = console
+        self.flush_interval_sec = flush_interval_sec
+        self.batch = batch
+        self.written = 0
+        self._pid = os.getpid()
+        self._reported_drops = 0
+        self._file = None
+        self._size = 0
+        start_new_thread, allocate_lock = _native_thread()
+        self._start_new_thread = start_new_thread
+        self._flush_lock = allocate_lock()
+        self._stop = allocate_lock()      # held until stop(): the writer's wait doubles as its sleep
+        self._finished = allocate_lock()  # held while the writer runs: stop() joins on it
+        self._running = False
+
+    def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+        self._stop.acquire()
+        self._finished.acquire()
+        self._running = True
+        self._start_new_thread(self._run, ())
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._running:
+            self._running = False
+            self._stop.release()
+            if self._finished.acquire(timeout=timeout):
+                self._finished.release()
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.acquire(timeout=self.flush_interval_sec):
+                try:
+                    self.flush()
+                except Exception as e:  # keep the writer alive whatever a record contains
+                    sys.stderr.write(f"[{self.service}] Log writer failed: {e}\n")
+        finally:
+            self._finished.release()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._open()
+
+    def _line(self, record: tuple) -> str:
+        ts, level, event, msg, fields = record
+        doc = {"ts": _iso(ts), "level": level, "service": self.service, "pid": self._pid}
+        if event is not None:
+            doc["event"] = event
+        if msg is not None:
+            doc["msg"] = msg
+        if fields:
+            doc.update(fields)
+        return json.dumps(doc, default=str, separators=(",", ":"))
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            while True:
+                records = self.ring.drain(self.batch)
+                dropped = self.ring.dropped - self._reported_drops
+                if not records and not dropped:
+                    return
+                lines = []
+                if dropped:
+                    self._reported_drops += dropped
+                    lines.append(self._line((time.time(), "warning", "log.dropped", None, {"count": dropped})))
+                lines.extend(self._line(r) for r in records)
+                if self.console:
+                    echo = [f"[{self.service}] {r[3]}\n" for r in records if r[3] is not None]
+                    if echo:
+                        sys.stdout.write("".join(echo))
+                        sys.stdout.flush()
+                chunk = ("\n".join(lines) + "\n").encode("utf-8")
+                if self._file is None:
+                    return
+                if self._size and self._size + len(chunk) > self.max_bytes:
+                    self._rotate()
+                self._file.write(chunk)
+                self._file.flush()
+                self._size += len(chunk)
+                self.written += len(lines)
+
+class Logger:
+    """Per-service logger. log()/info()/event() only ever enqueue; see the module docstring."""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.level = LEVELS["info"]
+        self.sample: Dict[str, int] = {}
+        self.ring: Optional[RingBuffer] = None
+        self._counters: Dict[str, itertools.count] = {}
+
+    def log(self, level: str, msg: Optional[str] = None, event: Optional[str] = None, **fields: Any) -> None:
+        if LEVELS[level] < self.level:
+            return
+        if event is not None:
+            every = self.sample.get(event)
+            if every is not None and every > 1:
+                counter = self._counters.get(event)
+                if counter is None:
+                    counter = self._counters.setdefault(event, itertools.count())
+                if next(counter) % every:
+                    return
+                fields["sample"] = every
+        ring = self.ring
+        if ring is None:
+            if msg is not None:
+                print(f"[{self.service}] {msg}")
+            return
+        ring.put((time.time(), level, event, msg, fields))
+
+    def debug(self, msg: str, **fields: Any) -> None:
+        self.log("debug", msg, **fields)
+
+    def info(self, msg: str, **fields: Any) -> None:
+        self.log("info", msg, **fields)
+
+    def warning(self, msg: str, **fields: Any) -> None:
+        self.log("warning", msg, **fields)
+
+    def error(self, msg: str, **fields: Any) -> None:
+        self.log("error", msg, **fields)
+
+    def event(self, name: str, level: str = "info", **fields: Any) -> None:
+        """A structured record with no console message, e.g. one per request or packet batch."""
+        self.log(level, None, name, **fields)
+
+_loggers: Dict[str, Logger] = {}
+_writers: Dict[str, LogWriter] = {}
+_applied: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+def get_logger(service: str) -> Logger:
+    logger = _loggers.get(service)
+    if logger is None:
+        with _lock:
+            logger = _loggers.setdefault(service, Logger(service))
+    return logger
+
+def configure(service: str, section: Optional[dict], base_dir: Path) -> Logger:
+    """Apply a service's `logging` config section and (re)start its writer thread.
+
+    Safe to call on every config reload: level and sampling change in place,
+    and the writer is only restarted when its own settings changed or the
+    process was forked (threads don't survive fork, so each worker gets its
+    own file when the path contains `{pid}`).
+    """
+    section = dict(section or {})
+    logger = get_logger(service)
+    with _lock:
+        logger.level = LEVELS.get(str(section.get("level", "info")).lower(), LEVELS["info"])
+        logger.sample = {str(k): int(v) for k, v in (section.get("sample") or {}).items()}
+        wanted = (os.getpid(), section.get("enabled", True), section.get("file"), section.get("max_bytes"),
+                  section.get("backups"), section.get("buffer"), section.get("flush_interval_sec"),
+                  section.get("console"))
+        if _applied.get(service) == wanted:
+            return logger
+        _applied[service] = wanted
+        logger.ring = None  # print synchronously while there is no writer
+        old = _writers.pop(service, None)
+        if old is not None and old._pid == os.getpid():
+            old.stop()
+        if not section.get("enabled", True):
+            return logger
+        path = Path(str(section.get("file") or f".data/logs/{service}.jsonl").format(pid=os.getpid()))
+        if not path.is_absolute():
+            path = Path(base_dir) / path
+        ring = RingBuffer(int(section.get("buffer", 65536)))
+        writer = LogWriter(
+            ring, path, service,
+            max_bytes=int(section.get("max_bytes", 10 * 1024 * 1024)),
+            backups=int(section.get("backups", 5)),
+            console=bool(section.get("console", True)),
+            flush_interval_sec=float(section.get("flush_interval_sec", 0.2)),
+        )
+        writer.start()
+        _writers[service] = writer
+        logger.ring = ring
+    return logger
+
+def shutdown() -> None:
+    """Flush and stop every writer; later calls print synchronously again."""
+    with _lock:
+        for service, writer in list(_writers.items()):
+            _loggers[service].ring = None
+            if writer._pid == os.getpid():
+                writer.stop()
+        _writers.clear()
+        _applied.clear()
@@ -0,0 +1,131 @@
+# my-azure-labs-collection/custom-services/shared/schemas.py
+# Pydantic models for each service's app.json. Only the keys the code relies on are
+# declared; anything else is allowed through so configs can grow without edits here.
+from __future__ import annotations
+from typing import Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+class _Section(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+class HeartbeatSection(_Section):
+    path: Optional[str] = None
+    interval_sec: float = Field(default=1.0, gt=0)
+
+class LoggingSection(_Section):
+    enabled: bool = True
+    file: Optional[str] = None
+    level: Literal["debug", "info", "warning", "error"] = "info"
+    max_bytes: int = Field(default=10 * 1024 * 1024, ge=1024)
+    backups: int = Field(default=5, ge=0)
+    buffer: int = Field(default=65536, ge=1)
+    flush_interval_sec: float = Field(default=0.2, gt=0)
+    console: bool = True
+    sample: Dict[str, int] = {}
+
+class TelemetrySection(_Section):
+    interval_sec: float = Field(default=2.0, gt=0)
+    history: int = Field(default=1800, ge=2)
+
+class _ServiceConfig(_Section):
+    first_time_setup: bool = Field(default=True, alias="first-time-setup")
+    configured: bool = False
+    heartbeat: HeartbeatSection = HeartbeatSection()
+    logging: LoggingSection = LoggingSection()
+    telemetry: TelemetrySection = TelemetrySection()
+
+class PolicySection(_Section):
+    name: Optional[str] = None
+    src: Optional[str] = None
+    dst: Optional[str] = None
+    proto: Optional[Union[str, int]] = None
+    dst_port: Optional[Union[str, int]] = None
+    via: Optional[str] = None
+    action: Literal["forward", "drop"] = "forward"
+    next_hop: Optional[str] = None
+
+class FlowCacheSection(_Section):
+    enabled: bool = False
+    capacity: int = Field(default=4096, ge=1)
+
+class ProbeTargetSection(_Section):
+    type: Literal["tcp", "udp"] = "tcp"
+    port: int = Field(ge=0, le=65535)
+
+class ProbesSection(_Section):
+    enabled: bool = False
+    interval_sec: float = Field(default=2.0, gt=0)
+    timeout_sec: float = Field(default=1.0, gt=0)
+    jitter: float = Field(default=0.2, ge=0, lt=1)
+    rise: int = Field(default=2, ge=1)
+    fall: int = Field(default=3, ge=1)
+    max_concurrent: int = Field(default=512, ge=1)
+    targets: Dict[str, ProbeTargetSection] = {}
+
+class GracefulRestartSection(_Section):
+    enabled: bool = False
+    restart_time: int = Field(default=120, ge=0, le=4095)
+    stale_path_time: float = Field(default=360.0, gt=0)
+    preserve_forwarding: bool = True
+
+class BgpSection(_Section):
+    graceful_restart: GracefulRestartSection = GracefulRestartSection()
+
+class DataplaneSection(_Section):
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = Field(default=5001, ge=1, le=65535)
+
+class JournalSection(_Section):
+    enabled: bool = False
+    dir: str = ".data/journal"
+    segment_mb: int = Field(default=64, ge=1)
+    fsync: bool = True
+    snapshot_every: int = Field(default=100000, ge=1)
+    keep_segments: int = Field(default=4, ge=1)
+
+class RouterSection(_Section):
+    host: str = "127.0.0.1"
+    port: int = Field(default=5000, ge=1, le=65535)
+    routing_table: Dict[str, Union[str, List[str]]] = {}
+    journal: JournalSection = JournalSection()
+    dataplane: DataplaneSection = DataplaneSection()
+    probes: ProbesSection = ProbesSection()
+    policies: List[PolicySection] = []
+    flow_cache: FlowCacheSection = FlowCacheSection()
+    bgp: BgpSection = BgpSection()
+
+class RouterConfig(_ServiceConfig):
+    router: RouterSection
+
+class ApiSection(_Section):
+    host: str = "127.0.0.1"
+    port: int = Field(default=8080, ge=1, le=65535)
+
+class ApiConfig(_ServiceConfig):
+    api: ApiSection
+
+class FrontendSection(_Section):
+    host: str = "127.0.0.1"
+    port: int = Field(default=8501, ge=1, le=65535)
+    server: str = "werkzeug"
+    workers: int = Field(default=2, ge=1)
+    threads: int = Field(default=8, ge=1)
+
+class FleetSource(_Section):
+    service: str
+    dir: str
+    pattern: str = ".heartbeat*"
+
+class FleetSection(_Section):
+    stale_after_sec: float = Field(default=5.0, gt=0)
+    scan_interval_sec: float = Field(default=1.0, gt=0)
+    sources: List[FleetSource] = []
+
+class FrontendConfig(_ServiceConfig):
+    frontend: FrontendSection = FrontendSection()
+    integrations: Dict[str, Dict[str, str]] = {}
+    fleet: FleetSection = FleetSection()
+
+MODELS = {"router": RouterConfig, "api": ApiConfig, "frontend": FrontendConfig}
@@ -0,0 +1,249 @@
+# my-azure-labs-collection/custom-services/shared/telemetry.py
+"""Resource telemetry for the processes a controller manages.
+
+One daemon thread per controller samples each watched process tree every
+`interval_sec`: CPU %, RSS, open fds (handles on Windows), threads and
+context switches. Children are included, so gunicorn workers count toward
+the frontend; CPU is also kept for the busiest single process, since each
+one is its own interpreter and saturates at one core. Each sample is one
+tuple appended to a deque with a fixed `maxlen`, so a lab run of any length
+keeps the last `history` samples and nothing more. The status commands read
+it to show trends (RSS growth per minute, a process near one full core) next
+to the usual heartbeat line.
+
+psutil is optional: the controllers run on the system interpreter, and
+without psutil they report that instead of failing.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import psutil  # type: ignore
+except ImportError:  # optional; status commands say how to enable it
+    psutil = None
+
+MB = 1024 * 1024
+SPARK = " .:-=+*#%@"  # ASCII so it prints on any console codepage
+
+class Sample(NamedTuple):
+    ts: float
+    cpu_pct: float      # of one core; 200.0 means two cores busy
+    rss: int            # bytes, whole process tree
+    fds: int            # open fds (POSIX) or handles (Windows)
+    threads: int
+    ctx_switches: int   # voluntary + involuntary, cumulative
+    procs: int          # processes in the tree
+    cpu_top: float      # busiest single process, % of one core
+
+class _Watched:
+    __slots__ = ("pid", "proc", "series", "cpu", "last_ts", "error")
+
+    def __init__(self, pid: int, history: int):
+        self.pid = pid
+        self.proc = psutil.Process(pid)
+        self.series: Deque[Sample] = deque(maxlen=history)
+        self.cpu: Dict[int, float] = {}   # pid -> cumulative cpu seconds at the last sample
+        self.last_ts: Optional[float] = None
+        self.error: Optional[str] = None
+
+def _read(proc) -> Tuple[float, int, int, int, int]:
+    with proc.oneshot():  # one /proc read per process instead of one per metric
+        t = proc.cpu_times()
+        fds = proc.num_handles() if os.name == "nt" else proc.num_fds()
+        ctx = proc.num_ctx_switches()
+        return t.user + t.system, proc.memory_info().rss, fds, proc.num_threads(), ctx.voluntary + ctx.involuntary
+
+class ResourceSampler:
+    """Samples watched process trees on one background thread."""
+
+    def __init__(self, interval_sec: float = 2.0, history: int = 1800):
+        self.interval_sec = interval_sec
+        self.history = history
+        self._watched: Dict[str, _Watched] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return psutil is not None
+
+    def watch(self, name: str, pid: int) -> None:
+        """Start a fresh series for `name`; a restarted child gets a new one."""
+        if psutil is None:
+            return
+        try:
+            w = _Watched(pid, self.history)
+        except psutil.Error:
+            return
+        self._sample(w)  # prime the CPU baseline so the first real sample has a rate
+        with self._lock:  # published only once primed: the thread never sees it half-set
+            self._watched[name] = w
+        self.start()
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self._watched.pop(name, None)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval_sec + 1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            with self._lock:
+                names = list(self._watched)
+            for name in names:
+                self.sample(name)
+
+    def sample(self, name: str) -> Optional[Sample]:
+        with self._lock:
+            w = self._watched.get(name)
+        return self._sample(w) if w is not None else None
+
+    def _sample(self, w: _Watched) -> Optional[Sample]:
+        try:
+            procs = [w.proc] + w.proc.children(recursive=True)
+        except psutil.Error as e:
+            w.error = type(e).__name__  # exited; keep the series for post-mortem trends
+            return None
+        now = time.time()
+        cpu: Dict[int, float] = {}
+        rss = fds = threads = ctx = 0
+        for p in procs:
+            try:
+                c, r, f, t, x = _read(p)
+            except psutil.Error:
+                continue  # a worker exited between children() and the read
+            cpu[p.pid] = c
+            rss += r
+            fds += f
+            threads += t
+            ctx += x
+        first = w.last_ts is None
+        # Per-pid deltas: a worker that exits or respawns must not show up as negative CPU.
+        deltas = [c - w.cpu.get(pid, c) for pid, c in cpu.items()]
+        elapsed = now - (w.last_ts or now)
+        w.cpu, w.last_ts, w.error = cpu, now, None
+        if first:
+            return None
+        scale = 100.0 / elapsed if elapsed > 0 else 0.0
+        s = Sample(now, round(sum(deltas) * scale, 1), rss, fds, threads, ctx, len(cpu),
+                   round(max(deltas, default=0.0) * scale, 1))
+        w.series.append(s)
+        return s
+
+    def series(self, name: str, window_sec: Optional[float] = None) -> List[Sample]:
+        with self._lock:
+            w = self._watched.get(name)
+            data = list(w.series) if w is not None else []
+        if window_sec is not None and data:
+            cutoff = data[-1].ts - window_sec
+            data = [s for s in data if s.ts >= cutoff]
+        return data
+
+    def error(self, name: str) -> Optional[str]:
+        w = self._watched.get(name)
+        return w.error if w is not None else None
+
+    # ---- Presentation (the controllers print these as `[status] ...`) ----
+
+    def status_lines(self, name: str, window_sec: float = 300.0) -> List[str]:
+        if psutil is None:
+            return ["Resources: unavailable (pip install psutil in the controller's interpreter)"]
+        data = self.series(name, window_sec)
+        if not data:
+            return ["Resources: no samples yet"]
+        last = data[-1]
+        lines = [f"Resources: cpu {last.cpu_pct:.1f}%, rss {last.rss / MB:.1f} MB, fds {last.fds}, "
+                 f"threads {last.threads}, procs {last.procs}, ctx {_ctx_rate(data):.0f}/s"]
+        if len(data) >= 2:
+            t = trend(data)
+            flags = [f for f, on in (("RSS RISING", t["rss_rising"]), ("CPU SATURATED", t["cpu_saturated"])) if on]
+            lines.append(f"Trend {_span(data)}: rss {t['rss_mb_per_min']:+.2f} MB/min, "
+                         f"cpu avg {t['cpu_avg']:.1f}% max {t['cpu_max']:.1f}% (busiest proc avg {t['cpu_top_avg']:.1f}%), "
+                         f"fds {t['fds_delta']:+d}"
+                         + (f"  <- {', '.join(flags)}" if flags else ""))
+        if self.error(name):
+            lines.append(f"Sampling stopped: process gone ({self.error(name)})")
+        return lines
+
+    def trend_lines(self, name: str, window_sec: float = 1800.0, width: int = 60) -> List[str]:
+        if psutil is None:
+            return self.status_lines(name)
+        data = self.series(name, window_sec)
+        if len(data) < 2:
+            return [f"Trend: not enough samples yet (every {self.interval_sec:g}s)"]
+        # Clamped like _ctx_rate: the cumulative count drops when a worker exits.
+        rates = [0.0] + [max(b.ctx_switches - a.ctx_switches, 0) / max(b.ts - a.ts, 1e-9)
+                         for a, b in zip(data, data[1:])]
+        rows = [
+            ("cpu %", [s.cpu_pct for s in data], "{:.1f}"),
+            ("rss MB", [s.rss / MB for s in data], "{:.1f}"),
+            ("fds", [float(s.fds) for s in data], "{:.0f}"),
+            ("threads", [float(s.threads) for s in data], "{:.0f}"),
+            ("ctx/s", rates, "{:.0f}"),
+        ]
+        out = [f"Trend over {_span(data)} ({len(data)} samples, every {self.interval_sec:g}s):"]
+        for label, values, fmt in rows:
+            out.append(f"  {label:<8}|{sparkline(values, width)}| "
+                       f"min {fmt.format(min(values))} max {fmt.format(max(values))} now {fmt.format(values[-1])}")
+        return out
+
+def _span(data: Sequence[Sample]) -> str:
+    secs = data[-1].ts - data[0].ts
+    return f"{secs / 60:.0f}m" if secs >= 120 else f"{secs:.0f}s"
+
+def _ctx_rate(data: Sequence[Sample]) -> float:
+    if len(data) < 2:
+        return 0.0
+    a, b = data[-2], data[-1]
+    return max(b.ctx_switches - a.ctx_switches, 0) / max(b.ts - a.ts, 1e-9)
+
+def _slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope; steadier than last-minus-first when GC makes RSS saw-tooth."""
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    den = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den if den else 0.0
+
+def trend(data: Sequence[Sample], rising_mb_per_min: float = 1.0, saturated_pct: float = 90.0) -> dict:
+    """Summary of a window of samples, with the two conditions worth shouting about."""
+    mb_per_min = _slope([s.ts for s in data], [s.rss / MB for s in data]) * 60
+    cpu = [s.cpu_pct for s in data]
+    top_avg = sum(s.cpu_top for s in data) / len(data)
+    return {
+        "rss_mb_per_min": mb_per_min,
+        "rss_rising": mb_per_min >= rising_mb_per_min,
+        "cpu_avg": sum(cpu) / len(cpu),
+        "cpu_max": max(cpu),
+        "cpu_top_avg": top_avg,
+        # Each process is one Python interpreter, so one busy core is its ceiling. Judge the
+        # busiest process alone: four gunicorn workers at 25% each are nowhere near it.
+        "cpu_saturated": top_avg >= saturated_pct,
+        "fds_delta": data[-1].fds - data[0].fds,
+    }
+
+def sparkline(values: Sequence[float], width: int = 60) -> str:
+    """Bucket `values` into `width` columns (max per bucket) and draw them with SPARK."""
+    if not values:
+        return ""
+    if len(values) > width:
+        step = len(values) / width
+        values = [max(values[int(i * step):max(int((i + 1) * step), int(i * step) + 1)]) for i in range(width)]
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1.0
+    top = len(SPARK) - 1
+    return "".join(SPARK[round((v - lo) / span * top)] if hi > lo else SPARK[top // 2] for v in values)